@@ -0,0 +1,3 @@
+from mike_action_provider.asgi import create_asgi_app
+
+app = create_asgi_app()
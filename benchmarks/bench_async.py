@@ -0,0 +1,188 @@
+"""Benchmark concurrent status polling against the WSGI and ASGI apps.
+
+Each app is started in its own process: the Flask app on the threaded
+development server, as ``flask run`` serves it, and the Starlette app on
+uvicorn. Token introspection is answered by a local fake Globus Auth server
+with a configurable delay. Every poller has its own action and polls its
+status as fast as it can for the given duration. Pollers share ``--tokens``
+tokens round robin, since the toolkit only caches the introspection of 100
+tokens per process.
+
+Usage:
+    uv run python benchmarks/bench_async.py --pollers 1000 --duration 10
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from statistics import quantiles
+
+import click
+import httpx
+
+from fake_globus import identity_for, start_fake_globus
+
+CLIENT_ID = "00000000-0000-0000-0000-000000000000"
+
+SERVERS = {
+    "wsgi": ["-m", "flask", "--app", "wsgi", "run", "--port", "{port}"],
+    "asgi": [
+        "-m",
+        "uvicorn",
+        "asgi:app",
+        "--port",
+        "{port}",
+        "--log-level",
+        "warning",
+    ],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(tokens: list) -> list:
+    """Create one ACTIVE action per token, monitored by the token's identity."""
+    from mike_action_provider.db.connection import get_db, init_db
+    from mike_action_provider.db.crud import create_action_statuses
+
+    init_db()
+    actions = []
+    for token in tokens:
+        identity = f"urn:globus:auth:identity:{identity_for(token)}"
+        actions.append(
+            {
+                "action_id": str(uuid.uuid4()),
+                "status": "ACTIVE",
+                "creator_id": identity,
+                "monitor_by": identity,
+                "manage_by": identity,
+                "release_after": "30 days, 0:00:00",
+                "display_status": "ACTIVE",
+                "request_json": {"request_id": "bench", "body": {"utc_offset": 1}},
+            }
+        )
+    with get_db() as db:
+        create_action_statuses(db, actions)
+    return [action["action_id"] for action in actions]
+
+
+async def _poll(client, url, token, deadline, latencies, errors):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, headers=headers)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as err:
+            errors.append(type(err).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def _load(base_url, tokens, action_ids, duration, timeout):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=len(tokens), max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        deadline = time.monotonic() + duration
+        await asyncio.gather(
+            *(
+                _poll(
+                    client,
+                    f"{base_url}/apt/{action_id}/status",
+                    token,
+                    deadline,
+                    latencies,
+                    errors,
+                )
+                for token, action_id in zip(tokens, action_ids)
+            )
+        )
+    return latencies, errors
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen) -> None:
+    for _ in range(200):
+        if process.poll() is not None:
+            raise click.ClickException("Server exited during startup")
+        try:
+            httpx.get(f"{base_url}/ping", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    raise click.ClickException("Server did not start")
+
+
+@click.command()
+@click.option("--pollers", default=1000, show_default=True, help="Concurrent pollers.")
+@click.option("--tokens", default=50, show_default=True, help="Distinct tokens.")
+@click.option("--duration", default=10.0, show_default=True, help="Seconds per app.")
+@click.option(
+    "--introspect-latency",
+    default=0.05,
+    show_default=True,
+    help="Seconds the fake Globus Auth takes per token introspection.",
+)
+@click.option("--profile", default="concurrent", show_default=True)
+@click.option("--timeout", default=30.0, show_default=True, help="Request timeout.")
+def main(pollers, tokens, duration, introspect_latency, profile, timeout):
+    """Compare status polling throughput and latency of the WSGI and ASGI apps."""
+    scope = f"https://auth.globus.org/scopes/{CLIENT_ID}/action_all"
+    fake_globus, auth_url = start_fake_globus(scope, introspect_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(
+            DB_PATH=str(Path(tmp) / "bench.db"),
+            DB_PROFILE=profile,
+            GLOBUS_CLIENT_ID=CLIENT_ID,
+            GLOBUS_CLIENT_SECRET="bench-secret",
+            GLOBUS_SDK_SERVICE_URL_AUTH=auth_url,
+            MAX_SLEEP_TIME=str(24 * 60 * 60),
+            LOG_LEVEL="WARNING",
+        )
+        for app_name, args in SERVERS.items():
+            # Fresh tokens so that each app introspects them itself.
+            poller_tokens = [
+                f"bench-{app_name}-{i % tokens:06d}-token" for i in range(pollers)
+            ]
+            action_ids = _seed(poller_tokens)
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = subprocess.Popen(
+                [sys.executable, *(arg.format(port=port) for arg in args)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_ready(base_url, process)
+                latencies, errors = asyncio.run(
+                    _load(base_url, poller_tokens, action_ids, duration, timeout)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+
+            if len(latencies) < 2:
+                click.echo(f"{app_name}: no successful polls, {len(errors)} errors")
+                continue
+            cuts = quantiles(latencies, n=100)
+            click.echo(
+                f"{app_name}: {len(latencies) / duration:8.1f} polls/s, "
+                f"p50 {cuts[49] * 1000:7.1f} ms, p99 {cuts[98] * 1000:7.1f} ms, "
+                f"{len(errors)} errors"
+            )
+    fake_globus.shutdown()
+
+
+if __name__ == "__main__":
+    main()
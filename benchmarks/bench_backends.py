@@ -0,0 +1,112 @@
+"""Benchmark the storage backends on the operations behind the API routes.
+
+Threads create actions and then poll, authorize and complete them through a
+StorageSession, as the run, status and cancel routes do, against the sqlite
+backend with each storage profile and the memory backend with one stripe
+(a single lock) and with the configured number of stripes.
+
+Usage:
+    uv run python benchmarks/bench_backends.py --threads 8 --actions 2000
+"""
+
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import click
+from sqlalchemy.orm import sessionmaker
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+ROLES = ("creator_id", "monitor_by")
+
+
+def _action(action_id: str) -> dict:
+    return {
+        "action_id": action_id,
+        "status": "ACTIVE",
+        "creator_id": IDENTITY,
+        "monitor_by": IDENTITY,
+        "manage_by": IDENTITY,
+        "release_after": "P30D",
+        "display_status": "ACTIVE",
+        "request_json": {"request_id": "bench", "body": {"utc_offset": 1}},
+    }
+
+
+class _SQLiteBackend:
+    """The sqlite backend on its own engine, so profiles can be compared."""
+
+    def __init__(self, db_path: Path, profile: str, threads: int) -> None:
+        from mike_action_provider.db.connection import build_engine
+        from mike_action_provider.db.models import Base
+
+        self.engine = build_engine(db_path, profile=profile, pool_size=threads)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(autoflush=False, bind=self.engine)
+
+    @contextmanager
+    def session(self):
+        from mike_action_provider.storage.sqlite import SQLiteSession
+
+        with self.session_factory() as db:
+            yield SQLiteSession(db)
+
+
+def _run(backend, threads: int, actions: int, polls: int) -> float:
+    """Run the workload and return the operations per second."""
+
+    def lifecycle(_):
+        action_id = str(uuid.uuid4())
+        with backend.session() as store:
+            store.create(_action(action_id))
+        for _ in range(polls):
+            with backend.session() as store:
+                store.get_principals(action_id, ROLES, [IDENTITY])
+                store.get(action_id)
+        with backend.session() as store:
+            store.transition(action_id, ["ACTIVE"], status="FAILED")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lifecycle, range(actions)))
+    elapsed = time.perf_counter() - start
+    return actions * (polls + 2) / elapsed
+
+
+@click.command()
+@click.option("--threads", default=8, show_default=True, help="Concurrent threads.")
+@click.option("--actions", default=2000, show_default=True, help="Actions created.")
+@click.option("--polls", default=5, show_default=True, help="Status polls per action.")
+@click.option("--stripes", default=64, show_default=True, help="Memory stripes.")
+def main(threads, actions, polls, stripes):
+    """Compare the throughput of the storage backends."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = str(Path(tmp) / "unused.db")
+        from mike_action_provider.db.connection import STORAGE_PROFILES
+        from mike_action_provider.storage.memory import MemoryStorage
+
+        backends = [
+            (
+                f"sqlite ({profile})",
+                lambda profile=profile: _SQLiteBackend(
+                    Path(tmp) / f"{profile}.db", profile, threads
+                ),
+            )
+            for profile in STORAGE_PROFILES
+        ]
+        backends += [
+            ("memory (1 stripe)", lambda: MemoryStorage(stripes=1)),
+            (f"memory ({stripes} stripes)", lambda: MemoryStorage(stripes=stripes)),
+        ]
+        click.echo(f"{threads} threads, {actions} actions, {polls} polls each")
+        for name, build in backends:
+            ops = _run(build(), threads, actions, polls)
+            click.echo(f"{name:<24} {ops:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark creating actions one by one against a single batch insert.
+
+Each storage profile runs in a fresh process so that it picks up its settings
+from the environment exactly as the application does. The same number of
+actions is created with one ``create_action_status`` call (and commit) per
+action, as N single ``my_action_run`` calls do, and with one
+``create_action_statuses`` call, as a batch run does.
+
+Usage:
+    uv run python benchmarks/bench_batch_run.py --actions 500 --repeat 3
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+
+PROFILES = ["default", "concurrent"]
+
+
+def _action() -> dict:
+    return {
+        "action_id": str(uuid.uuid4()),
+        "status": "ACTIVE",
+        "creator_id": IDENTITY,
+        "monitor_by": IDENTITY,
+        "manage_by": IDENTITY,
+        "release_after": "30 days, 0:00:00",
+        "display_status": "ACTIVE",
+        "request_json": {"request_id": "bench", "body": {"utc_offset": 1}},
+        "label": None,
+        "details": {},
+    }
+
+
+def _run_profile(db_path: str, profile: str, actions: int, repeat: int) -> dict:
+    """Time single and batch creation, returning the best seconds of each."""
+    os.environ.update(DB_PATH=db_path, DB_PROFILE=profile)
+    from mike_action_provider.db.connection import get_db, init_db
+    from mike_action_provider.db.crud import (
+        create_action_status,
+        create_action_statuses,
+    )
+
+    init_db()
+    timings = {"single": [], "batch": []}
+    for _ in range(repeat):
+        batch = [_action() for _ in range(actions)]
+        start = time.perf_counter()
+        with get_db() as db:
+            for action in batch:
+                create_action_status(db=db, **action)
+        timings["single"].append(time.perf_counter() - start)
+
+        batch = [_action() for _ in range(actions)]
+        start = time.perf_counter()
+        with get_db() as db:
+            create_action_statuses(db, batch)
+        timings["batch"].append(time.perf_counter() - start)
+    return {mode: min(values) for mode, values in timings.items()}
+
+
+@click.command()
+@click.option("--actions", default=500, show_default=True, help="Actions per run.")
+@click.option("--repeat", default=3, show_default=True, help="Runs per mode.")
+def main(actions, repeat):
+    """Compare N single action creations with one batch creation."""
+    context = multiprocessing.get_context("spawn")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            with context.Pool(1) as pool:
+                timings = pool.apply(_run_profile, (db_path, profile, actions, repeat))
+        for mode, elapsed in timings.items():
+            click.echo(
+                f"{profile:>10} / {mode:<6}: {actions / elapsed:9.1f} actions/s "
+                f"({elapsed * 1000:.1f} ms for {actions})"
+            )
+        click.echo(
+            f"{profile:>10} speedup: {timings['single'] / timings['batch']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark the cost of the details format on the status polling path.
+
+Rows written before row format 2 hold details as a JSON encoded string inside
+the JSON column, so every read decodes them twice and every write encodes
+them twice. The same actions are stored in both formats and the decode, the
+full status load and the completion encode are timed per request, single
+threaded. The rate of the batched ``convert_legacy_details`` rewrite is
+reported too.
+
+Usage:
+    uv run python benchmarks/bench_details.py --actions 1000 --repeat 20
+"""
+
+import datetime as dt
+import json
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+
+
+def _details() -> dict:
+    now = dt.datetime.now(dt.timezone.utc)
+    return {
+        "utc_offset": 10,
+        "utc_time": now.isoformat(),
+        "local_time": (now + dt.timedelta(hours=10)).isoformat(),
+    }
+
+
+def _time_per_call(function, arguments, repeat: int) -> float:
+    """Call a function once per argument, repeatedly, and return microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for argument in arguments:
+            function(argument)
+    return (time.perf_counter() - start) / (repeat * len(arguments)) * 1e6
+
+
+@click.command()
+@click.option("--actions", default=1000, show_default=True, help="Actions per format.")
+@click.option("--repeat", default=20, show_default=True, help="Passes over them.")
+def main(actions, repeat):
+    """Compare double-encoded details with native JSON details."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = str(Path(tmp) / "bench.db")
+        from mike_action_provider.db.connection import get_db, init_db
+        from mike_action_provider.db.crud import (
+            convert_legacy_details,
+            create_action_statuses,
+            get_action_status_row,
+        )
+        from mike_action_provider.hydration import row_to_action_status
+
+        init_db()
+        action_ids = {"legacy": [], "native": []}
+        rows = []
+        for details_format in action_ids:
+            for _ in range(actions):
+                details = _details()
+                action_id = str(uuid.uuid4())
+                action_ids[details_format].append(action_id)
+                rows.append(
+                    {
+                        "action_id": action_id,
+                        "status": "SUCCEEDED",
+                        "creator_id": IDENTITY,
+                        "monitor_by": IDENTITY,
+                        "manage_by": IDENTITY,
+                        "release_after": "30 days, 0:00:00",
+                        "display_status": "Action completed",
+                        "request_json": {"request_id": "bench", "body": {}},
+                        # A string is stored JSON encoded, as before row format 2.
+                        "details": (
+                            json.dumps(details)
+                            if details_format == "legacy"
+                            else details
+                        ),
+                    }
+                )
+        with get_db() as db:
+            create_action_statuses(db, rows)
+
+        stored = {
+            "legacy": json.dumps(json.dumps(_details())),
+            "native": json.dumps(_details()),
+        }
+        details = _details()
+        results = [
+            (
+                "decode: legacy (2 loads)",
+                lambda text: json.loads(json.loads(text)),
+                [stored["legacy"]] * actions,
+            ),
+            ("decode: native (1 load)", json.loads, [stored["native"]] * actions),
+            (
+                "encode: legacy (2 dumps)",
+                lambda value: json.dumps(json.dumps(value)),
+                [details] * actions,
+            ),
+            ("encode: native (1 dump)", json.dumps, [details] * actions),
+        ]
+        with get_db() as db:
+            for details_format, ids in action_ids.items():
+                results.append(
+                    (
+                        f"status load: {details_format}",
+                        lambda action_id: row_to_action_status(
+                            get_action_status_row(db, action_id)
+                        ),
+                        ids,
+                    )
+                )
+            for name, function, arguments in results:
+                per_call = _time_per_call(function, arguments, repeat)
+                click.echo(f"{name:<28} {per_call:8.2f} us/request")
+
+            start = time.perf_counter()
+            after, converted = 0, 0
+            while after is not None:
+                after, count = convert_legacy_details(db, after, 1000)
+                converted += count
+            elapsed = time.perf_counter() - start
+            click.echo(
+                f"converted {converted} legacy rows in {elapsed * 1000:.1f} ms "
+                f"({converted / elapsed:,.0f} rows/s)"
+            )
+            for action_id in action_ids["legacy"][:1]:
+                row = get_action_status_row(db, action_id)
+                assert isinstance(row.details, dict), row.details
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark action creation throughput with and without group commit.
+
+Each configuration runs in a fresh process so that it picks up its settings
+from the environment exactly as the application does, then creates actions
+from many threads at once to simulate a burst of ``my_action_run`` calls.
+
+Usage:
+    uv run python benchmarks/bench_group_commit.py --threads 32 --actions 2000
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import click
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+
+SCENARIOS = [
+    ("default", False),
+    ("default", True),
+    ("concurrent", False),
+    ("concurrent", True),
+]
+
+
+def _run_scenario(
+    db_path: str, profile: str, group_commit: bool, threads: int, actions: int
+) -> float:
+    """Create actions from a thread pool and return the elapsed seconds."""
+    os.environ.update(
+        DB_PATH=db_path,
+        DB_PROFILE=profile,
+        DB_POOL_SIZE=str(threads),
+        DB_GROUP_COMMIT=str(group_commit).lower(),
+    )
+    from mike_action_provider.db.connection import get_db, init_db
+    from mike_action_provider.db.crud import create_action_status
+
+    init_db()
+
+    def create(_):
+        with get_db() as db:
+            create_action_status(
+                db=db,
+                action_id=str(uuid.uuid4()),
+                status="ACTIVE",
+                creator_id=IDENTITY,
+                monitor_by=IDENTITY,
+                manage_by=IDENTITY,
+                release_after="P30D",
+                display_status="ACTIVE",
+                request_json={"body": {"utc_offset": 1}},
+                details={},
+            )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(create, range(actions)))
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("--threads", default=32, show_default=True, help="Concurrent callers.")
+@click.option("--actions", default=2000, show_default=True, help="Actions to create.")
+def main(threads, actions):
+    """Compare direct commits with group commit for each storage profile."""
+    context = multiprocessing.get_context("spawn")
+    for profile, group_commit in SCENARIOS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            with context.Pool(1) as pool:
+                elapsed = pool.apply(
+                    _run_scenario, (db_path, profile, group_commit, threads, actions)
+                )
+        mode = "group commit" if group_commit else "direct"
+        click.echo(
+            f"{profile:>10} / {mode:<12}: {actions / elapsed:8.1f} actions/s "
+            f"({elapsed:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
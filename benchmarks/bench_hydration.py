@@ -0,0 +1,128 @@
+"""Benchmark loading an action status on the status polling path.
+
+Compares the previous approach, loading the full ORM object and building a
+validated ``ActionStatus``, with selecting only the status columns and
+building the model without validation. Both the whole load and the model
+construction alone are timed, single threaded, to show the CPU spent per
+request.
+
+Usage:
+    uv run python benchmarks/bench_hydration.py --actions 1000 --repeat 20
+"""
+
+import datetime as dt
+import os
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+
+
+def _orm_to_action_status(db_action):
+    """Build a validated ActionStatus from an ORM object, as done previously."""
+    from globus_action_provider_tools import ActionStatus
+
+    return ActionStatus(
+        action_id=db_action.action_id,
+        status=db_action.status,
+        creator_id=db_action.creator_id,
+        label=db_action.label,
+        monitor_by=set(db_action.monitor_by.split(",")),
+        manage_by=set(db_action.manage_by.split(",")),
+        start_time=db_action.start_time.isoformat(),
+        completion_time=(
+            db_action.completion_time.replace(tzinfo=dt.timezone.utc).isoformat()
+            if db_action.completion_time
+            else None
+        ),
+        release_after=db_action.release_after,
+        display_status=db_action.display_status[:64],
+        details=db_action.details or {},
+    )
+
+
+def _time_per_call(function, arguments, repeat: int) -> float:
+    """Call a function once per argument, repeatedly, and return microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for argument in arguments:
+            function(argument)
+    return (time.perf_counter() - start) / (repeat * len(arguments)) * 1e6
+
+
+@click.command()
+@click.option("--actions", default=1000, show_default=True, help="Actions to load.")
+@click.option("--repeat", default=20, show_default=True, help="Passes over them.")
+def main(actions, repeat):
+    """Compare ORM loading with column selects and unvalidated construction."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = str(Path(tmp) / "bench.db")
+        from mike_action_provider.db.connection import get_db, init_db
+        from mike_action_provider.db.crud import (
+            create_action_status,
+            get_action_status,
+            get_action_status_row,
+            update_action_status,
+        )
+        from mike_action_provider.hydration import row_to_action_status
+
+        init_db()
+        action_ids = [str(uuid.uuid4()) for _ in range(actions)]
+        with get_db() as db:
+            for action_id in action_ids:
+                create_action_status(
+                    db=db,
+                    action_id=action_id,
+                    status="ACTIVE",
+                    creator_id=IDENTITY,
+                    monitor_by=IDENTITY,
+                    manage_by=IDENTITY,
+                    release_after="30 days, 0:00:00",
+                    display_status="ACTIVE",
+                    request_json={"body": {"utc_offset": 1}},
+                    label="benchmark",
+                    details={},
+                )
+            # Complete half of them, so both shapes of row are exercised.
+            for action_id in random.sample(action_ids, actions // 2):
+                update_action_status(
+                    db=db,
+                    action_id=action_id,
+                    status="SUCCEEDED",
+                    display_status="Action completed",
+                    completion_time=dt.datetime.now(dt.timezone.utc),
+                    details={"utc_offset": 1, "utc_time": "x"},
+                )
+
+        with get_db() as db:
+
+            def orm_load(action_id):
+                db_action = get_action_status(db, action_id)
+                db.expunge(db_action)
+                return _orm_to_action_status(db_action), db_action.utc_offset
+
+            def column_load(action_id):
+                row = get_action_status_row(db, action_id)
+                return row_to_action_status(row), row.utc_offset
+
+            orm_objects = [get_action_status(db, action_id) for action_id in action_ids]
+            rows = [get_action_status_row(db, action_id) for action_id in action_ids]
+
+            results = [
+                ("load: ORM object + validation", orm_load, action_ids),
+                ("load: columns + construct", column_load, action_ids),
+                ("build: validated ActionStatus", _orm_to_action_status, orm_objects),
+                ("build: construct from row", row_to_action_status, rows),
+            ]
+            for name, function, arguments in results:
+                per_call = _time_per_call(function, arguments, repeat)
+                click.echo(f"{name:<32} {per_call:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark action_statuses queries before and after the index migration.
+
+A database at schema version 1 (no secondary indexes) is filled with
+synthetic actions. The query plan and latency of the sweep, listing and
+retention queries are measured, the remaining migrations are applied with
+``migrate`` and the same queries are measured again.
+
+Usage:
+    uv run python benchmarks/bench_indexes.py --rows 2000000
+"""
+
+import datetime as dt
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+from mike_action_provider.db.migrations import migrate
+
+CREATORS = [f"urn:globus:auth:identity:{uuid.UUID(int=index)}" for index in range(1000)]
+
+QUERIES = {
+    "sweep expired ACTIVE": (
+        "SELECT action_id FROM action_statuses "
+        "WHERE status = 'ACTIVE' AND is_released = 0 AND start_time < :cutoff"
+    ),
+    "list by creator": (
+        "SELECT action_id FROM action_statuses "
+        "WHERE creator_id = :creator_id AND status = 'ACTIVE'"
+    ),
+    "oldest released": (
+        "SELECT action_id FROM action_statuses "
+        "WHERE is_released = 1 ORDER BY start_time LIMIT 500"
+    ),
+}
+
+
+def _generate_rows(count: int, now: dt.datetime):
+    """Yield synthetic rows: mostly completed, some released, 1% ACTIVE."""
+    details = '"{}"'
+    request_json = '{"body": {"utc_offset": 1}}'
+    for index in range(count):
+        creator_id = random.choice(CREATORS)
+        start_time = now - dt.timedelta(seconds=random.randint(0, 90 * 86400))
+        roll = random.random()
+        if roll < 0.01:
+            status, completion_time, is_released = "ACTIVE", None, 0
+        else:
+            status = "SUCCEEDED" if roll < 0.95 else "FAILED"
+            completion_time = (start_time + dt.timedelta(minutes=2)).strftime(
+                "%Y-%m-%d %H:%M:%S.%f"
+            )
+            is_released = int(roll > 0.7)
+        yield (
+            str(uuid.UUID(int=index)),
+            status,
+            creator_id,
+            creator_id,
+            creator_id,
+            start_time.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            completion_time,
+            "30 days, 0:00:00",
+            status,
+            details,
+            request_json,
+            is_released,
+        )
+
+
+def _populate(db_path: Path, rows: int) -> None:
+    migrate(db_path, target=1)
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.executemany(
+            "INSERT INTO action_statuses (action_id, status, creator_id, "
+            "monitor_by, manage_by, start_time, completion_time, release_after, "
+            "display_status, details, request_json, is_released) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _generate_rows(rows, dt.datetime.now(dt.timezone.utc)),
+        )
+    connection.close()
+
+
+def _measure(db_path: Path, repeat: int) -> None:
+    connection = sqlite3.connect(db_path)
+    params = {
+        "cutoff": (dt.datetime.now(dt.timezone.utc) - dt.timedelta(minutes=2)).strftime(
+            "%Y-%m-%d %H:%M:%S.%f"
+        ),
+        "creator_id": CREATORS[0],
+    }
+    for name, query in QUERIES.items():
+        plan = "; ".join(
+            row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        )
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            connection.execute(query, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        click.echo(f"  {name:<22} {statistics.median(timings):9.2f} ms  {plan}")
+    connection.close()
+
+
+@click.command()
+@click.option("--rows", default=2_000_000, show_default=True, help="Rows to insert.")
+@click.option("--repeat", default=5, show_default=True, help="Runs per query.")
+def main(rows, repeat):
+    """Measure query plans and latency before and after adding indexes."""
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        click.echo(f"Inserting {rows} rows...")
+        _populate(db_path, rows)
+
+        click.echo("Before migration (median latency, query plan):")
+        _measure(db_path, repeat)
+
+        start = time.perf_counter()
+        applied = migrate(db_path)
+        click.echo(
+            f"Applied {len(applied)} migration(s) in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+        click.echo("After migration (median latency, query plan):")
+        _measure(db_path, repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Load test the Flask app with a configurable mix of requests.
+
+The app from ``create_app()`` is served by werkzeug's threaded server in a
+separate process, with token introspection answered by the local fake
+Globus Auth server from ``fake_globus.py``. A fixed number of concurrent
+clients then replay a weighted mix of run, status, cancel and release
+requests for the given duration:
+
+- run starts a new action,
+- status polls a random action started by the client's token,
+- cancel cancels an ACTIVE action, which can then be released,
+- release releases a cancelled action.
+
+Latency percentiles, throughput and status codes are reported per endpoint,
+along with the number of token introspections the server made, and, with
+``--output``, saved as JSON. ``--baseline`` compares the run with a
+previously saved result.
+
+Usage:
+    uv run python benchmarks/bench_load.py --mix status=95,run=5 --concurrency 32 \\
+        --duration 30 --output results.json
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from statistics import quantiles
+from typing import Dict, List, Set
+
+import click
+import httpx
+
+from fake_globus import start_fake_globus
+
+CLIENT_ID = "00000000-0000-0000-0000-000000000000"
+
+ENDPOINTS = ("run", "status", "cancel", "release")
+
+# Responses expected under load; anything else counts as an error.
+EXPECTED_CODES = {
+    "run": {202},
+    # A poll may race the release of its action.
+    "status": {200, 404},
+    "cancel": {200, 409},
+    "release": {200, 409},
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a mix such as ``status=95,run=5`` into endpoint weights."""
+    weights = {}
+    for entry in mix.split(","):
+        endpoint, _, weight = entry.partition("=")
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS:
+            raise click.BadParameter(f"Unknown endpoint {endpoint!r} in mix")
+        weights[endpoint] = float(weight)
+    if not any(weights.values()):
+        raise click.BadParameter("The mix needs at least one positive weight")
+    return weights
+
+
+def _serve(port: int, environ: Dict[str, str]) -> None:
+    """Serve create_app() on werkzeug's threaded server, without console output."""
+    os.environ.update(environ)
+    sys.stderr = sys.stdout = open(os.devnull, "w")
+    from werkzeug.serving import make_server
+
+    from mike_action_provider.app import create_app
+    from mike_action_provider.db.connection import init_db
+
+    init_db()
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LoadClient:
+    """Replay the request mix, keeping per-token pools of known actions."""
+
+    def __init__(self, client: httpx.AsyncClient, weights: Dict[str, float]):
+        self.client = client
+        self.endpoints = list(weights)
+        self.weights = list(weights.values())
+        self.actions: Dict[str, List[str]] = defaultdict(list)
+        self.active: Dict[str, List[str]] = defaultdict(list)
+        self.cancelled: Dict[str, List[str]] = defaultdict(list)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.codes: Dict[str, Counter] = defaultdict(Counter)
+        self.recording = False
+
+    async def seed(self, token: str, count: int) -> None:
+        """Start actions for a token with one batch request."""
+        requests = [
+            {"request_id": f"seed-{i}", "body": {"utc_offset": 1}} for i in range(count)
+        ]
+        response = await self.client.post(
+            "/apt/batch/run", json={"requests": requests}, headers=_auth(token)
+        )
+        response.raise_for_status()
+        action_ids = [status["action_id"] for status in response.json()]
+        self.actions[token].extend(action_ids)
+        self.active[token].extend(action_ids)
+
+    async def worker(self, token: str, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            endpoint = random.choices(self.endpoints, self.weights)[0]
+            await self.request(endpoint, token)
+
+    async def request(self, endpoint: str, token: str) -> None:
+        headers = _auth(token)
+        if endpoint == "run":
+            send = self.client.post(
+                "/apt/run",
+                json={"request_id": "load", "body": {"utc_offset": 1}},
+                headers=headers,
+            )
+        elif endpoint == "status" and self.actions[token]:
+            action_id = random.choice(self.actions[token])
+            send = self.client.get(f"/apt/{action_id}/status", headers=headers)
+        elif endpoint == "cancel" and self.active[token]:
+            action_id = self.active[token].pop()
+            send = self.client.post(f"/apt/{action_id}/cancel", headers=headers)
+        elif endpoint == "release" and self.cancelled[token]:
+            action_id = self.cancelled[token].pop()
+            self.actions[token].remove(action_id)
+            send = self.client.post(f"/apt/{action_id}/release", headers=headers)
+        else:
+            # Nothing to act on yet; start an action instead.
+            return await self.request("run", token)
+
+        start = time.perf_counter()
+        try:
+            response = await send
+            code = response.status_code
+        except httpx.HTTPError as err:
+            code = type(err).__name__
+            response = None
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.latencies[endpoint].append(elapsed)
+            self.codes[endpoint][code] += 1
+
+        if response is None or code not in EXPECTED_CODES[endpoint]:
+            return
+        if endpoint == "run":
+            action_id = response.json()["action_id"]
+            self.actions[token].append(action_id)
+            self.active[token].append(action_id)
+        elif endpoint == "cancel" and code == 200:
+            self.cancelled[token].append(action_id)
+
+
+def _auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _summarize(
+    latencies: List[float], codes: Counter, expected: Set[int], duration: float
+) -> dict:
+    summary = {
+        "requests": len(latencies),
+        "throughput": len(latencies) / duration,
+        "errors": sum(count for code, count in codes.items() if code not in expected),
+        "status_codes": {str(code): count for code, count in codes.items()},
+    }
+    if len(latencies) >= 2:
+        cuts = quantiles(latencies, n=100)
+        summary.update(
+            p50_ms=cuts[49] * 1000, p95_ms=cuts[94] * 1000, p99_ms=cuts[98] * 1000
+        )
+    return summary
+
+
+async def _load(base_url, weights, concurrency, tokens, seed, warmup, duration):
+    limits = httpx.Limits(max_connections=concurrency + len(tokens))
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        load = LoadClient(client, weights)
+        await asyncio.gather(*(load.seed(token, seed) for token in tokens))
+        worker_tokens = [tokens[i % len(tokens)] for i in range(concurrency)]
+
+        await asyncio.gather(
+            *(load.worker(token, time.monotonic() + warmup) for token in worker_tokens)
+        )
+        load.recording = True
+        start = time.monotonic()
+        await asyncio.gather(
+            *(load.worker(token, start + duration) for token in worker_tokens)
+        )
+        elapsed = time.monotonic() - start
+    return load, elapsed
+
+
+def _print_results(results: dict, baseline: dict = None) -> None:
+    header = (
+        f"{'endpoint':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}"
+    )
+    click.echo(header)
+    for endpoint, summary in results["endpoints"].items():
+        line = (
+            f"{endpoint:>8} {summary['throughput']:9.1f} "
+            f"{summary.get('p50_ms', 0):8.1f} {summary.get('p95_ms', 0):8.1f} "
+            f"{summary.get('p99_ms', 0):8.1f} {summary['errors']:7d}"
+        )
+        previous = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if previous and previous.get("p99_ms") and summary.get("p99_ms"):
+            line += (
+                f"   vs baseline: req/s "
+                f"{_change(summary['throughput'], previous['throughput'])}, p99 "
+                f"{_change(summary['p99_ms'], previous['p99_ms'])}"
+            )
+        click.echo(line)
+
+
+def _change(value: float, previous: float) -> str:
+    return f"{(value - previous) / previous * 100:+.1f}%"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+@click.command()
+@click.option("--mix", default="status=95,run=5", show_default=True)
+@click.option(
+    "--concurrency", default=32, show_default=True, help="Concurrent clients."
+)
+@click.option("--duration", default=30.0, show_default=True, help="Measured seconds.")
+@click.option("--warmup", default=2.0, show_default=True, help="Unmeasured seconds.")
+@click.option("--tokens", default=8, show_default=True, help="Distinct callers.")
+@click.option("--seed", default=100, show_default=True, help="Actions per caller.")
+@click.option(
+    "--introspect-latency",
+    default=0.0,
+    show_default=True,
+    help="Seconds the fake Globus Auth takes per token introspection.",
+)
+@click.option(
+    "--env",
+    "environ",
+    multiple=True,
+    help="Server setting as KEY=VALUE, e.g. --env DB_PROFILE=concurrent.",
+)
+@click.option("--output", type=click.Path(dir_okay=False), help="Write JSON results.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON results to compare with.",
+)
+def main(
+    mix,
+    concurrency,
+    duration,
+    warmup,
+    tokens,
+    seed,
+    introspect_latency,
+    environ,
+    output,
+    baseline,
+):
+    """Measure per-endpoint latency and throughput under a request mix."""
+    weights = parse_mix(mix)
+    scope = f"https://auth.globus.org/scopes/{CLIENT_ID}/action_all"
+    fake_globus, auth_url = start_fake_globus(scope, introspect_latency)
+    settings = dict(entry.split("=", 1) for entry in environ)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server_environ = {
+            "DB_PATH": str(Path(tmp) / "bench.db"),
+            "GLOBUS_CLIENT_ID": CLIENT_ID,
+            "GLOBUS_CLIENT_SECRET": "bench-secret",
+            "GLOBUS_SDK_SERVICE_URL_AUTH": auth_url,
+            "LOG_LEVEL": "WARNING",
+            **settings,
+        }
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(port, server_environ), daemon=True
+        )
+        server.start()
+        try:
+            for _ in range(200):
+                try:
+                    httpx.get(f"{base_url}/ping", timeout=1)
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.05)
+            else:
+                raise click.ClickException("Server did not start")
+
+            caller_tokens = [f"bench-load-{i:04d}-token" for i in range(tokens)]
+            load, elapsed = asyncio.run(
+                _load(
+                    base_url,
+                    weights,
+                    concurrency,
+                    caller_tokens,
+                    seed,
+                    warmup,
+                    duration,
+                )
+            )
+        finally:
+            server.terminate()
+            server.join()
+    introspections = fake_globus.introspections
+    fake_globus.shutdown()
+
+    all_latencies = [value for values in load.latencies.values() for value in values]
+    all_codes = sum(load.codes.values(), Counter())
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "mix": weights,
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "tokens": tokens,
+        "introspect_latency": introspect_latency,
+        "settings": settings,
+        "introspections": introspections,
+        "endpoints": {
+            endpoint: _summarize(
+                load.latencies[endpoint],
+                load.codes[endpoint],
+                EXPECTED_CODES[endpoint],
+                elapsed,
+            )
+            for endpoint in ENDPOINTS
+            if load.latencies[endpoint]
+        },
+    }
+    total = _summarize(all_latencies, all_codes, set(), elapsed)
+    total["errors"] = sum(
+        summary["errors"] for summary in results["endpoints"].values()
+    )
+    results["endpoints"]["all"] = total
+
+    _print_results(
+        results, json.loads(Path(baseline).read_text()) if baseline else None
+    )
+    click.echo(f"{introspections} token introspections")
+    if output:
+        Path(output).write_text(json.dumps(results, indent=2) + "\n")
+        click.echo(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
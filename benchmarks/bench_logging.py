@@ -0,0 +1,69 @@
+"""Benchmark the time a log call takes in the calling thread.
+
+Logs the same structured records, shaped like the status poll logs, with
+console and file logging written inline and with the queue-based writer.
+Console output goes to /dev/null. Each mode runs in a fresh process.
+
+Usage:
+    uv run python benchmarks/bench_logging.py --records 20000
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import quantiles
+
+import click
+
+
+def _run_mode(log_dir: str, use_queue: bool, records: int) -> list:
+    """Log the records and return the duration of each call in seconds."""
+    sys.stderr = open(os.devnull, "w")
+    os.environ.update(
+        ENABLE_FILE_LOGGING="true",
+        LOG_FILE=str(Path(log_dir) / "bench.log"),
+        LOG_LEVEL="DEBUG",
+    )
+    from mike_action_provider.logging import get_logger, setup_logging
+
+    setup_logging(use_queue=use_queue)
+    logger = get_logger("bench")
+    timings = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.debug(
+            "Action status retrieved",
+            extra={"action_id": f"action-{i}", "status": "ACTIVE"},
+        )
+        timings.append(time.perf_counter() - start)
+    # Include the time to drain the queue, so neither mode loses records.
+    start = time.perf_counter()
+    setup_logging(use_queue=False)
+    timings.append(time.perf_counter() - start)
+    return timings
+
+
+@click.command()
+@click.option("--records", default=20000, show_default=True, help="Log calls.")
+def main(records):
+    """Compare inline log writes with the queue-based log writer."""
+    context = multiprocessing.get_context("spawn")
+    for mode, use_queue in (("inline", False), ("queue", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            with context.Pool(1) as pool:
+                timings = pool.apply(_run_mode, (tmp, use_queue, records))
+            written = sum(1 for _ in open(Path(tmp) / "bench.log"))
+        calls, drain = timings[:-1], timings[-1]
+        cuts = quantiles(calls, n=100)
+        click.echo(
+            f"{mode:>6}: mean {sum(calls) / len(calls) * 1e6:6.1f} us, "
+            f"p50 {cuts[49] * 1e6:6.1f} us, p99 {cuts[98] * 1e6:7.1f} us, "
+            f"drain {drain * 1000:6.1f} ms, {written} records written"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Compare the throughput of ``manage.py serve`` across worker configurations.
+
+Each configuration, given as WORKERSxTHREADS, serves a fresh database with
+``manage.py serve``, with token introspection answered by the fake Globus
+Auth server, and the request mix of ``bench_load.py`` is replayed against it.
+The development server used by ``bench_load.py`` is measured first as the
+baseline. Throughput, latency percentiles and errors over all endpoints are
+reported per configuration (``uv sync --extra server --group bench``).
+
+Usage:
+    uv run python benchmarks/bench_serve.py --configs 1x8,2x4,4x2,4x8 \\
+        --mix status=95,run=5 --concurrency 64 --env DB_PROFILE=concurrent
+"""
+
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import click
+import httpx
+
+from bench_load import (
+    CLIENT_ID,
+    EXPECTED_CODES,
+    _free_port,
+    _load,
+    _serve,
+    _summarize,
+    parse_mix,
+)
+from fake_globus import start_fake_globus
+
+MANAGE = Path(__file__).resolve().parent.parent / "manage.py"
+
+
+def parse_configs(configs: str) -> List[Tuple[int, int]]:
+    """Parse configurations such as ``1x8,4x2`` into (workers, threads) pairs."""
+    parsed = []
+    for entry in configs.split(","):
+        workers, _, threads = entry.strip().partition("x")
+        try:
+            parsed.append((int(workers), int(threads)))
+        except ValueError:
+            raise click.BadParameter(f"Expected WORKERSxTHREADS, got {entry!r}")
+    return parsed
+
+
+def _wait_for(base_url: str) -> None:
+    for _ in range(400):
+        try:
+            httpx.get(f"{base_url}/ping", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    raise click.ClickException("Server did not start")
+
+
+def _measure(
+    environ: Dict[str, str],
+    config: Optional[Tuple[int, int]],
+    weights: Dict[str, float],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    """Serve with one configuration, or the development server, and load it."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        environ = {**environ, "DB_PATH": str(Path(tmp) / "bench.db")}
+        if config is None:
+            server = multiprocessing.get_context("spawn").Process(
+                target=_serve, args=(port, environ), daemon=True
+            )
+            server.start()
+        else:
+            workers, threads = config
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    str(MANAGE),
+                    "serve",
+                    f"--bind=127.0.0.1:{port}",
+                    f"--workers={workers}",
+                    f"--threads={threads}",
+                ],
+                env={**os.environ, **environ},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        try:
+            _wait_for(base_url)
+            tokens = [f"bench-serve-{i:04d}-token" for i in range(8)]
+            load, elapsed = asyncio.run(
+                _load(base_url, weights, concurrency, tokens, 100, 2.0, duration)
+            )
+        finally:
+            server.terminate()
+            if config is None:
+                server.join()
+            else:
+                server.wait()
+
+    latencies = [value for values in load.latencies.values() for value in values]
+    codes = sum(load.codes.values(), Counter())
+    errors = sum(
+        count
+        for endpoint, endpoint_codes in load.codes.items()
+        for code, count in endpoint_codes.items()
+        if code not in EXPECTED_CODES[endpoint]
+    )
+    summary = _summarize(latencies, codes, set(), elapsed)
+    summary["errors"] = errors
+    return summary
+
+
+@click.command()
+@click.option("--configs", default="1x8,2x4,4x2,4x8", show_default=True)
+@click.option("--mix", default="status=95,run=5", show_default=True)
+@click.option(
+    "--concurrency", default=64, show_default=True, help="Concurrent clients."
+)
+@click.option("--duration", default=15.0, show_default=True, help="Measured seconds.")
+@click.option(
+    "--env",
+    "environ",
+    multiple=True,
+    help="Server setting as KEY=VALUE, e.g. --env DB_PROFILE=concurrent.",
+)
+def main(configs, mix, concurrency, duration, environ):
+    """Measure throughput and latency for each worker configuration."""
+    weights = parse_mix(mix)
+    scope = f"https://auth.globus.org/scopes/{CLIENT_ID}/action_all"
+    fake_globus, auth_url = start_fake_globus(scope)
+    server_environ = {
+        "GLOBUS_CLIENT_ID": CLIENT_ID,
+        "GLOBUS_CLIENT_SECRET": "bench-secret",
+        "GLOBUS_SDK_SERVICE_URL_AUTH": auth_url,
+        "LOG_LEVEL": "WARNING",
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(MANAGE.parent / "src"), os.getenv("PYTHONPATH")])
+        ),
+        **dict(entry.split("=", 1) for entry in environ),
+    }
+
+    click.echo(
+        f"{'server':>14} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}"
+    )
+    try:
+        for config in [None, *parse_configs(configs)]:
+            name = "werkzeug" if config is None else "{}x{}".format(*config)
+            summary = _measure(server_environ, config, weights, concurrency, duration)
+            click.echo(
+                f"{name:>14} {summary['throughput']:9.1f} "
+                f"{summary.get('p50_ms', 0):8.1f} {summary.get('p95_ms', 0):8.1f} "
+                f"{summary.get('p99_ms', 0):8.1f} {summary['errors']:7d}"
+            )
+    finally:
+        fake_globus.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark concurrent action creation and lookup for each storage profile.
+
+Each worker process simulates a gunicorn worker: it builds its own engine and
+runs several threads that create an action and then read it back, the same
+pattern produced by Flows submitting runs and polling their status.
+
+Usage:
+    uv run python benchmarks/bench_storage.py --processes 4 --threads 4
+"""
+
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import click
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from mike_action_provider.db.connection import STORAGE_PROFILES, build_engine
+from mike_action_provider.db.crud import create_action_status, get_action_status
+from mike_action_provider.db.models import Base
+
+IDENTITY = "urn:globus:auth:identity:00000000-0000-0000-0000-000000000000"
+
+
+def _run_worker(db_path: str, profile: str, threads: int, operations: int) -> dict:
+    """Run create/get pairs from several threads against one engine."""
+    engine = build_engine(Path(db_path), profile=profile, pool_size=threads)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+
+    def create_and_get(_):
+        action_id = str(uuid.uuid4())
+        try:
+            with session_factory() as db:
+                create_action_status(
+                    db=db,
+                    action_id=action_id,
+                    status="ACTIVE",
+                    creator_id=IDENTITY,
+                    monitor_by=IDENTITY,
+                    manage_by=IDENTITY,
+                    release_after="P30D",
+                    display_status="ACTIVE",
+                    request_json={"body": {"utc_offset": 1}},
+                    details={},
+                )
+            with session_factory() as db:
+                get_action_status(db, action_id)
+        except OperationalError:
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(create_and_get, range(operations)))
+    engine.dispose()
+    return {"ok": sum(results), "errors": len(results) - sum(results)}
+
+
+def _run_profile(profile: str, processes: int, threads: int, operations: int) -> dict:
+    """Run all workers for a single profile against a fresh database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        engine = build_engine(db_path, profile=profile)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(_run_worker, str(db_path), profile, threads, operations)
+                for _ in range(processes)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+    ok = sum(result["ok"] for result in results)
+    errors = sum(result["errors"] for result in results)
+    return {"ok": ok, "errors": errors, "elapsed": elapsed}
+
+
+@click.command()
+@click.option("--processes", default=4, show_default=True, help="Worker processes.")
+@click.option("--threads", default=4, show_default=True, help="Threads per process.")
+@click.option(
+    "--operations",
+    default=250,
+    show_default=True,
+    help="Create/get pairs per process.",
+)
+@click.option(
+    "--profile",
+    "profiles",
+    multiple=True,
+    type=click.Choice(sorted(STORAGE_PROFILES)),
+    help="Profiles to compare, defaults to all of them.",
+)
+def main(processes, threads, operations, profiles):
+    """Compare create/get throughput across storage profiles."""
+    for profile in profiles or list(STORAGE_PROFILES):
+        result = _run_profile(profile, processes, threads, operations)
+        click.echo(
+            f"{profile:>12}: {result['ok'] / result['elapsed']:8.1f} pairs/s "
+            f"({result['ok']} ok, {result['errors']} locked, "
+            f"{result['elapsed']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""A stand-in for the Globus Auth token introspection API, for benchmarks.
+
+Point the provider at it with ``GLOBUS_SDK_SERVICE_URL_AUTH``. Every token
+is active, carries the given scope and belongs to an identity derived from
+the token, see ``identity_for``, except tokens starting with ``revoked``,
+which are reported inactive. ``latency`` delays each introspection to mimic
+the round trip to Globus, and the server counts the introspections it
+answered in ``server.introspections``.
+"""
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs
+
+
+def identity_for(token: str) -> str:
+    """Get the identity ID the fake server reports for a token."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, token))
+
+
+def start_fake_globus(
+    scope: str, latency: float = 0.0, lifetime: int = 3600
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the fake introspection API from a background thread.
+
+    Args:
+        scope: Scope string reported for every token.
+        latency: Seconds to wait before answering each introspection.
+        lifetime: Seconds from the introspection until a token expires.
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: The server, to shut down when done,
+            and its base URL.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode())
+            token = form.get("token", [""])[0]
+            identity = identity_for(token)
+            time.sleep(latency)
+            with lock:
+                server.introspections += 1
+            if token.startswith("revoked"):
+                introspection = {"active": False}
+            else:
+                introspection = {
+                    "active": True,
+                    "scope": scope,
+                    "sub": identity,
+                    "identity_set": [identity],
+                    "exp": int(time.time()) + lifetime,
+                }
+            body = json.dumps(introspection).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    lock = threading.Lock()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.introspections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
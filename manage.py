@@ -1,10 +1,20 @@
 """Management script for the action provider."""
 
 import click
+import time
 from pathlib import Path
 
 from mike_action_provider.app import create_app
-from mike_action_provider.db.connection import get_engine, init_db
+from mike_action_provider.config import get_config
+from mike_action_provider.db.archive import get_archive
+from mike_action_provider.db.connection import get_db, get_engine, init_db
+from mike_action_provider.db.crud import convert_legacy_details
+from mike_action_provider.db.migrations import (
+    get_pending_migrations,
+    get_schema_version,
+    migrate as apply_migrations,
+)
+from mike_action_provider.tasks import ActionArchiver, RetentionPurger
 
 
 @click.group()
@@ -60,14 +70,198 @@ def reset_db():
         click.echo("Operation cancelled.")
         return
 
-    # Delete the database file
+    # Delete the database file along with any WAL/shared-memory companions
+    engine.dispose()
     db_path.unlink()
+    for suffix in ("-wal", "-shm"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
     click.echo(f"Deleted database file at {db_path}")
+    # The archive is useless without the index kept in the database
+    archive = get_archive()
+    for segment in archive.segments():
+        archive.remove_segment(segment)
 
     # Create new database
     init_db()
     click.echo("Database has been reset.")
 
 
+@cli.command()
+@click.option(
+    "--dry-run", is_flag=True, help="List pending migrations without applying them."
+)
+def migrate(dry_run):
+    """Upgrade the database schema in place to the latest version."""
+    engine = get_engine()
+    db_path = Path(engine.url.database)
+
+    if not db_path.exists():
+        click.echo("Database does not exist. Creating new database...")
+        init_db()
+        return
+
+    click.echo(f"Database is at schema version {get_schema_version(db_path)}")
+    pending = get_pending_migrations(db_path)
+    if not pending:
+        click.echo("Database is up to date.")
+        return
+
+    if dry_run:
+        for migration in pending:
+            click.echo(f"Pending {migration.version}: {migration.description}")
+        return
+
+    for migration in apply_migrations(db_path):
+        click.echo(f"Applied {migration.version}: {migration.description}")
+    click.echo(f"Database is at schema version {get_schema_version(db_path)}")
+
+
+@cli.command()
+@click.option("--batch-size", type=int, help="Actions deleted per transaction.")
+@click.option("--batch-pause", type=float, help="Seconds to wait between batches.")
+@click.option(
+    "--max-batches", type=int, default=0, help="Stop after this many batches."
+)
+@click.option("--vacuum-pages", type=int, help="Free pages released after each batch.")
+def purge(batch_size, batch_pause, max_batches, vacuum_pages):
+    """Delete released actions and completed actions past their release_after.
+
+    Batch settings default to the RETENTION_* configuration. Unlike the
+    background task, this runs until nothing is left to purge.
+    """
+    config = get_config()
+    purger = RetentionPurger(
+        interval=config.RETENTION_INTERVAL,
+        lease_ttl=config.RETENTION_LEASE_TTL,
+        batch_size=batch_size or config.RETENTION_BATCH_SIZE,
+        batch_pause=(
+            config.RETENTION_BATCH_PAUSE if batch_pause is None else batch_pause
+        ),
+        max_batches=max_batches,
+        vacuum_pages=(
+            config.RETENTION_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+        ),
+    )
+    with get_db() as db:
+        purged, released_pages = purger.purge(db)
+    click.echo(f"Purged {purged} actions, released {released_pages} pages.")
+
+
+@cli.command()
+@click.option(
+    "--after",
+    type=float,
+    help="Seconds after their completion at which actions are archived.",
+)
+@click.option("--batch-size", type=int, help="Actions archived per transaction.")
+@click.option("--batch-pause", type=float, help="Seconds to wait between batches.")
+@click.option(
+    "--max-batches", type=int, default=0, help="Stop after this many batches."
+)
+@click.option("--vacuum-pages", type=int, help="Free pages released after each batch.")
+def archive(after, batch_size, batch_pause, max_batches, vacuum_pages):
+    """Move completed actions to the compressed segment archive.
+
+    Settings default to the ARCHIVE_* configuration. Unlike the background
+    task, this runs until nothing is left to archive.
+    """
+    config = get_config()
+    archiver = ActionArchiver(
+        archive_after=config.ARCHIVE_AFTER if after is None else after,
+        interval=config.ARCHIVE_INTERVAL,
+        lease_ttl=config.ARCHIVE_LEASE_TTL,
+        batch_size=batch_size or config.ARCHIVE_BATCH_SIZE,
+        batch_pause=(
+            config.ARCHIVE_BATCH_PAUSE if batch_pause is None else batch_pause
+        ),
+        max_batches=max_batches,
+        vacuum_pages=(
+            config.RETENTION_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+        ),
+    )
+    with get_db() as db:
+        archived, released_pages = archiver.archive(db)
+    click.echo(
+        f"Archived {archived} actions to {config.ARCHIVE_DIR}, "
+        f"released {released_pages} pages."
+    )
+
+
+@cli.command()
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Rows per transaction."
+)
+@click.option(
+    "--batch-pause",
+    default=0.1,
+    show_default=True,
+    help="Seconds to wait between batches.",
+)
+def convert_details(batch_size, batch_pause):
+    """Rewrite details stored as JSON encoded strings in row format 2.
+
+    Rows are converted in short transactions, so this can run while the
+    server is serving requests.
+    """
+    after, converted = 0, 0
+    with get_db() as db:
+        while True:
+            after, count = convert_legacy_details(db, after, batch_size)
+            if after is None:
+                break
+            converted += count
+            time.sleep(batch_pause)
+    click.echo(f"Converted the details of {converted} actions.")
+
+
+@cli.command()
+@click.option("--bind", help="Address to listen on, as HOST:PORT.")
+@click.option("--workers", type=int, help="Worker processes.")
+@click.option("--threads", type=int, help="Request threads per worker.")
+def serve(bind, workers, threads):
+    """Serve the action provider with gunicorn.
+
+    Settings default to the SERVER_* configuration. The app is loaded once
+    and forked into the workers; needs the optional server dependencies.
+    """
+    try:
+        from mike_action_provider.server import ProviderServer, server_options
+    except ImportError as err:
+        raise click.ClickException(
+            f"{err}. Install the server extra: uv sync --extra server"
+        )
+
+    config = get_config()
+    try:
+        options = server_options(
+            config,
+            bind=bind or config.SERVER_BIND,
+            workers=workers or config.SERVER_WORKERS,
+            threads=threads or config.SERVER_THREADS,
+        )
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    ProviderServer(config, options).run()
+
+
+@cli.command()
+def enable_incremental_vacuum():
+    """Switch an existing database to incremental vacuum.
+
+    This rewrites the whole database file with VACUUM, which locks it
+    meanwhile, so run it with the server stopped. New databases are created
+    with incremental vacuum enabled.
+    """
+    engine = get_engine()
+    with engine.connect() as connection:
+        mode = connection.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        if mode == 2:
+            click.echo("Incremental vacuum is already enabled.")
+            return
+        connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.exec_driver_sql("VACUUM")
+    click.echo("Incremental vacuum enabled.")
+
+
 if __name__ == "__main__":
     cli()
@@ -1,14 +1,31 @@
 import logging
 
-from flask import Flask
+from flask import Flask, Response
 from globus_action_provider_tools.flask.helpers import assign_json_provider
 
+from mike_action_provider.auth import get_token_cache, with_token_cache
 from mike_action_provider.blueprint import aptb
+from mike_action_provider.cache import get_status_cache
 from mike_action_provider.config import get_config
-from mike_action_provider.logging import setup_logging
+from mike_action_provider.logging import get_logging_stats, setup_logging
+from mike_action_provider.metrics import CONTENT_TYPE, instrument_app, render_metrics
+from mike_action_provider.polling import get_polling_stats
+from mike_action_provider.profiling import parse_query_budgets, profile_app
+from mike_action_provider.storage import get_storage
+from mike_action_provider.tasks import start_background_tasks
 
 
-def create_app():
+def create_app(background_tasks: bool = True):
+    """Create the Flask app.
+
+    Args:
+        background_tasks: Start the background tasks enabled in the
+            configuration. A server that forks workers after creating the app
+            starts them in each worker instead, see server.ProviderServer.
+
+    Returns:
+        Flask: The app.
+    """
     # Set up logging
     setup_logging()
 
@@ -20,14 +37,44 @@ def create_app():
     # Load app configuration
     config = get_config()
     app.config.from_object(config)
+    # Fail on an unusable storage configuration before serving any request.
+    storage = get_storage()
 
     # Register blueprints
     app.register_blueprint(aptb)
+    aptb.state_builder = with_token_cache(aptb.state_builder)
+
+    if config.SQL_PROFILING:
+        profile_app(app, parse_query_budgets(config.SQL_QUERY_BUDGETS))
+
+    if config.METRICS_ENABLED:
+        instrument_app(app)
+
+        @app.route("/metrics")
+        def metrics():
+            with storage.session() as store:
+                action_counts = store.count()
+            return Response(render_metrics(action_counts), content_type=CONTENT_TYPE)
+
+    # Start background tasks such as the completion sweeper
+    if background_tasks:
+        start_background_tasks()
 
     @app.route("/ping")
     def ping():
         return {"message": "pong"}
 
+    @app.route("/stats")
+    def stats():
+        cache = get_status_cache()
+        token_cache = get_token_cache()
+        return {
+            "status_cache": cache.stats() if cache is not None else None,
+            "auth_cache": token_cache.stats() if token_cache is not None else None,
+            "polling": get_polling_stats().stats(),
+            "logging": get_logging_stats(),
+        }
+
     return app
 
 
@@ -0,0 +1,529 @@
+"""ASGI entry point serving the action provider with async database access.
+
+The Flask app ties up a worker thread for every request, including the time
+spent waiting on SQLite and on Globus token introspection. This app serves
+the introspect, run, status, cancel and release routes from Starlette
+instead: database access goes through async sessions on the aiosqlite
+driver, and the toolkit's blocking auth calls run in a thread pool, so one
+process can hold thousands of concurrent status polls.
+
+The action logic, authorization rules, ETags, Retry-After hints, status cache
+and counters are the ones used by the blueprint. Enumeration, logs and batch
+requests, and storage backends other than sqlite, are only served by the
+Flask app. Run it with ``uvicorn asgi:app`` after installing the optional
+``async`` dependencies.
+"""
+
+import datetime as dt
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Iterable, NoReturn, Optional, Set
+
+from globus_action_provider_tools import ActionStatus, ActionStatusValue, AuthState
+from globus_action_provider_tools.data_types import convert_to_json
+from globus_action_provider_tools.errors import AuthenticationError
+from globus_action_provider_tools.flask.exceptions import (
+    ActionNotFound,
+    ActionProviderToolsException,
+    BadActionRequest,
+    UnauthorizedRequest,
+)
+from globus_action_provider_tools.flask.helpers import (
+    FlaskAuthStateBuilder,
+    validate_input,
+)
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from werkzeug.http import parse_etags, quote_etag
+
+from mike_action_provider import blueprint
+from mike_action_provider.auth import (
+    CachingFlaskAuthStateBuilder,
+    get_token_cache,
+    with_token_cache,
+)
+from mike_action_provider.blueprint import (
+    _action_status_record,
+    _complete_if_expired,
+    _completion_values,
+    _is_expired,
+    _load_action_status,
+    _new_action_status,
+    _record_poll,
+    aptb,
+    description,
+)
+from mike_action_provider.cache import get_status_cache
+from mike_action_provider.config import get_config
+from mike_action_provider.db import async_crud
+from mike_action_provider.db.async_connection import get_async_db
+from mike_action_provider.db.crud import (
+    COMPLETE_STATUSES,
+    INCOMPLETE_STATUSES,
+    MANAGE_ROLES,
+    MONITOR_ROLES,
+)
+from mike_action_provider.hydration import row_to_action_status
+from mike_action_provider.logging import (
+    get_logger,
+    get_logging_stats,
+    setup_logging,
+)
+from mike_action_provider.polling import get_polling_stats, retry_after
+from mike_action_provider.storage.sqlite import SQLiteSession
+from mike_action_provider.tasks import start_background_tasks
+from mike_action_provider.utils import utc_now
+
+logger = get_logger(__name__)
+
+
+def _json_response(
+    content: Any,
+    status_code: int = 200,
+    retry_after_seconds: Optional[int] = None,
+    version: Optional[int] = None,
+) -> Response:
+    """Serialize a response body with the toolkit's JSON conversions.
+
+    Args:
+        content (Any): The body, e.g. an ActionStatus.
+        status_code (int): HTTP status code.
+        retry_after_seconds (Optional[int]): Retry-After hint to send.
+        version (Optional[int]): Row version to send as the ETag.
+
+    Returns:
+        Response: The JSON response.
+    """
+    response = Response(
+        json.dumps(content, default=convert_to_json),
+        status_code=status_code,
+        media_type="application/json",
+    )
+    _set_headers(response, retry_after_seconds, version)
+    return response
+
+
+def _set_headers(
+    response: Response, retry_after_seconds: Optional[int], version: Optional[int]
+) -> None:
+    """Set the Retry-After and ETag headers, as the blueprint's hooks do."""
+    if retry_after_seconds is not None:
+        response.headers["Retry-After"] = str(retry_after_seconds)
+        get_polling_stats().record_hint()
+    if version is not None:
+        response.headers["ETag"] = quote_etag(str(version))
+
+
+@lru_cache(maxsize=1)
+def _state_builder() -> FlaskAuthStateBuilder:
+    """Get the AuthStateBuilder, configured as the blueprint configures its own.
+
+    The builder only reads the Authorization header, which Starlette requests
+    provide the same way Flask requests do.
+    """
+    config = get_config()
+    logger.info(
+        "Initializing AuthStateBuilder",
+        extra={"client_id": config.CLIENT_ID},
+    )
+    client_factory = aptb.config.client_factory
+    auth_client = client_factory.make_confidential_app_auth_client(
+        client_id=config.CLIENT_ID, client_secret=config.CLIENT_SECRET
+    )
+    return with_token_cache(
+        FlaskAuthStateBuilder(
+            auth_client,
+            expected_scopes=[description.globus_auth_scope, *aptb.additional_scopes],
+            client_factory=client_factory,
+        )
+    )
+
+
+async def _authenticate(request: Request) -> AuthState:
+    """Build the caller's AuthState, introspecting the token off the event loop.
+
+    Tokens with a cached introspection are resolved on the event loop, as
+    that needs no network call.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        AuthState: The caller's authentication state.
+
+    Raises:
+        AuthenticationError: If the token is missing, invalid or has the
+            wrong scopes.
+    """
+    builder = _state_builder()
+    if isinstance(builder, CachingFlaskAuthStateBuilder) and builder.is_cached(request):
+        return builder.build_from_request(request=request)
+    return await run_in_threadpool(builder.build_from_request, request=request)
+
+
+async def _check_runnable(auth: AuthState) -> None:
+    """Check that the caller may run the action provider.
+
+    Raises:
+        UnauthorizedRequest: If the caller is not in runnable_by.
+    """
+    if not await run_in_threadpool(
+        auth.check_authorization,
+        description.runnable_by,
+        allow_all_authenticated_users=True,
+    ):
+        raise UnauthorizedRequest
+
+
+async def _holds_any(principals: Set[str], auth: AuthState) -> bool:
+    """Check whether the caller is one of the given authorizing principals.
+
+    Group memberships may need a call to Globus Groups, so they are only
+    looked up, in the thread pool, when no identity matched.
+    """
+    if principals & auth.identities:
+        return True
+    return bool(principals) and await run_in_threadpool(
+        blueprint._holds_any, principals, auth
+    )
+
+
+async def _authorize_or_404(
+    db: AsyncSession, action_id: str, auth: AuthState, roles: Iterable[str]
+) -> None:
+    """Check that the caller holds one of the roles on an action.
+
+    Raises:
+        ActionNotFound: If the action does not exist.
+        AuthenticationError: If the caller holds none of the roles.
+    """
+    principals = await async_crud.get_authorizing_principals(
+        db, action_id, roles, auth.identities
+    )
+    if await _holds_any(principals, auth):
+        return
+
+    if await async_crud.get_action_status_row(db, action_id) is None:
+        logger.warning("Action not found", extra={"action_id": action_id})
+        raise ActionNotFound(f"No action with {action_id}")
+    logger.info(
+        "Caller is not authorized for action",
+        extra={
+            "action_id": action_id,
+            "identity": auth.effective_identity,
+            "roles": sorted(roles),
+        },
+    )
+    raise AuthenticationError(f"No Action with id {action_id}")
+
+
+async def _raise_transition_failed(
+    db: AsyncSession, action_id: str, message: str
+) -> NoReturn:
+    """Report why a conditional status transition did not apply.
+
+    Raises:
+        ActionNotFound: If the action does not exist or was released.
+        ActionConflict: If the action is in a status the transition does not
+            apply to.
+    """
+    await db.run_sync(
+        lambda session: blueprint._raise_transition_failed(
+            SQLiteSession(session), action_id, message
+        )
+    )
+
+
+async def _not_modified(
+    db: AsyncSession, action_id: str, auth: AuthState, if_none_match: str
+) -> Optional[Response]:
+    """Answer a conditional status poll with 304 if the action is unchanged.
+
+    Returns:
+        Optional[Response]: The 304 response, or None if the full status must
+            be returned.
+    """
+    row = await async_crud.get_action_status_version(db, action_id)
+    if row is None or not parse_etags(if_none_match).contains(str(row.version)):
+        return None
+    active = row.status == ActionStatusValue.ACTIVE.value
+    if (
+        active
+        and not get_config().COMPLETION_SWEEPER_ENABLED
+        and _is_expired(row.start_time)
+    ):
+        return None
+    await _authorize_or_404(db, action_id, auth, MONITOR_ROLES)
+
+    _record_poll(row.status, row.start_time, not_modified=True)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Action status not modified", extra={"action_id": action_id})
+    response = Response(status_code=304)
+    _set_headers(response, retry_after(row.start_time) if active else None, row.version)
+    return response
+
+
+async def introspect(request: Request) -> Response:
+    """Describe the action provider."""
+    if "public" not in description.visible_to:
+        auth = await _authenticate(request)
+        if not await run_in_threadpool(
+            auth.check_authorization,
+            description.visible_to,
+            allow_public=True,
+            allow_all_authenticated_users=True,
+        ):
+            raise UnauthorizedRequest
+    response = _json_response(description)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+async def action_run(request: Request) -> Response:
+    """Start an action, as my_action_run does."""
+    auth = await _authenticate(request)
+    await _check_runnable(auth)
+    try:
+        request_json = await request.json()
+    except ValueError:
+        raise BadActionRequest("Invalid JSON")
+    action_request = validate_input(request_json, aptb.input_body_validator)
+
+    logger.info(
+        "Creating new action",
+        extra={
+            "creator_id": auth.effective_identity,
+            "label": action_request.label,
+        },
+    )
+    current_utc = utc_now()
+    action_status = _new_action_status(action_request, auth, current_utc)
+    async with get_async_db() as db:
+        await async_crud.create_action_status(
+            db, **_action_status_record(action_status, request_json)
+        )
+    logger.info(
+        "Action created successfully",
+        extra={"action_id": action_status.action_id},
+    )
+    return _json_response(
+        action_status, 202, retry_after_seconds=retry_after(current_utc)
+    )
+
+
+async def action_status(request: Request) -> Response:
+    """Get the up-to-date status of an action, as my_action_status does.
+
+    Conditional polls are answered with 304 as by StatusETagHooks, and ACTIVE
+    actions past MAX_SLEEP_TIME are completed when the sweeper is disabled.
+    """
+    action_id = request.path_params["action_id"]
+    auth = await _authenticate(request)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Checking action status", extra={"action_id": action_id})
+    async with get_async_db() as db:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            response = await _not_modified(db, action_id, auth, if_none_match)
+            if response is not None:
+                return response
+
+        def load(session: Session) -> Any:
+            store = SQLiteSession(session)
+            return store.lookup(
+                action_id, lambda: _load_action_status(store, action_id)
+            )
+
+        loaded = await db.run_sync(load)
+        if loaded is None:
+            logger.warning("Action not found", extra={"action_id": action_id})
+            raise ActionNotFound(f"No action with {action_id}")
+
+        # Copy so that completion below never modifies a cached status.
+        action_status, utc_offset, version = loaded
+        action_status = action_status.copy()
+
+        await _authorize_or_404(db, action_id, auth, MONITOR_ROLES)
+        start_time = dt.datetime.fromisoformat(action_status.start_time)
+        polled_status = action_status.status.value
+        now = utc_now()
+        if (
+            action_status.status == ActionStatusValue.ACTIVE
+            and not get_config().COMPLETION_SWEEPER_ENABLED
+            and _complete_if_expired(action_status, utc_offset, now)
+        ):
+            # Completed by this request; the next poll gets the new ETag.
+            version = None
+            row = await async_crud.transition_action_status(
+                db, **_completion_values(action_status, now)
+            )
+            if row is None:
+                # Cancelled or completed by another request in the meantime.
+                row = await async_crud.get_action_status_row(db, action_id)
+                if row is not None:
+                    action_status = row_to_action_status(row)
+
+    _record_poll(polled_status, start_time)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Action status retrieved",
+            extra={"action_id": action_id, "status": action_status.status},
+        )
+    active = action_status.status == ActionStatusValue.ACTIVE
+    return _json_response(
+        action_status,
+        retry_after_seconds=retry_after(start_time) if active else None,
+        version=version,
+    )
+
+
+async def _transition(
+    action_id: str,
+    auth: AuthState,
+    from_statuses: Iterable[str],
+    message: str,
+    **values: Any,
+) -> ActionStatus:
+    """Apply a cancel or release after checking the caller may manage the action.
+
+    Raises:
+        ActionNotFound: If the action does not exist or was released.
+        ActionConflict: If the action is not in one of from_statuses.
+        AuthenticationError: If the caller may not manage the action.
+    """
+    async with get_async_db() as db:
+        await _authorize_or_404(db, action_id, auth, MANAGE_ROLES)
+        row = await async_crud.transition_action_status(
+            db, action_id=action_id, from_statuses=from_statuses, **values
+        )
+        if row is None and await async_crud.restore_archived_action(
+            db, action_id, from_statuses
+        ):
+            row = await async_crud.transition_action_status(
+                db, action_id=action_id, from_statuses=from_statuses, **values
+            )
+        if row is None:
+            await _raise_transition_failed(db, action_id, message)
+    return row_to_action_status(row)
+
+
+async def action_cancel(request: Request) -> Response:
+    """Cancel an action, as my_action_cancel does."""
+    action_id = request.path_params["action_id"]
+    auth = await _authenticate(request)
+    logger.info("Cancelling action", extra={"action_id": action_id})
+    action_status = await _transition(
+        action_id,
+        auth,
+        INCOMPLETE_STATUSES,
+        "Cannot cancel complete action",
+        status=ActionStatusValue.FAILED.value,
+        display_status=f"Cancelled by {auth.effective_identity}",
+        completion_time=utc_now(),
+    )
+    logger.info(
+        "Action cancelled successfully",
+        extra={"action_id": action_id, "cancelled_by": auth.effective_identity},
+    )
+    return _json_response(action_status)
+
+
+async def action_release(request: Request) -> Response:
+    """Release an action, as my_action_release does."""
+    action_id = request.path_params["action_id"]
+    auth = await _authenticate(request)
+    logger.info("Releasing action", extra={"action_id": action_id})
+    action_status = await _transition(
+        action_id,
+        auth,
+        COMPLETE_STATUSES,
+        "Cannot release incomplete Action",
+        display_status=f"Released by {auth.effective_identity}",
+        is_released=True,
+    )
+    logger.info(
+        "Action released successfully",
+        extra={"action_id": action_id, "released_by": auth.effective_identity},
+    )
+    return _json_response(action_status)
+
+
+async def ping(request: Request) -> Response:
+    return _json_response({"message": "pong"})
+
+
+async def stats(request: Request) -> Response:
+    cache = get_status_cache()
+    token_cache = get_token_cache()
+    return _json_response(
+        {
+            "status_cache": cache.stats() if cache is not None else None,
+            "auth_cache": token_cache.stats() if token_cache is not None else None,
+            "polling": get_polling_stats().stats(),
+            "logging": get_logging_stats(),
+        }
+    )
+
+
+async def _handle_toolkit_error(
+    request: Request, exc: ActionProviderToolsException
+) -> Response:
+    return Response(exc.get_body(), status_code=exc.code, media_type="application/json")
+
+
+async def _handle_authentication_error(
+    request: Request, exc: AuthenticationError
+) -> Response:
+    return await _handle_toolkit_error(request, UnauthorizedRequest())
+
+
+async def _handle_unexpected_error(request: Request, exc: Exception) -> Response:
+    logger.exception("Handling unexpected exception")
+    return _json_response(
+        {"code": "ActionProviderError", "description": "Internal Server Error"}, 500
+    )
+
+
+def create_asgi_app() -> Starlette:
+    """Create the ASGI app serving the action provider's routes under /apt.
+
+    Raises:
+        ValueError: If a storage backend other than sqlite is configured.
+    """
+    setup_logging()
+    if get_config().STORAGE_BACKEND != "sqlite":
+        raise ValueError("The ASGI app only supports the sqlite storage backend")
+
+    # Start background tasks such as the completion sweeper
+    start_background_tasks()
+
+    prefix = aptb.url_prefix
+    routes = [
+        Route(f"{prefix}/", introspect, methods=["GET"]),
+        Route(f"{prefix}/run", action_run, methods=["POST"]),
+        Route(f"{prefix}/actions", action_run, methods=["POST"]),
+        Route(f"{prefix}/{{action_id}}/status", action_status, methods=["GET"]),
+        Route(f"{prefix}/actions/{{action_id}}", action_status, methods=["GET"]),
+        Route(f"{prefix}/{{action_id}}/cancel", action_cancel, methods=["POST"]),
+        Route(
+            f"{prefix}/actions/{{action_id}}/cancel", action_cancel, methods=["POST"]
+        ),
+        Route(f"{prefix}/{{action_id}}/release", action_release, methods=["POST"]),
+        Route(f"{prefix}/actions/{{action_id}}", action_release, methods=["DELETE"]),
+        Route("/ping", ping, methods=["GET"]),
+        Route("/stats", stats, methods=["GET"]),
+    ]
+    return Starlette(
+        routes=routes,
+        exception_handlers={
+            ActionProviderToolsException: _handle_toolkit_error,
+            AuthenticationError: _handle_authentication_error,
+            Exception: _handle_unexpected_error,
+        },
+    )
@@ -0,0 +1,318 @@
+"""Provider-level cache of token introspection and group lookups."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from globus_action_provider_tools.authentication import (
+    AuthState,
+    AuthStateBuilder,
+    _hash_token,
+)
+from globus_action_provider_tools.flask.helpers import FlaskAuthStateBuilder
+from globus_sdk import GlobusHTTPResponse
+
+from mike_action_provider.config import get_config
+from mike_action_provider.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenCache:
+    """Bounded LRU cache of introspection results keyed by token hash.
+
+    The toolkit keeps the introspection of at most 100 tokens for 30 seconds
+    per process, so a few hundred clients polling with their own tokens miss
+    it on almost every request. Entries here live until the token expires,
+    capped at ``ttl``, and the caller's group memberships are kept alongside
+    its introspection. Introspections of inactive tokens are cached for
+    ``negative_ttl``, so a client retrying with a revoked token does not
+    reach Globus Auth on every request.
+
+    Args:
+        maxsize: Maximum number of tokens kept.
+        ttl: Maximum seconds an active token's entry may be served.
+        negative_ttl: Seconds an inactive token's entry may be served.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # token hash -> [expires_at, introspection, groups]
+        self._entries: "OrderedDict[str, List]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "group_hits": 0,
+            "group_misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def __contains__(self, token_hash: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def get_introspection(self, token_hash: str) -> Optional[GlobusHTTPResponse]:
+        """Get a token's cached introspection.
+
+        Args:
+            token_hash: Hash of the bearer token.
+
+        Returns:
+            Optional[GlobusHTTPResponse]: The introspection, or None when it is
+                not cached or has expired.
+        """
+        with self._lock:
+            entry = self._lookup(token_hash)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry[1]["active"]:
+                self._counters["hits"] += 1
+            else:
+                self._counters["negative_hits"] += 1
+            return entry[1]
+
+    def put_introspection(
+        self, token_hash: str, introspection: GlobusHTTPResponse
+    ) -> None:
+        """Cache a token's introspection until the token expires.
+
+        Args:
+            token_hash: Hash of the bearer token.
+            introspection: The token introspection response.
+        """
+        now = time.time()
+        if introspection["active"]:
+            ttl = self.ttl
+            expires = introspection.get("exp")
+            if expires is not None:
+                ttl = min(ttl, expires - now)
+        else:
+            ttl = self.negative_ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[token_hash] = [time.monotonic() + ttl, introspection, None]
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def get_groups(self, token_hash: str) -> Optional[FrozenSet[str]]:
+        """Get the cached group principals of a token's identity.
+
+        Args:
+            token_hash: Hash of the bearer token.
+
+        Returns:
+            Optional[FrozenSet[str]]: The group principals, or None when they
+                were not looked up yet.
+        """
+        with self._lock:
+            entry = self._lookup(token_hash)
+            groups = entry[2] if entry is not None else None
+            self._counters["group_hits" if groups is not None else "group_misses"] += 1
+            return groups
+
+    def put_groups(self, token_hash: str, groups: Iterable[str]) -> None:
+        """Cache the group principals of a token's identity.
+
+        Groups are only kept while the token's introspection is cached.
+
+        Args:
+            token_hash: Hash of the bearer token.
+            groups: The group principals.
+        """
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is not None:
+                entry[2] = frozenset(groups)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters.
+
+        Returns:
+            Dict[str, int]: Hit, miss, eviction and expiration counts along
+                with the current and maximum size.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _lookup(self, token_hash: str) -> Optional[List]:
+        """Get a live entry, dropping it if it expired. Needs the lock held."""
+        entry = self._entries.get(token_hash)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[token_hash]
+            self._counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(token_hash)
+        return entry
+
+
+class CachedAuthState(AuthState):
+    """AuthState that resolves introspections and groups through a TokenCache.
+
+    Args:
+        token_cache: The cache to read and fill.
+        *args: Passed to AuthState.
+        **kwargs: Passed to AuthState.
+    """
+
+    def __init__(self, token_cache: TokenCache, *args, **kwargs) -> None:
+        self._token_cache = token_cache
+        super().__init__(*args, **kwargs)
+
+    def _cached_introspect_call(self) -> GlobusHTTPResponse:
+        introspection = self._token_cache.get_introspection(self._token_hash)
+        if introspection is None:
+            introspection = self.auth_client.oauth2_token_introspect(
+                self.bearer_token, include="identity_set"
+            )
+            self._token_cache.put_introspection(self._token_hash, introspection)
+        return introspection
+
+    @property
+    def groups(self) -> FrozenSet[str]:
+        groups = self._token_cache.get_groups(self._token_hash)
+        if groups is None:
+            groups = super().groups
+            # The toolkit returns an empty set without caching it when the
+            # lookup fails; only keep results it considered valid.
+            if self.group_membership_cache.get(self._token_hash) is not None:
+                self._token_cache.put_groups(self._token_hash, groups)
+        return groups
+
+
+class CachingAuthStateBuilder(AuthStateBuilder):
+    """AuthStateBuilder building CachedAuthStates.
+
+    Args:
+        token_cache: The cache the built states use.
+        *args: Passed to AuthStateBuilder.
+        **kwargs: Passed to AuthStateBuilder.
+    """
+
+    def __init__(self, token_cache: TokenCache, *args, **kwargs) -> None:
+        self.token_cache = token_cache
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def from_builder(
+        cls, builder: AuthStateBuilder, token_cache: TokenCache
+    ) -> "CachingAuthStateBuilder":
+        """Create a caching builder configured like an existing builder.
+
+        Args:
+            builder: The builder to copy the auth client and scopes from.
+            token_cache: The cache the built states use.
+
+        Returns:
+            CachingAuthStateBuilder: The new builder.
+        """
+        return cls(
+            token_cache,
+            builder.auth_client,
+            builder.default_expected_scopes,
+            client_factory=builder.client_factory,
+        )
+
+    def is_cached(self, request) -> bool:
+        """Check whether a request's token can be resolved without Globus Auth.
+
+        Args:
+            request: A request with an Authorization header.
+
+        Returns:
+            bool: Whether the token's introspection is cached.
+        """
+        header = request.headers.get("Authorization") or ""
+        if not header.startswith("Bearer "):
+            return False
+        return _hash_token(header[len("Bearer ") :].strip()) in self.token_cache
+
+    def build(
+        self, access_token: str, expected_scopes: Optional[Iterable[str]] = None
+    ) -> AuthState:
+        if expected_scopes is None:
+            expected_scopes = self.default_expected_scopes
+        else:
+            expected_scopes = frozenset(expected_scopes)
+        return CachedAuthState(
+            self.token_cache,
+            self.auth_client,
+            access_token,
+            expected_scopes,
+            client_factory=self.client_factory,
+        )
+
+
+class CachingFlaskAuthStateBuilder(FlaskAuthStateBuilder, CachingAuthStateBuilder):
+    """FlaskAuthStateBuilder building CachedAuthStates.
+
+    ``FlaskAuthStateBuilder.build_from_request`` builds through
+    ``super().build``, which resolves to the caching ``build`` in this order.
+    """
+
+
+_token_cache: Optional[TokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> Optional[TokenCache]:
+    """Get the process-wide token cache.
+
+    Returns:
+        Optional[TokenCache]: The cache, or None when it is disabled.
+    """
+    global _token_cache
+    config = get_config()
+    if not config.AUTH_CACHE_ENABLED:
+        return None
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache(
+                    maxsize=config.AUTH_CACHE_SIZE,
+                    ttl=config.AUTH_CACHE_TTL,
+                    negative_ttl=config.AUTH_CACHE_NEGATIVE_TTL,
+                )
+    return _token_cache
+
+
+def with_token_cache(builder: FlaskAuthStateBuilder) -> FlaskAuthStateBuilder:
+    """Make a state builder use the token cache, when it is enabled.
+
+    Args:
+        builder: The builder set up by the blueprint.
+
+    Returns:
+        FlaskAuthStateBuilder: A caching builder, or ``builder`` itself when
+            the cache is disabled.
+    """
+    token_cache = get_token_cache()
+    if token_cache is None:
+        return builder
+    logger.info(
+        "Caching token introspections",
+        extra={"maxsize": token_cache.maxsize, "ttl": token_cache.ttl},
+    )
+    return CachingFlaskAuthStateBuilder.from_builder(builder, token_cache)
@@ -1,10 +1,10 @@
 """Flask blueprint for the action provider."""
 
 import datetime as dt
-import json
-from flask import request
+import logging
+from flask import Response, g, jsonify, request
 from pydantic import BaseModel, Field
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, NoReturn, Optional, Set, Tuple
 
 from globus_action_provider_tools import (
     ActionProviderDescription,
@@ -13,43 +13,57 @@ from globus_action_provider_tools import (
     ActionStatusValue,
     AuthState,
 )
-from globus_action_provider_tools.authorization import (
-    authorize_action_access_or_404,
-    authorize_action_management_or_404,
-)
+from globus_action_provider_tools.errors import AuthenticationError
 from globus_action_provider_tools.flask import ActionProviderBlueprint
-from globus_action_provider_tools.flask.exceptions import ActionConflict, ActionNotFound
+from globus_action_provider_tools.flask.exceptions import (
+    ActionConflict,
+    ActionNotFound,
+    ActionProviderToolsException,
+    BadActionRequest,
+    UnauthorizedRequest,
+)
+from globus_action_provider_tools.flask.helpers import validate_input
 from globus_action_provider_tools.flask.types import (
     ActionCallbackReturn,
     ActionLogReturn,
 )
 
 from .config import get_config
-from mike_action_provider.db.connection import get_db
 from mike_action_provider.db.crud import (
-    create_action_status,
-    get_action_status,
-    update_action_status,
+    COMPLETE_STATUSES,
+    INCOMPLETE_STATUSES,
+    MANAGE_ROLES,
+    MONITOR_ROLES,
 )
+from mike_action_provider.hydration import row_to_action_status
 from mike_action_provider.logging import get_logger
+from mike_action_provider.polling import (
+    get_polling_stats,
+    retry_after,
+    seconds_until_done,
+)
+from mike_action_provider.storage import StorageSession, get_storage
 from mike_action_provider.utils import utc_now
 
 logger = get_logger(__name__)
 
 
-def _update_action_status(
-    action_status: ActionStatus, request_body: Dict[str, Any]
-) -> ActionStatus:
-    """Update action status if it has exceeded the maximum sleep time.
+def _complete_if_expired(
+    action_status: ActionStatus, utc_offset: Optional[int], now: dt.datetime
+) -> bool:
+    """Mark an action SUCCEEDED if it has exceeded the maximum sleep time.
+
+    Only the given ActionStatus is changed; storing the completion is left to
+    the caller, see _completion_values.
 
     Args:
-        action_status (ActionStatus): The action status to update.
-        request_data (Dict[str, Any]): The original request data containing UTC offset.
+        action_status (ActionStatus): The ACTIVE action status to update.
+        utc_offset (Optional[int]): The UTC offset of the original request body.
+        now (dt.datetime): The current time, used as the completion time.
 
     Returns:
-        ActionStatus: The updated action status.
+        bool: True if the action was completed.
     """
-    now = utc_now()
     # Ensure start_time is treated as UTC
     start_time = dt.datetime.fromisoformat(action_status.start_time)
     if start_time.tzinfo is None:
@@ -57,43 +71,269 @@ def _update_action_status(
     time_diff = now - start_time
     total_seconds = time_diff.total_seconds()
 
-    if total_seconds > get_config().MAX_SLEEP_TIME:
-        logger.info(
-            "Action completed",
-            extra={
-                "action_id": action_status.action_id,
-                "duration_minutes": round(time_diff.total_seconds() / 60, 2),
-            },
-        )
-        action_status.status = ActionStatusValue.SUCCEEDED
-        action_status.display_status = "Action completed"
-        action_status.completion_time = now.isoformat()
-
-        if request_body.get("utc_offset"):
-            offset_hours = int(request_body["utc_offset"])
-            # For negative offsets, we need to subtract the hours
-            if offset_hours < 0:
-                local_time = start_time - dt.timedelta(hours=abs(offset_hours))
-            else:
-                local_time = start_time + dt.timedelta(hours=offset_hours)
-            action_status.details = {
-                "utc_offset": request_body["utc_offset"],
-                "utc_time": start_time.isoformat(),
-                "local_time": local_time.isoformat(),
-            }
-
-        with get_db() as db:
-            update_action_status(
-                db=db,
-                action_id=action_status.action_id,
-                status=action_status.status,
-                display_status=action_status.display_status,
-                completion_time=now,
-                details=json.dumps(action_status.details),
-            )
+    if total_seconds <= get_config().MAX_SLEEP_TIME:
+        return False
+
+    logger.info(
+        "Action completed",
+        extra={
+            "action_id": action_status.action_id,
+            "duration_minutes": round(time_diff.total_seconds() / 60, 2),
+        },
+    )
+    action_status.status = ActionStatusValue.SUCCEEDED
+    action_status.display_status = "Action completed"
+    action_status.completion_time = now.isoformat()
+
+    if utc_offset:
+        # For negative offsets, we need to subtract the hours
+        if utc_offset < 0:
+            local_time = start_time - dt.timedelta(hours=abs(utc_offset))
+        else:
+            local_time = start_time + dt.timedelta(hours=utc_offset)
+        action_status.details = {
+            "utc_offset": utc_offset,
+            "utc_time": start_time.isoformat(),
+            "local_time": local_time.isoformat(),
+        }
+    return True
+
+
+def _completion_values(action_status: ActionStatus, now: dt.datetime) -> Dict[str, Any]:
+    """Get the StorageSession.transition arguments storing a lazy completion.
+
+    Args:
+        action_status (ActionStatus): The action completed by _complete_if_expired.
+        now (dt.datetime): The completion time.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for StorageSession.transition.
+    """
+    return {
+        "action_id": action_status.action_id,
+        "from_statuses": [ActionStatusValue.ACTIVE.value],
+        "status": action_status.status.value,
+        "display_status": action_status.display_status,
+        "completion_time": now,
+        "details": action_status.details,
+    }
+
+
+def _update_action_status(
+    action_status: ActionStatus, utc_offset: Optional[int]
+) -> ActionStatus:
+    """Update action status if it has exceeded the maximum sleep time.
+
+    Args:
+        action_status (ActionStatus): The action status to update.
+        utc_offset (Optional[int]): The UTC offset of the original request body.
+
+    Returns:
+        ActionStatus: The updated action status.
+    """
+    now = utc_now()
+    if not _complete_if_expired(action_status, utc_offset, now):
+        return action_status
+
+    with get_storage().session() as store:
+        row = store.transition(**_completion_values(action_status, now))
+        if row is None:
+            # Cancelled or completed by another request in the meantime.
+            row = store.get(action_status.action_id)
+            if row is not None:
+                return row_to_action_status(row)
     return action_status
 
 
+def _load_action_status(
+    store: StorageSession, action_id: str
+) -> Optional[Tuple[ActionStatus, Optional[int], int]]:
+    """Load an action status along with the UTC offset of its request.
+
+    Args:
+        store (StorageSession): Storage session.
+        action_id (str): The action to load.
+
+    Returns:
+        Optional[Tuple[ActionStatus, Optional[int], int]]: The action status,
+            UTC offset of the request body and row version, or None if the
+            action does not exist.
+    """
+    row = store.get(action_id)
+    if row is None:
+        return None
+    return row_to_action_status(row), row.utc_offset, row.version
+
+
+def _holds_any(principals: Set[str], auth: AuthState) -> bool:
+    """Check whether the caller is one of the given authorizing principals.
+
+    Args:
+        principals (Set[str]): Principals from get_authorizing_principals.
+        auth (AuthState): The caller's authentication state.
+
+    Returns:
+        bool: True if the caller is or belongs to one of the principals.
+    """
+    if principals & auth.identities:
+        return True
+    # Any remaining principals are groups.
+    return bool(principals and principals & auth.groups)
+
+
+def _authorize_or_404(
+    store: StorageSession, action_id: str, auth: AuthState, roles: Iterable[str]
+) -> None:
+    """Check that the caller holds one of the roles on an action.
+
+    This is the action_principals equivalent of the toolkit's
+    authorize_action_access_or_404 and authorize_action_management_or_404.
+    Group memberships are only looked up when the action lists a group.
+
+    Args:
+        store (StorageSession): Storage session.
+        action_id (str): The action being accessed.
+        auth (AuthState): The caller's authentication state.
+        roles (Iterable[str]): Roles granting access, e.g. MONITOR_ROLES.
+
+    Raises:
+        ActionNotFound: If the action does not exist.
+        AuthenticationError: If the caller holds none of the roles.
+    """
+    principals = store.get_principals(action_id, roles, auth.identities)
+    if _holds_any(principals, auth):
+        return
+
+    if store.get(action_id) is None:
+        logger.warning("Action not found", extra={"action_id": action_id})
+        raise ActionNotFound(f"No action with {action_id}")
+    logger.info(
+        "Caller is not authorized for action",
+        extra={
+            "action_id": action_id,
+            "identity": auth.effective_identity,
+            "roles": sorted(roles),
+        },
+    )
+    raise AuthenticationError(f"No Action with id {action_id}")
+
+
+def _raise_transition_failed(
+    store: StorageSession, action_id: str, message: str
+) -> NoReturn:
+    """Report why a conditional status transition did not apply.
+
+    Only read after the transition failed, to tell a missing or released
+    action from one in the wrong status.
+
+    Args:
+        store (StorageSession): Storage session.
+        action_id (str): The action that was not updated.
+        message (str): Conflict description.
+
+    Raises:
+        ActionNotFound: If the action does not exist or was released.
+        ActionConflict: If the action is in a status the transition does not
+            apply to.
+    """
+    row = store.get(action_id)
+    if row is None:
+        logger.warning("Action not found", extra={"action_id": action_id})
+        raise ActionNotFound(f"No action with {action_id}")
+    logger.warning(
+        message,
+        extra={"action_id": action_id, "status": row.status},
+    )
+    raise ActionConflict(message)
+
+
+def _is_expired(start_time: dt.datetime) -> bool:
+    """Check whether an ACTIVE action is due to be completed when polled."""
+    start_time = start_time.replace(tzinfo=dt.timezone.utc)
+    return (utc_now() - start_time).total_seconds() > get_config().MAX_SLEEP_TIME
+
+
+def _record_poll(
+    status: str, start_time: dt.datetime, not_modified: bool = False
+) -> None:
+    """Count a status poll for the polling counters in /stats.
+
+    Args:
+        status (str): Status of the action when polled.
+        start_time (dt.datetime): When the action started.
+        not_modified (bool): The poll is answered with 304 Not Modified.
+    """
+    active = status == ActionStatusValue.ACTIVE.value
+    early = active and seconds_until_done(start_time) > 0
+    get_polling_stats().record_poll(active, early, not_modified)
+
+
+class RetryAfterHooks:
+    """Send the Retry-After hint chosen by the view for an ACTIVE action.
+
+    Pollers honoring it sleep until the action can be complete instead of
+    polling at a fixed interval. Early polls are counted in /stats to show the
+    load that remains.
+    """
+
+    @staticmethod
+    def after_request(response: Response) -> Response:
+        seconds = g.pop("retry_after", None)
+        if seconds is not None and response.status_code in (200, 202, 304):
+            response.headers["Retry-After"] = str(seconds)
+            get_polling_stats().record_hint()
+        return response
+
+
+class StatusETagHooks:
+    """Conditional GET support for the action status endpoints.
+
+    Status responses carry the row version as a strong ETag. A poll sending
+    that ETag in If-None-Match is answered with 304 Not Modified after reading
+    only the version and checking access, without building or serializing the
+    ActionStatus. Polls of an ACTIVE action that is due for lazy completion
+    always take the full path, so that the completion still happens.
+    """
+
+    endpoints = ("apt._action_status", "apt.action_status")
+
+    @staticmethod
+    def before_request() -> Optional[Response]:
+        if request.endpoint not in StatusETagHooks.endpoints:
+            return None
+        if not request.if_none_match:
+            return None
+
+        action_id = request.view_args["action_id"]
+        with get_storage().session() as store:
+            row = store.get_version(action_id)
+            if row is None or not request.if_none_match.contains(str(row.version)):
+                return None
+            if (
+                row.status == ActionStatusValue.ACTIVE.value
+                and not get_config().COMPLETION_SWEEPER_ENABLED
+                and _is_expired(row.start_time)
+            ):
+                return None
+            _authorize_or_404(store, action_id, g.auth_state, MONITOR_ROLES)
+
+        _record_poll(row.status, row.start_time, not_modified=True)
+        if row.status == ActionStatusValue.ACTIVE.value:
+            g.retry_after = retry_after(row.start_time)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Action status not modified", extra={"action_id": action_id})
+        response = Response(status=304)
+        response.set_etag(str(row.version))
+        return response
+
+    @staticmethod
+    def after_request(response: Response) -> Response:
+        version = g.pop("action_status_version", None)
+        if version is not None and response.status_code == 200:
+            response.set_etag(str(version))
+        return response
+
+
 class ActionProviderInput(BaseModel):
     utc_offset: int = Field(
         ..., title="UTC Offset", description="An input value to this ActionProvider"
@@ -124,9 +364,63 @@ aptb = ActionProviderBlueprint(
     import_name=__name__,
     url_prefix="/apt",
     provider_description=description,
+    request_lifecycle_hooks=[StatusETagHooks, RetryAfterHooks],
 )
 
 
+def _new_action_status(
+    action_request: ActionRequest, auth: AuthState, start_time: dt.datetime
+) -> ActionStatus:
+    """Build the ActionStatus of a newly started action.
+
+    Args:
+        action_request (ActionRequest): The validated run request.
+        auth (AuthState): The caller's authentication state.
+        start_time (dt.datetime): When the action starts.
+
+    Returns:
+        ActionStatus: The ACTIVE action status.
+    """
+    return ActionStatus(
+        status=ActionStatusValue.ACTIVE,
+        creator_id=str(auth.effective_identity),
+        label=action_request.label or None,
+        monitor_by=action_request.monitor_by or auth.identities,
+        manage_by=action_request.manage_by or auth.identities,
+        start_time=start_time.isoformat(),
+        completion_time=None,
+        release_after=action_request.release_after or "P30D",
+        display_status=ActionStatusValue.ACTIVE,
+        details={},
+    )
+
+
+def _action_status_record(
+    action_status: ActionStatus, request_json: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Get the StorageSession.create arguments for a new action.
+
+    Args:
+        action_status (ActionStatus): The action status to store.
+        request_json (Dict[str, Any]): The run request that created it.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for create_action_status.
+    """
+    return {
+        "action_id": action_status.action_id,
+        "status": action_status.status,
+        "creator_id": action_status.creator_id,
+        "monitor_by": ",".join(action_status.monitor_by),
+        "manage_by": ",".join(action_status.manage_by),
+        "release_after": str(action_status.release_after),
+        "display_status": action_status.display_status,
+        "request_json": request_json,
+        "label": action_status.label,
+        "details": action_status.details,
+    }
+
+
 @aptb.action_run
 def my_action_run(
     action_request: ActionRequest, auth: AuthState
@@ -145,87 +439,63 @@ def my_action_run(
     )
 
     current_utc = utc_now()
-    action_status = ActionStatus(
-        status=ActionStatusValue.ACTIVE,
-        creator_id=str(auth.effective_identity),
-        label=action_request.label or None,
-        monitor_by=action_request.monitor_by or auth.identities,
-        manage_by=action_request.manage_by or auth.identities,
-        start_time=current_utc.isoformat(),
-        completion_time=None,
-        release_after=action_request.release_after or "P30D",
-        display_status=ActionStatusValue.ACTIVE,
-        details={},
-    )
+    action_status = _new_action_status(action_request, auth, current_utc)
 
-    # Store in database
-    with get_db() as db:
-        create_action_status(
-            db=db,
-            action_id=action_status.action_id,
-            status=action_status.status,
-            creator_id=action_status.creator_id,
-            monitor_by=",".join(action_status.monitor_by),
-            manage_by=",".join(action_status.manage_by),
-            release_after=str(action_status.release_after),
-            display_status=action_status.display_status,
-            request_json=request.get_json(),
-            label=action_status.label,
-            details=action_status.details,
-        )
+    with get_storage().session() as store:
+        store.create(_action_status_record(action_status, request.get_json()))
         logger.info(
             "Action created successfully",
             extra={"action_id": action_status.action_id},
         )
 
+    g.retry_after = retry_after(current_utc)
     return action_status
 
 
 @aptb.action_status
 def my_action_status(action_id: str, auth: AuthState) -> ActionCallbackReturn:
-    """Query for the action_id in the database to return the up-to-date ActionStatus.
+    """Look up the action_id in storage to return the up-to-date ActionStatus.
 
     We will determine if the action has exceeded MAX_SLEEP_TIME,
-    if so, the action status will be changed to SUCCEEDED.
+    if so, the action status will be changed to SUCCEEDED. When the
+    completion sweeper is enabled it completes actions instead.
     """
-    logger.debug("Checking action status", extra={"action_id": action_id})
-    with get_db() as db:
-        db_action = get_action_status(db, action_id)
-        if db_action is None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Checking action status", extra={"action_id": action_id})
+    with get_storage().session() as store:
+        loaded = store.lookup(action_id, lambda: _load_action_status(store, action_id))
+        if loaded is None:
             logger.warning("Action not found", extra={"action_id": action_id})
             raise ActionNotFound(f"No action with {action_id}")
 
-        action_status = ActionStatus(
-            action_id=db_action.action_id,
-            status=db_action.status,
-            creator_id=db_action.creator_id,
-            label=db_action.label,
-            monitor_by=set(db_action.monitor_by.split(",")),
-            manage_by=set(db_action.manage_by.split(",")),
-            start_time=db_action.start_time.isoformat(),
-            completion_time=(
-                db_action.completion_time.replace(tzinfo=dt.timezone.utc).isoformat()
-                if db_action.completion_time
-                else None
-            ),
-            release_after=db_action.release_after,
-            display_status=db_action.display_status[:64],
-            details=json.loads(db_action.details) if db_action.details else {},
-        )
-
-        authorize_action_access_or_404(action_status, auth)
+        # Copy so that completion below never modifies a cached status.
+        action_status, utc_offset, version = loaded
+        action_status = action_status.copy()
+
+        _authorize_or_404(store, action_id, auth, MONITOR_ROLES)
+        start_time = dt.datetime.fromisoformat(action_status.start_time)
+        polled_status = action_status.status.value
+        # With the completion sweeper running, status reads are pure reads.
+        if (
+            action_status.status == ActionStatusValue.ACTIVE
+            and not get_config().COMPLETION_SWEEPER_ENABLED
+        ):
+            action_status = _update_action_status(action_status, utc_offset)
+            if action_status.is_complete():
+                # Completed by this request; the next poll gets the new ETag.
+                version = None
+        g.action_status_version = version
+        _record_poll(polled_status, start_time)
         if action_status.status == ActionStatusValue.ACTIVE:
-            request_data = db_action.request_json
-            action_status = _update_action_status(
-                action_status, request_data.get("body")
+            g.retry_after = retry_after(start_time)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Action status retrieved",
+                extra={
+                    "action_id": action_id,
+                    "status": action_status.status,
+                },
             )
-        logger.debug(
-            "Action status retrieved",
-            extra={
-                "action_id": action_id,
-                "status": action_status.status,
-            },
-        )
         return action_status
 
 
@@ -239,50 +509,18 @@ def my_action_cancel(action_id: str, auth: AuthState) -> ActionCallbackReturn:
     stored.
     """
     logger.info("Cancelling action", extra={"action_id": action_id})
-    with get_db() as db:
-        db_action = get_action_status(db, action_id)
-        if db_action is None:
-            logger.warning("Action not found", extra={"action_id": action_id})
-            raise ActionNotFound(f"No action with {action_id}")
-
-        action_status = ActionStatus(
-            action_id=db_action.action_id,
-            status=db_action.status,
-            creator_id=db_action.creator_id,
-            label=db_action.label,
-            monitor_by=set(db_action.monitor_by.split(",")),
-            manage_by=set(db_action.manage_by.split(",")),
-            start_time=db_action.start_time.isoformat(),
-            completion_time=(
-                db_action.completion_time.replace(tzinfo=dt.timezone.utc).isoformat()
-                if db_action.completion_time
-                else None
-            ),
-            release_after=db_action.release_after,
-            display_status=db_action.display_status[:64],
-            details=db_action.details,
-        )
-
-        authorize_action_management_or_404(action_status, auth)
-        if action_status.is_complete():
-            logger.warning(
-                "Cannot cancel completed action",
-                extra={
-                    "action_id": action_id,
-                    "status": action_status.status,
-                },
-            )
-            raise ActionConflict("Cannot cancel complete action")
-
-        action_status.status = ActionStatusValue.FAILED
-        action_status.display_status = f"Cancelled by {auth.effective_identity}"
-
-        update_action_status(
-            db=db,
+    with get_storage().session() as store:
+        _authorize_or_404(store, action_id, auth, MANAGE_ROLES)
+        row = store.transition(
             action_id=action_id,
-            status=action_status.status,
-            display_status=action_status.display_status,
+            from_statuses=INCOMPLETE_STATUSES,
+            status=ActionStatusValue.FAILED.value,
+            display_status=f"Cancelled by {auth.effective_identity}",
+            completion_time=utc_now(),
         )
+        if row is None:
+            _raise_transition_failed(store, action_id, "Cannot cancel complete action")
+
         logger.info(
             "Action cancelled successfully",
             extra={
@@ -290,7 +528,7 @@ def my_action_cancel(action_id: str, auth: AuthState) -> ActionCallbackReturn:
                 "cancelled_by": auth.effective_identity,
             },
         )
-        return action_status
+        return row_to_action_status(row)
 
 
 @aptb.action_release
@@ -302,49 +540,20 @@ def my_action_release(action_id: str, auth: AuthState) -> ActionCallbackReturn:
     The final, up to date ActionStatus is returned after a successful release.
     """
     logger.info("Releasing action", extra={"action_id": action_id})
-    with get_db() as db:
-        db_action = get_action_status(db, action_id)
-        if db_action is None:
-            logger.warning("Action not found", extra={"action_id": action_id})
-            raise ActionNotFound(f"No action with {action_id}")
-
-        action_status = ActionStatus(
-            action_id=db_action.action_id,
-            status=db_action.status,
-            creator_id=db_action.creator_id,
-            label=db_action.label,
-            monitor_by=set(db_action.monitor_by.split(",")),
-            manage_by=set(db_action.manage_by.split(",")),
-            start_time=db_action.start_time.isoformat(),
-            completion_time=(
-                db_action.completion_time.replace(tzinfo=dt.timezone.utc).isoformat()
-                if db_action.completion_time
-                else None
-            ),
-            release_after=db_action.release_after,
-            display_status=db_action.display_status,
-            details=json.loads(db_action.details) if db_action.details else {},
-        )
-
-        authorize_action_management_or_404(action_status, auth)
-        if not action_status.is_complete():
-            logger.warning(
-                "Cannot release incomplete action",
-                extra={
-                    "action_id": action_id,
-                    "status": action_status.status,
-                },
-            )
-            raise ActionConflict("Cannot release incomplete Action")
-
-        action_status.display_status = f"Released by {auth.effective_identity}"
+    with get_storage().session() as store:
+        _authorize_or_404(store, action_id, auth, MANAGE_ROLES)
         # We soft delete the action status by setting is_released to True
-        update_action_status(
-            db=db,
+        row = store.transition(
             action_id=action_id,
-            display_status=action_status.display_status,
+            from_statuses=COMPLETE_STATUSES,
+            display_status=f"Released by {auth.effective_identity}",
             is_released=True,
         )
+        if row is None:
+            _raise_transition_failed(
+                store, action_id, "Cannot release incomplete Action"
+            )
+
         logger.info(
             "Action released successfully",
             extra={
@@ -352,4 +561,159 @@ def my_action_release(action_id: str, auth: AuthState) -> ActionCallbackReturn:
                 "released_by": auth.effective_identity,
             },
         )
-        return action_status
+        return row_to_action_status(row)
+
+
+@aptb.action_enumerate
+def my_action_enumerate(
+    auth: AuthState, params: Dict[str, Set[Any]]
+) -> List[ActionStatus]:
+    """List the actions the caller holds any of the requested roles on.
+
+    The lookup is driven by the action_principals index rather than scanning
+    every action's monitor_by and manage_by lists.
+    """
+    statuses = [status.value for status in params["statuses"]]
+    logger.debug(
+        "Enumerating actions",
+        extra={"statuses": statuses, "roles": sorted(params["roles"])},
+    )
+    with get_storage().session() as store:
+        rows = store.list(auth.principals, params["roles"], statuses)
+        return [row_to_action_status(row) for row in rows]
+
+
+def _batch_error(action_id: str, error: ActionProviderToolsException) -> Dict[str, Any]:
+    """Build the batch result for an action that could not be returned."""
+    return {
+        "action_id": action_id,
+        "status_code": error.code,
+        "error": {"code": error.name, "description": error.description},
+    }
+
+
+@aptb.route("/batch/status", methods=["POST"])
+def my_action_batch_status():
+    """Get the status of many actions in one request.
+
+    The body is ``{"action_ids": [...]}``. All actions are loaded with one
+    query and authorized with another, then answered independently: the
+    response holds one result per requested ID with either its ActionStatus
+    or the error the status endpoint would have returned for it.
+    """
+    auth: AuthState = g.auth_state
+    if not auth.check_authorization(
+        description.runnable_by,
+        allow_public=True,
+        allow_all_authenticated_users=True,
+    ):
+        raise UnauthorizedRequest
+
+    body = request.get_json(silent=True) or {}
+    action_ids = body.get("action_ids")
+    if (
+        not isinstance(action_ids, list)
+        or not action_ids
+        or not all(isinstance(action_id, str) for action_id in action_ids)
+    ):
+        raise BadActionRequest("action_ids must be a non-empty list of strings")
+    action_ids = list(dict.fromkeys(action_ids))
+    if len(action_ids) > get_config().BATCH_MAX_SIZE:
+        raise BadActionRequest(
+            f"At most {get_config().BATCH_MAX_SIZE} action_ids may be requested"
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Checking action statuses", extra={"count": len(action_ids)})
+    with get_storage().session() as store:
+        rows = {row.action_id: row for row in store.get_many(action_ids)}
+        principals = store.get_principals_for_actions(
+            rows, MONITOR_ROLES, auth.identities
+        )
+
+    results = []
+    hints = []
+    for action_id in action_ids:
+        row = rows.get(action_id)
+        if row is None:
+            results.append(
+                _batch_error(action_id, ActionNotFound(f"No action with {action_id}"))
+            )
+            continue
+        if not _holds_any(principals.get(action_id, set()), auth):
+            results.append(_batch_error(action_id, UnauthorizedRequest()))
+            continue
+
+        action_status = row_to_action_status(row)
+        if (
+            action_status.status == ActionStatusValue.ACTIVE
+            and not get_config().COMPLETION_SWEEPER_ENABLED
+        ):
+            action_status = _update_action_status(action_status, row.utc_offset)
+        _record_poll(row.status, row.start_time)
+        if action_status.status == ActionStatusValue.ACTIVE:
+            hints.append(retry_after(row.start_time))
+        results.append(
+            {"action_id": action_id, "status_code": 200, "action_status": action_status}
+        )
+
+    if hints:
+        g.retry_after = min(hints)
+    return jsonify({"results": results}), 200
+
+
+@aptb.route("/batch/run", methods=["POST"])
+def my_action_batch_run():
+    """Start many actions in one request.
+
+    The body is ``{"requests": [...]}`` holding up to BATCH_MAX_SIZE run
+    requests, each validated as for the run endpoint. The batch is rejected
+    as a whole if any request is invalid; otherwise all actions are inserted
+    in a single transaction and their ActionStatuses returned in order with
+    a 202.
+    """
+    auth: AuthState = g.auth_state
+    if not auth.check_authorization(
+        description.runnable_by,
+        allow_all_authenticated_users=True,
+    ):
+        raise UnauthorizedRequest
+
+    body = request.get_json(silent=True) or {}
+    run_requests = body.get("requests")
+    if not isinstance(run_requests, list) or not run_requests:
+        raise BadActionRequest("requests must be a non-empty list of run requests")
+    if len(run_requests) > get_config().BATCH_MAX_SIZE:
+        raise BadActionRequest(
+            f"At most {get_config().BATCH_MAX_SIZE} requests may be submitted"
+        )
+
+    action_requests = []
+    for index, request_json in enumerate(run_requests):
+        try:
+            action_requests.append(
+                validate_input(request_json, aptb.input_body_validator)
+            )
+        except BadActionRequest as err:
+            raise type(err)(f"requests[{index}]: {err.description}")
+
+    logger.info(
+        "Creating new actions",
+        extra={"creator_id": auth.effective_identity, "count": len(run_requests)},
+    )
+    current_utc = utc_now()
+    action_statuses = [
+        _new_action_status(action_request, auth, current_utc)
+        for action_request in action_requests
+    ]
+    with get_storage().session() as store:
+        store.create_many(
+            [
+                _action_status_record(action_status, request_json)
+                for action_status, request_json in zip(action_statuses, run_requests)
+            ],
+        )
+    logger.info("Actions created successfully", extra={"count": len(run_requests)})
+
+    g.retry_after = retry_after(current_utc)
+    return jsonify(action_statuses), 202
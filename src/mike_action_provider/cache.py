@@ -0,0 +1,163 @@
+"""Read-through cache for action statuses."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from mike_action_provider.config import get_config
+from mike_action_provider.db.crud import (
+    get_invalidation_version,
+    get_invalidations_since,
+)
+
+T = TypeVar("T")
+
+
+class ActionStatusCache:
+    """Bounded LRU cache with a TTL, invalidated through the database.
+
+    Before every lookup the cache reads the invalidation log entries written
+    since its last check and drops the listed actions, so writes made by any
+    worker sharing the database are observed on the next read.
+
+    Args:
+        maxsize: Maximum number of entries kept.
+        ttl: Seconds an entry may be served after it was loaded.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def lookup(
+        self, db: Session, action_id: str, loader: Callable[[], Optional[T]]
+    ) -> Optional[T]:
+        """Get an entry, loading it on a miss.
+
+        Args:
+            db: Database session used to read the invalidation log.
+            action_id: Unique identifier for the action.
+            loader: Called on a miss to load the value. None results are not
+                cached.
+
+        Returns:
+            Optional[T]: The cached or freshly loaded value.
+        """
+        # Sync before loading so a change committed while we load is still
+        # seen on the next lookup.
+        synced_version = self._sync(db)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(action_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(action_id)
+                    self._counters["hits"] += 1
+                    return entry[1]
+                del self._entries[action_id]
+                self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if self._version != synced_version:
+                    # Another lookup applied newer invalidations while we were
+                    # loading, which may have been meant for this value.
+                    return value
+                self._entries[action_id] = (now + self.ttl, value)
+                self._entries.move_to_end(action_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+        return value
+
+    def invalidate(self, action_id: str) -> None:
+        """Drop the cached entry for an action, if any.
+
+        Args:
+            action_id: Unique identifier for the action.
+        """
+        with self._lock:
+            if self._entries.pop(action_id, None) is not None:
+                self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters.
+
+        Returns:
+            Dict[str, int]: Hit, miss, eviction, expiration and invalidation
+                counts along with the current and maximum size.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _sync(self, db: Session) -> int:
+        """Apply invalidation log entries written since the last sync.
+
+        Returns:
+            int: The log version the cache is synced to.
+        """
+        with self._lock:
+            since = self._version
+        if since is None:
+            # Nothing can be cached yet, so start from the current position.
+            latest = get_invalidation_version(db)
+            with self._lock:
+                if self._version is None:
+                    self._version = latest
+                return self._version
+
+        changes = get_invalidations_since(db, since)
+        with self._lock:
+            for version, action_id in changes:
+                if self._entries.pop(action_id, None) is not None:
+                    self._counters["invalidations"] += 1
+                self._version = max(self._version, version)
+            return self._version
+
+
+_status_cache: Optional[ActionStatusCache] = None
+_status_cache_lock = threading.Lock()
+
+
+def get_status_cache() -> Optional[ActionStatusCache]:
+    """Get the process-wide action status cache.
+
+    Returns:
+        Optional[ActionStatusCache]: The cache, or None when it is disabled.
+    """
+    global _status_cache
+    config = get_config()
+    if not config.STATUS_CACHE_ENABLED:
+        return None
+    if _status_cache is None:
+        with _status_cache_lock:
+            if _status_cache is None:
+                _status_cache = ActionStatusCache(
+                    maxsize=config.STATUS_CACHE_SIZE, ttl=config.STATUS_CACHE_TTL
+                )
+    return _status_cache
@@ -25,9 +25,79 @@ class Config:
     SQL_ECHO: bool = field(
         default_factory=lambda: os.getenv("SQL_ECHO", "false") in TRUE_VALUES
     )
+    # Log the number of SQL statements and the DB time of every request.
+    SQL_PROFILING: bool = field(
+        default_factory=lambda: os.getenv("SQL_PROFILING", "false") in TRUE_VALUES
+    )
+    # Maximum SQL statements per request for endpoints, as "endpoint=count"
+    # entries separated by ";". Requests over budget are logged as warnings.
+    SQL_QUERY_BUDGETS: str = field(
+        default_factory=lambda: os.getenv("SQL_QUERY_BUDGETS", "")
+    )
+    # Where action statuses are stored, see storage.STORAGE_BACKENDS: "sqlite"
+    # or "memory" for a single process that keeps them only while it runs.
+    STORAGE_BACKEND: str = field(
+        default_factory=lambda: os.getenv("STORAGE_BACKEND", "sqlite")
+    )
+    # Number of independently locked partitions of the memory backend.
+    STORAGE_MEMORY_STRIPES: int = field(
+        default_factory=lambda: int(os.getenv("STORAGE_MEMORY_STRIPES", "64"))
+    )
     DB_PATH: Path = field(
         default_factory=lambda: Path(os.getenv("DB_PATH", "./data/actions.db"))
     )
+    # Storage profile applied to every SQLite connection, see
+    # db.connection.STORAGE_PROFILES. Use "concurrent" for multi-worker deployments.
+    DB_PROFILE: str = field(default_factory=lambda: os.getenv("DB_PROFILE", "default"))
+    # Seconds a connection waits on a locked database before giving up.
+    DB_BUSY_TIMEOUT: float = field(
+        default_factory=lambda: float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+    )
+    # Number of pooled connections kept per process by the "concurrent" profile.
+    DB_POOL_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("DB_POOL_SIZE", "8"))
+    )
+    # Group commit: batch writes from concurrent requests into one transaction.
+    DB_GROUP_COMMIT: bool = field(
+        default_factory=lambda: os.getenv("DB_GROUP_COMMIT", "false") in TRUE_VALUES
+    )
+    # Milliseconds the writer waits for more writes before committing a batch.
+    DB_GROUP_COMMIT_INTERVAL_MS: float = field(
+        default_factory=lambda: float(os.getenv("DB_GROUP_COMMIT_INTERVAL_MS", "2"))
+    )
+    # Maximum number of writes committed in a single transaction.
+    DB_GROUP_COMMIT_MAX_BATCH: int = field(
+        default_factory=lambda: int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "256"))
+    )
+    # Read-through cache for action statuses served by the status endpoint.
+    STATUS_CACHE_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("STATUS_CACHE_ENABLED", "false")
+        in TRUE_VALUES
+    )
+    # Maximum number of cached action statuses per process.
+    STATUS_CACHE_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("STATUS_CACHE_SIZE", "10000"))
+    )
+    # Seconds a cached action status may be served before it is reloaded.
+    STATUS_CACHE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("STATUS_CACHE_TTL", "30"))
+    )
+    # Provider-level cache of token introspections and group lookups.
+    AUTH_CACHE_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("AUTH_CACHE_ENABLED", "false") in TRUE_VALUES
+    )
+    # Maximum number of cached tokens per process.
+    AUTH_CACHE_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    )
+    # Maximum seconds a token introspection is served, capped by its expiry.
+    AUTH_CACHE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("AUTH_CACHE_TTL", "300"))
+    )
+    # Seconds the introspection of an inactive token is served.
+    AUTH_CACHE_NEGATIVE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "30"))
+    )
     # Logging configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
     ENABLE_FILE_LOGGING: bool = field(
@@ -40,11 +110,155 @@ class Config:
             else None
         )
     )
+    # Hand log records to a background thread that formats and writes them in
+    # batches, so that requests never wait on log I/O.
+    LOG_QUEUE_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("LOG_QUEUE_ENABLED", "false") in TRUE_VALUES
+    )
+    # Records waiting for the log writer; records logged while it is full are
+    # dropped and counted.
+    LOG_QUEUE_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    )
+    # Maximum number of records written at once.
+    LOG_QUEUE_MAX_BATCH: int = field(
+        default_factory=lambda: int(os.getenv("LOG_QUEUE_MAX_BATCH", "256"))
+    )
+    # Fraction of records to keep per logger or per logger and message, as
+    # "logger=rate" or "logger:message=rate" entries separated by ";".
+    # Warnings and errors are never sampled.
+    LOG_SAMPLING: str = field(default_factory=lambda: os.getenv("LOG_SAMPLING", ""))
+    # Maximum debug and info records per action_id in each
+    # LOG_ACTION_RATE_WINDOW, 0 for no limit.
+    LOG_ACTION_RATE_LIMIT: int = field(
+        default_factory=lambda: int(os.getenv("LOG_ACTION_RATE_LIMIT", "0"))
+    )
+    # Seconds over which LOG_ACTION_RATE_LIMIT applies.
+    LOG_ACTION_RATE_WINDOW: float = field(
+        default_factory=lambda: float(os.getenv("LOG_ACTION_RATE_WINDOW", "60"))
+    )
+    # Record request, query and session metrics and serve them at /metrics.
+    METRICS_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("METRICS_ENABLED", "false") in TRUE_VALUES
+    )
+    # Directory shared by all worker processes, where each writes a snapshot
+    # of its metrics for /metrics to aggregate. Empty for a single process;
+    # manage.py serve creates one for several workers when it is empty.
+    METRICS_DIR: str = field(default_factory=lambda: os.getenv("METRICS_DIR", ""))
+    # Seconds between metrics snapshots written to METRICS_DIR.
+    METRICS_FLUSH_INTERVAL: float = field(
+        default_factory=lambda: float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    )
     # Maximum time in seconds before an action is considered complete.
     # This is used to demonstrate how Flows will poll the action provider.
     MAX_SLEEP_TIME: int = field(
         default_factory=lambda: int(os.getenv("MAX_SLEEP_TIME", "120"))
     )
+    # Complete expired actions from a background sweeper instead of lazily
+    # when they are polled.
+    COMPLETION_SWEEPER_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("COMPLETION_SWEEPER_ENABLED", "false")
+        in TRUE_VALUES
+    )
+    # Seconds between completion sweeps.
+    COMPLETION_SWEEP_INTERVAL: float = field(
+        default_factory=lambda: float(os.getenv("COMPLETION_SWEEP_INTERVAL", "5"))
+    )
+    # Seconds the sweeper lease is held without being renewed.
+    COMPLETION_SWEEP_LEASE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("COMPLETION_SWEEP_LEASE_TTL", "30"))
+    )
+    # Delete released actions and completed actions past their release_after
+    # from a background task.
+    RETENTION_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("RETENTION_ENABLED", "false") in TRUE_VALUES
+    )
+    # Seconds between retention purges.
+    RETENTION_INTERVAL: float = field(
+        default_factory=lambda: float(os.getenv("RETENTION_INTERVAL", "300"))
+    )
+    # Seconds the retention lease is held without being renewed. Must be
+    # longer than a whole purge.
+    RETENTION_LEASE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("RETENTION_LEASE_TTL", "120"))
+    )
+    # Actions deleted per transaction.
+    RETENTION_BATCH_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+    )
+    # Seconds to wait between batches, leaving the write lock to requests.
+    RETENTION_BATCH_PAUSE: float = field(
+        default_factory=lambda: float(os.getenv("RETENTION_BATCH_PAUSE", "0.1"))
+    )
+    # Maximum batches per purge, 0 for no limit.
+    RETENTION_MAX_BATCHES: int = field(
+        default_factory=lambda: int(os.getenv("RETENTION_MAX_BATCHES", "100"))
+    )
+    # Free database pages returned to the file system after each retention
+    # or archive batch.
+    RETENTION_VACUUM_PAGES: int = field(
+        default_factory=lambda: int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+    )
+    # Move completed actions out of the database into compressed segment
+    # files from a background task.
+    ARCHIVE_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("ARCHIVE_ENABLED", "false") in TRUE_VALUES
+    )
+    # Directory holding the archive segment files.
+    ARCHIVE_DIR: Path = field(
+        default_factory=lambda: Path(os.getenv("ARCHIVE_DIR", "./data/archive"))
+    )
+    # Seconds after their completion at which actions are archived.
+    ARCHIVE_AFTER: float = field(
+        default_factory=lambda: float(os.getenv("ARCHIVE_AFTER", "86400"))
+    )
+    # Seconds between archive runs.
+    ARCHIVE_INTERVAL: float = field(
+        default_factory=lambda: float(os.getenv("ARCHIVE_INTERVAL", "300"))
+    )
+    # Seconds the archiver lease is held without being renewed. Must be longer
+    # than a whole archive run.
+    ARCHIVE_LEASE_TTL: float = field(
+        default_factory=lambda: float(os.getenv("ARCHIVE_LEASE_TTL", "120"))
+    )
+    # Actions archived per transaction and compressed member.
+    ARCHIVE_BATCH_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    )
+    # Seconds to wait between batches, leaving the write lock to requests.
+    ARCHIVE_BATCH_PAUSE: float = field(
+        default_factory=lambda: float(os.getenv("ARCHIVE_BATCH_PAUSE", "0.1"))
+    )
+    # Maximum batches per archive run, 0 for no limit.
+    ARCHIVE_MAX_BATCHES: int = field(
+        default_factory=lambda: int(os.getenv("ARCHIVE_MAX_BATCHES", "100"))
+    )
+    # Bytes after which a new segment file is started.
+    ARCHIVE_SEGMENT_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("ARCHIVE_SEGMENT_SIZE", str(64 << 20)))
+    )
+    # Address manage.py serve listens on, as HOST:PORT.
+    SERVER_BIND: str = field(
+        default_factory=lambda: os.getenv("SERVER_BIND", "127.0.0.1:8000")
+    )
+    # Worker processes started by manage.py serve. Use 1 with the memory
+    # storage backend.
+    SERVER_WORKERS: int = field(
+        default_factory=lambda: int(os.getenv("SERVER_WORKERS", "2"))
+    )
+    # Request threads per worker process. Keep DB_POOL_SIZE at least as large
+    # with the "concurrent" profile, or threads wait for a connection.
+    SERVER_THREADS: int = field(
+        default_factory=lambda: int(os.getenv("SERVER_THREADS", "8"))
+    )
+    # Seconds a worker may take to answer before it is restarted.
+    SERVER_TIMEOUT: int = field(
+        default_factory=lambda: int(os.getenv("SERVER_TIMEOUT", "30"))
+    )
+    # Maximum number of actions accepted by a single batch request.
+    BATCH_MAX_SIZE: int = field(
+        default_factory=lambda: int(os.getenv("BATCH_MAX_SIZE", "1000"))
+    )
 
 
 @lru_cache(maxsize=1, typed=True)
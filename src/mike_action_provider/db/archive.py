@@ -0,0 +1,149 @@
+"""Append-only compressed segment files holding archived action statuses.
+
+Each archive batch is appended to the current segment as one gzip member of
+JSON lines, so a segment reads as a plain ``.jsonl.gz`` file with ``zcat``
+while a single record can be loaded by decompressing only its own member.
+The ``archived_actions`` table maps every archived action to the segment,
+offset and length of its member and its line within it.
+"""
+
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_config
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+# (segment, offset, length, line) of an archived record
+Location = Tuple[str, int, int, int]
+
+
+class SegmentArchive:
+    """Writer and reader of the archive segment files.
+
+    Only one process may append at a time; the archiver holds a lease for
+    that. Any process may read.
+
+    Args:
+        directory: Directory holding the segment files.
+        segment_size: Bytes after which appends go to a new segment.
+        cache_size: Number of decompressed members kept for repeated reads.
+    """
+
+    def __init__(self, directory: Path, segment_size: int, cache_size: int = 32):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.cache_size = cache_size
+        self._members: "OrderedDict[Tuple[str, int], List[bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def segments(self) -> List[str]:
+        """Get the names of the existing segments, oldest first."""
+        if not self.directory.exists():
+            return []
+        return sorted(
+            path.name
+            for path in self.directory.iterdir()
+            if path.name.startswith(SEGMENT_PREFIX)
+            and path.name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def append(self, records: List[Dict[str, Any]]) -> List[Location]:
+        """Append records to the current segment as one compressed member.
+
+        The member is flushed to disk before returning, so the records can be
+        deleted from the database once their locations are committed.
+
+        Args:
+            records: JSON serializable records.
+
+        Returns:
+            List[Location]: Where each record was written, in order.
+        """
+        lines = [
+            json.dumps(record, separators=(",", ":"), default=str) for record in records
+        ]
+        member = gzip.compress(("\n".join(lines) + "\n").encode())
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segment = self._current_segment()
+        with open(self.directory / segment, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+        return [(segment, offset, len(member), line) for line in range(len(lines))]
+
+    def read(self, location: Location) -> Dict[str, Any]:
+        """Read an archived record.
+
+        Args:
+            location: Where the record was written.
+
+        Returns:
+            Dict[str, Any]: The record.
+        """
+        segment, offset, length, line = location
+        key = (segment, offset)
+        with self._lock:
+            lines = self._members.get(key)
+            if lines is not None:
+                self._members.move_to_end(key)
+        if lines is None:
+            with open(self.directory / segment, "rb") as f:
+                f.seek(offset)
+                lines = gzip.decompress(f.read(length)).splitlines()
+            with self._lock:
+                self._members[key] = lines
+                while len(self._members) > self.cache_size:
+                    self._members.popitem(last=False)
+        return json.loads(lines[line])
+
+    def remove_segment(self, segment: str) -> None:
+        """Delete a segment file no archived action refers to anymore.
+
+        Args:
+            segment: Name of the segment.
+        """
+        with self._lock:
+            for key in [key for key in self._members if key[0] == segment]:
+                del self._members[key]
+        (self.directory / segment).unlink(missing_ok=True)
+
+    def _current_segment(self) -> str:
+        segments = self.segments()
+        if segments:
+            latest = segments[-1]
+            if (self.directory / latest).stat().st_size < self.segment_size:
+                return latest
+            number = int(latest[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]) + 1
+        else:
+            number = 1
+        return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+_archive: Optional[SegmentArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> SegmentArchive:
+    """Get the process-wide segment archive.
+
+    Returns:
+        SegmentArchive: The archive in ARCHIVE_DIR.
+    """
+    global _archive
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                config = get_config()
+                _archive = SegmentArchive(
+                    config.ARCHIVE_DIR, segment_size=config.ARCHIVE_SEGMENT_SIZE
+                )
+    return _archive
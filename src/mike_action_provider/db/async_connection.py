@@ -0,0 +1,104 @@
+"""Async database connection and session management for the ASGI app.
+
+The async engine uses the aiosqlite driver over the same database file,
+storage profile and PRAGMA settings as the engine in ``connection``. It needs
+the optional ``async`` dependencies.
+"""
+
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from ..config import get_config
+from .connection import apply_pragmas, get_profile_pragmas
+
+
+def build_async_engine(
+    db_path: Path,
+    profile: str = "default",
+    echo: bool = False,
+    busy_timeout: float = 5.0,
+    pool_size: int = 8,
+) -> AsyncEngine:
+    """Build an async SQLAlchemy engine for a SQLite database.
+
+    Connections wait for the pool without blocking the event loop, so unlike
+    the sync engine the pool timeout is left at its default rather than
+    DB_BUSY_TIMEOUT: thousands of concurrent requests may queue for it.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        profile: Name of the storage profile in STORAGE_PROFILES.
+        echo: Whether to log all emitted SQL.
+        busy_timeout: Seconds to wait on a locked database before failing.
+        pool_size: Number of pooled connections for non-default profiles.
+
+    Returns:
+        AsyncEngine: Async SQLAlchemy engine instance.
+
+    Raises:
+        ValueError: If the profile is not known.
+    """
+    pragmas = get_profile_pragmas(profile)
+
+    engine_options: Dict[str, Any] = {}
+    if pragmas:
+        engine_options.update(pool_size=pool_size, max_overflow=0)
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        echo=echo,
+        connect_args={"timeout": busy_timeout},
+        **engine_options,
+    )
+    apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    """Get the process-wide async engine for the configured database.
+
+    Returns:
+        AsyncEngine: Async SQLAlchemy engine instance configured for SQLite.
+    """
+    config = get_config()
+    db_path = config.DB_PATH
+    db_path.parent.mkdir(exist_ok=True)
+    return build_async_engine(
+        db_path,
+        profile=config.DB_PROFILE,
+        echo=config.SQL_ECHO,
+        busy_timeout=config.DB_BUSY_TIMEOUT,
+        pool_size=config.DB_POOL_SIZE,
+    )
+
+
+@lru_cache(maxsize=1)
+def _async_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(autoflush=False, bind=get_async_engine())
+
+
+@asynccontextmanager
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session.
+
+    Example:
+        ```python
+        async with get_async_db() as db:
+            row = await get_action_status_row(db, action_id)
+        ```
+    """
+    async with _async_session_factory()() as db:
+        yield db
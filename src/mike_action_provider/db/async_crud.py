@@ -0,0 +1,113 @@
+"""Async CRUD operations for action statuses.
+
+Each function runs its counterpart in ``crud`` through
+``AsyncSession.run_sync``, so the queries, conditional updates and
+invalidation records are shared with the sync app while every statement is
+awaited on the aiosqlite driver. Writes always commit on the async session
+and never go through the group-commit writer.
+"""
+
+from typing import Any, Iterable, Optional, Set
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mike_action_provider.db import crud
+
+
+async def create_action_status(db: AsyncSession, **kwargs: Any) -> None:
+    """Create a new action status record.
+
+    Args:
+        db: Async database session
+        **kwargs: Keyword arguments of crud.create_action_status
+    """
+    await db.run_sync(lambda session: crud.create_action_status(session, **kwargs))
+
+
+async def get_action_status_row(db: AsyncSession, action_id: str) -> Optional[Row]:
+    """Get the columns of an action status without building an ORM object.
+
+    Args:
+        db: Async database session
+        action_id: Unique identifier for the action
+
+    Returns:
+        Optional[Row]: STATUS_COLUMNS of the action, or None if not found
+    """
+    return await db.run_sync(crud.get_action_status_row, action_id)
+
+
+async def get_action_status_version(db: AsyncSession, action_id: str) -> Optional[Row]:
+    """Get the version, status and start time of an action.
+
+    Args:
+        db: Async database session
+        action_id: Unique identifier for the action
+
+    Returns:
+        Optional[Row]: The version, status and start_time, or None if not found
+    """
+    return await db.run_sync(crud.get_action_status_version, action_id)
+
+
+async def get_authorizing_principals(
+    db: AsyncSession, action_id: str, roles: Iterable[str], identities: Iterable[str]
+) -> Set[str]:
+    """Get the principals that may grant access to an action.
+
+    Args:
+        db: Async database session
+        action_id: Unique identifier for the action
+        roles: Roles granting the requested access, e.g. MONITOR_ROLES
+        identities: Identity principals of the caller
+
+    Returns:
+        Set[str]: Matching identity principals and all group principals
+    """
+    return await db.run_sync(
+        crud.get_authorizing_principals, action_id, roles, identities
+    )
+
+
+async def restore_archived_action(
+    db: AsyncSession, action_id: str, statuses: Iterable[str]
+) -> bool:
+    """Move an archived action back into the database to change it.
+
+    Args:
+        db: Async database session
+        action_id: Unique identifier for the action
+        statuses: Statuses the action must be in to be restored
+
+    Returns:
+        bool: True if the action was restored
+    """
+    return await db.run_sync(
+        lambda session: crud.restore_archived_action(session, action_id, statuses)
+    )
+
+
+async def transition_action_status(
+    db: AsyncSession,
+    action_id: str,
+    from_statuses: Iterable[str],
+    **values: Any,
+) -> Optional[Row]:
+    """Update an action only if it is currently in one of the given statuses.
+
+    Args:
+        db: Async database session
+        action_id: Unique identifier for the action
+        from_statuses: Statuses the action must be in for the update to apply
+        **values: Fields to update and their new values
+
+    Returns:
+        Optional[Row]: STATUS_COLUMNS of the updated action, or None if the
+            action does not exist, is released or is in another status
+    """
+    return await db.run_sync(
+        lambda session: crud.transition_action_status(
+            session, action_id, from_statuses, **values
+        )
+    )
@@ -1,39 +1,210 @@
 """Database connection and session management."""
 
+import os
 from contextlib import contextmanager
-from typing import Generator
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 from ..config import get_config
-from .models import Base
+from ..metrics import instrument_engine, record_session
+from ..profiling import profile_engine
+from .migrations import LATEST_VERSION, migrate, set_schema_version
+from .models import ActionStatus, Base
 
+# PRAGMA settings applied to each new SQLite connection, keyed by profile name.
+STORAGE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # SQLite defaults: rollback journal and a full fsync on every commit.
+    "default": {},
+    # WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    # only fsyncs at checkpoints, which is still durable across process crashes.
+    "concurrent": {
+        # Only takes effect on new databases, and must precede journal_mode.
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # Negative values are in KiB
+        "temp_store": "MEMORY",
+    },
+}
 
-def get_engine():
-    """Get SQLAlchemy engine instance.
+
+def get_profile_pragmas(profile: str) -> Dict[str, Any]:
+    """Get the PRAGMA settings of a storage profile.
+
+    Args:
+        profile: Name of the storage profile in STORAGE_PROFILES.
 
     Returns:
-        Engine: SQLAlchemy engine instance configured for SQLite.
+        Dict[str, Any]: PRAGMA names and values.
+
+    Raises:
+        ValueError: If the profile is not known.
     """
-    db_path = get_config().DB_PATH
-    db_path.parent.mkdir(exist_ok=True)
-    return create_engine(
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile {profile!r}, "
+            f"expected one of {sorted(STORAGE_PROFILES)}"
+        )
+    return STORAGE_PROFILES[profile]
+
+
+def apply_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Apply PRAGMA settings to every new connection of an engine.
+
+    Args:
+        engine: The engine, or the ``sync_engine`` of an async engine.
+        pragmas: PRAGMA names and values.
+    """
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def build_engine(
+    db_path: Path,
+    profile: str = "default",
+    echo: bool = False,
+    busy_timeout: float = 5.0,
+    pool_size: int = 8,
+    pooled: bool = True,
+) -> Engine:
+    """Build a SQLAlchemy engine for a SQLite database using a storage profile.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        profile: Name of the storage profile in STORAGE_PROFILES.
+        echo: Whether to log all emitted SQL.
+        busy_timeout: Seconds to wait on a locked database before failing.
+        pool_size: Number of pooled connections for non-default profiles.
+        pooled: Whether connections are pooled. Unpooled engines open a new
+            connection on every checkout and close it when it is returned.
+
+    Returns:
+        Engine: SQLAlchemy engine instance.
+
+    Raises:
+        ValueError: If the profile is not known.
+    """
+    pragmas = get_profile_pragmas(profile)
+
+    engine_options: Dict[str, Any] = {}
+    if not pooled:
+        engine_options.update(poolclass=NullPool)
+    elif pragmas:
+        engine_options.update(
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_timeout=busy_timeout,
+        )
+
+    engine = create_engine(
         f"sqlite:///{db_path}",
-        echo=get_config().SQL_ECHO,
+        echo=echo,
+        connect_args={"timeout": busy_timeout},
+        **engine_options,
+    )
+    apply_pragmas(engine, pragmas)
+    return engine
+
+
+def _configured_engine(pooled: bool) -> Engine:
+    """Build an engine for the configured database, profile and instrumentation."""
+    config = get_config()
+    db_path = config.DB_PATH
+    db_path.parent.mkdir(exist_ok=True)
+    engine = build_engine(
+        db_path,
+        profile=config.DB_PROFILE,
+        echo=config.SQL_ECHO,
+        busy_timeout=config.DB_BUSY_TIMEOUT,
+        pool_size=config.DB_POOL_SIZE,
+        pooled=pooled,
     )
+    if config.METRICS_ENABLED:
+        instrument_engine(engine)
+    if config.SQL_PROFILING:
+        profile_engine(engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Get SQLAlchemy engine instance.
+
+    The engine is created once per process so that its connection pool and
+    storage profile are shared by every session.
+
+    Returns:
+        Engine: SQLAlchemy engine instance configured for SQLite.
+    """
+    return _configured_engine(pooled=True)
+
+
+def build_unpooled_engine() -> Engine:
+    """Build an engine for the configured database that does not pool.
+
+    Connections of this engine never wait on, nor take a slot of, the pool
+    of get_engine().
+
+    Returns:
+        Engine: SQLAlchemy engine instance configured for SQLite.
+    """
+    return _configured_engine(pooled=False)
 
 
 def init_db() -> None:
-    """Initialize the database by creating all tables."""
+    """Initialize the database by creating all tables.
+
+    A new database is created from the models, with incremental vacuum
+    enabled, and marked as being at the latest schema version. An existing
+    database is migrated in place instead.
+    """
     engine = get_engine()
+    db_path = Path(engine.url.database)
+    if inspect(engine).has_table(ActionStatus.__tablename__):
+        migrate(db_path)
+        return
+
+    # auto_vacuum can only be changed cheaply before any table exists.
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
     Base.metadata.create_all(engine)
+    set_schema_version(db_path, LATEST_VERSION)
 
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
 
+def _dispose_in_child() -> None:
+    """Start a forked worker with an empty connection pool.
+
+    Pooled SQLite connections must not be used by two processes. The pool
+    inherited from the parent is replaced without closing its connections,
+    which the parent may still use, and new ones are opened on demand.
+    """
+    get_engine().dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_in_child)
+
+
 @contextmanager
 def get_db() -> Generator[Session, None, None]:
     """Get database session.
@@ -47,8 +218,13 @@ def get_db() -> Generator[Session, None, None]:
             result = db.query(ActionStatus).first()
         ```
     """
+    metrics_enabled = get_config().METRICS_ENABLED
     db = SessionLocal()
+    if metrics_enabled:
+        record_session(opened=True)
     try:
         yield db
     finally:
         db.close()
+        if metrics_enabled:
+            record_session(opened=False)
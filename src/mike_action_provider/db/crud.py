@@ -1,13 +1,102 @@
 """CRUD operations for the action provider database."""
 
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Row,
+    Select,
+    Update,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from mike_action_provider.db.models import ActionStatus
+from mike_action_provider.config import get_config
+from mike_action_provider.db.archive import Location, get_archive
+from mike_action_provider.db.models import (
+    ActionInvalidation,
+    ActionPrincipal,
+    ActionStatus,
+    ArchivedAction,
+    ArchivedPrincipal,
+    Lease,
+    RequestPayload,
+)
+from mike_action_provider.db.payloads import (
+    EncodedPayload,
+    decode_request,
+    encode_request,
+    request_utc_offset,
+)
+from mike_action_provider.db.connection import get_engine
+from mike_action_provider.db.write_queue import GroupCommitWriter, get_writer
+from mike_action_provider.hydration import parse_release_after
+from mike_action_provider.logging import get_logger
 from mike_action_provider.utils import utc_now
 
+logger = get_logger(__name__)
+
+# Principal roles allowed to view and to manage an action respectively.
+MONITOR_ROLES = ("creator_id", "monitor_by")
+MANAGE_ROLES = ("creator_id", "manage_by")
+
+GROUP_PRINCIPAL_PREFIX = "urn:globus:groups:id:"
+
+# Action statuses from which an action can still change, and terminal ones.
+INCOMPLETE_STATUSES = ("ACTIVE", "INACTIVE")
+COMPLETE_STATUSES = ("SUCCEEDED", "FAILED")
+
+# Columns needed to build an API ActionStatus, see hydration.row_to_action_status.
+STATUS_COLUMNS = (
+    ActionStatus.action_id,
+    ActionStatus.status,
+    ActionStatus.creator_id,
+    ActionStatus.label,
+    ActionStatus.monitor_by,
+    ActionStatus.manage_by,
+    ActionStatus.start_time,
+    ActionStatus.completion_time,
+    ActionStatus.release_after,
+    ActionStatus.display_status,
+    ActionStatus.details,
+    ActionStatus.version,
+    ActionStatus.utc_offset,
+)
+
+# Columns of an action kept in its archive record, along with its run request
+# as ``request_json``. Archived actions are never released, so is_released is
+# left out, and utc_offset is read from the request.
+ARCHIVE_COLUMNS = tuple(
+    column for column in STATUS_COLUMNS if column is not ActionStatus.utc_offset
+)
+
+_ARCHIVE_DATETIME_COLUMNS = ("start_time", "completion_time")
+
+
+def _writer_for(db: Session) -> Optional[GroupCommitWriter]:
+    """Get the group-commit writer if it should apply writes made through ``db``.
+
+    Only sessions of the process-wide sync engine hand their writes to the
+    writer. Async sessions run these functions on the event loop, where
+    waiting on the writer thread would block every other request, so they
+    commit on their own connection instead.
+    """
+    writer = get_writer()
+    if writer is None or db.get_bind() is not get_engine():
+        return None
+    return writer
+
 
 def create_action_status(
     db: Session,
@@ -20,10 +109,13 @@ def create_action_status(
     display_status: str,
     request_json: Dict[str, Any],
     label: Optional[str] = None,
-    details: str = "{}",
+    details: Optional[Dict[str, Any]] = None,
 ) -> ActionStatus:
     """Create a new action status record.
 
+    When group commit is enabled the record is written by the group-commit
+    writer and ``db`` is not used.
+
     Args:
         db: Database session
         action_id: Unique identifier for the action
@@ -33,13 +125,15 @@ def create_action_status(
         manage_by: Comma-separated list of identities that can manage
         release_after: ISO 8601 duration string for release timing
         display_status: Human-readable status message
-        request_json: The original JSON request that created this action
+        request_json: The original JSON request that created this action. It
+            is stored once per distinct content, see db.payloads.
         label: Optional label for the action
-        details: JSON string containing additional details
+        details: Additional details, empty by default
 
     Returns:
         ActionStatus: The created action status record
     """
+    encoded = encode_request(request_json)
     db_action = ActionStatus(
         action_id=action_id,
         status=status,
@@ -50,15 +144,146 @@ def create_action_status(
         start_time=utc_now(),
         release_after=release_after,
         display_status=display_status,
-        details=details,
-        request_json=request_json,
+        details={} if details is None else details,
+        request_id=encoded.request_id,
+        utc_offset=encoded.utc_offset,
     )
-    db.add(db_action)
+    principals = _principal_rows(action_id, creator_id, monitor_by, manage_by)
+    writer = _writer_for(db)
+    if writer is not None:
+        return writer.submit(
+            lambda session: _add(session, db_action, principals, encoded)
+        )
+
+    _add(db, db_action, principals, encoded)
     db.commit()
     db.refresh(db_action)
     return db_action
 
 
+def create_action_statuses(db: Session, actions: List[Dict[str, Any]]) -> None:
+    """Create many action status records in one transaction.
+
+    Records and their principals are inserted with one executemany each and
+    committed together, so either all actions are created or none are. When
+    group commit is enabled the records are written by the group-commit
+    writer and ``db`` is not used.
+
+    Args:
+        db: Database session
+        actions: Keyword arguments of create_action_status, except ``db``,
+            for each action
+    """
+    now = utc_now()
+    rows = []
+    payloads = []
+    for action in actions:
+        row = {"label": None, "details": {}, **action, "start_time": now}
+        encoded = encode_request(row.pop("request_json"))
+        row.update(request_id=encoded.request_id, utc_offset=encoded.utc_offset)
+        rows.append(row)
+        payloads.append(encoded)
+    principals = [
+        principal
+        for action in actions
+        for principal in _principal_rows(
+            action["action_id"],
+            action["creator_id"],
+            action["monitor_by"],
+            action["manage_by"],
+        )
+    ]
+    writer = _writer_for(db)
+    if writer is not None:
+        writer.submit(lambda session: _insert_many(session, rows, principals, payloads))
+        return
+
+    _insert_many(db, rows, principals, payloads)
+    db.commit()
+
+
+def _insert_many(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    principals: List[Dict[str, str]],
+    payloads: List[EncodedPayload],
+) -> None:
+    """Insert records, their payloads and principals without committing them."""
+    payload_ids = _store_payloads(db, payloads)
+    for row, encoded in zip(rows, payloads):
+        row["request_payload_id"] = payload_ids[encoded.digest]
+    db.execute(insert(ActionStatus), rows)
+    db.execute(insert(ActionPrincipal), principals)
+
+
+def _add(
+    db: Session,
+    db_action: ActionStatus,
+    principals: List[Dict[str, str]],
+    encoded: EncodedPayload,
+) -> ActionStatus:
+    """Add a record, its payload and principals to a session without committing."""
+    db_action.request_payload_id = _store_payloads(db, [encoded])[encoded.digest]
+    db.add(db_action)
+    db.add_all(ActionPrincipal(**principal) for principal in principals)
+    return db_action
+
+
+def _store_payloads(db: Session, payloads: List[EncodedPayload]) -> Dict[bytes, int]:
+    """Store request payloads that are not stored yet.
+
+    A single upsert inserts new payloads and returns the IDs of both new and
+    existing ones.
+
+    Args:
+        db: Database session
+        payloads: Encoded requests, possibly repeating the same content
+
+    Returns:
+        Dict[bytes, int]: Payload IDs by digest
+    """
+    unique = {encoded.digest: encoded.payload for encoded in payloads}
+    stmt = sqlite_insert(RequestPayload).values(
+        [{"digest": digest, "payload": payload} for digest, payload in unique.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RequestPayload.digest],
+        # A no-op update, so that RETURNING also covers existing payloads.
+        set_={"digest": stmt.excluded.digest},
+    ).returning(RequestPayload.digest, RequestPayload.id)
+    return {digest: payload_id for digest, payload_id in db.execute(stmt)}
+
+
+def _delete_unreferenced_payloads(db: Session, payload_ids: Iterable[int]) -> None:
+    """Delete payloads among the given ones that no action refers to anymore."""
+    payload_ids = list({payload_id for payload_id in payload_ids if payload_id})
+    if not payload_ids:
+        return
+    referenced = (
+        select(ActionStatus.request_payload_id)
+        .where(ActionStatus.request_payload_id == RequestPayload.id)
+        .exists()
+    )
+    db.execute(
+        delete(RequestPayload).where(RequestPayload.id.in_(payload_ids), ~referenced)
+    )
+
+
+def _principal_rows(
+    action_id: str, creator_id: str, monitor_by: str, manage_by: str
+) -> List[Dict[str, str]]:
+    """Build the principal rows for an action from its comma-joined lists."""
+    rows = {("creator_id", creator_id)}
+    for role, principals in (("monitor_by", monitor_by), ("manage_by", manage_by)):
+        rows.update(
+            (role, principal) for principal in principals.split(",") if principal
+        )
+    return [
+        {"action_id": action_id, "role": role, "principal": principal}
+        for role, principal in sorted(rows)
+    ]
+
+
 def get_action_status(db: Session, action_id: str) -> Optional[ActionStatus]:
     """Get an action status record by ID.
 
@@ -77,6 +302,93 @@ def get_action_status(db: Session, action_id: str) -> Optional[ActionStatus]:
     return db.scalar(stmt)
 
 
+# Built once, since constructing the statement costs more than running it.
+_STATUS_ROW_QUERY = select(*STATUS_COLUMNS).where(
+    ActionStatus.action_id == bindparam("action_id"),
+    ActionStatus.is_released == False,
+)
+
+
+def get_action_status_row(db: Session, action_id: str) -> Optional[Row]:
+    """Get the STATUS_COLUMNS of an action status record by ID.
+
+    Only the listed columns are selected and no ORM object is built, which
+    makes this the cheaper choice for read paths.
+
+    Args:
+        db: Database session
+        action_id: Unique identifier for the action
+
+    Returns:
+        Optional[Row]: The row if found and not released, or the archived
+            action, None otherwise
+    """
+    row = db.execute(_STATUS_ROW_QUERY, {"action_id": action_id}).first()
+    if row is None:
+        record = _get_archived_records(db, [action_id]).get(action_id)
+        if record is not None:
+            return _archived_row(record)
+    return row
+
+
+_STATUS_ROWS_QUERY = select(*STATUS_COLUMNS).where(
+    ActionStatus.action_id.in_(bindparam("action_ids", expanding=True)),
+    ActionStatus.is_released == False,
+)
+
+
+def get_action_status_rows(db: Session, action_ids: Iterable[str]) -> List[Row]:
+    """Get the STATUS_COLUMNS of many actions in one query.
+
+    Args:
+        db: Database session
+        action_ids: Unique identifiers for the actions
+
+    Returns:
+        List[Row]: Rows of the actions found and not released, including
+            archived actions, in no particular order
+    """
+    action_ids = list(action_ids)
+    rows = list(db.execute(_STATUS_ROWS_QUERY, {"action_ids": action_ids}))
+    if len(rows) < len(action_ids):
+        found = {row.action_id for row in rows}
+        missing = [action_id for action_id in action_ids if action_id not in found]
+        rows.extend(
+            _archived_row(record)
+            for record in _get_archived_records(db, missing).values()
+        )
+    return rows
+
+
+_VERSION_QUERY = select(
+    ActionStatus.version, ActionStatus.status, ActionStatus.start_time
+).where(
+    ActionStatus.action_id == bindparam("action_id"),
+    ActionStatus.is_released == False,
+)
+
+
+def get_action_status_version(db: Session, action_id: str) -> Optional[Row]:
+    """Get the version of an action status record by ID.
+
+    Used to answer conditional requests without loading the full record.
+
+    Args:
+        db: Database session
+        action_id: Unique identifier for the action
+
+    Returns:
+        Optional[Row]: The ``version``, ``status`` and ``start_time`` of the
+            action if found and not released or archived, None otherwise
+    """
+    row = db.execute(_VERSION_QUERY, {"action_id": action_id}).first()
+    if row is None:
+        record = _get_archived_records(db, [action_id]).get(action_id)
+        if record is not None:
+            return _archived_row(record)
+    return row
+
+
 def update_action_status(
     db: Session,
     action_id: str,
@@ -84,6 +396,9 @@ def update_action_status(
 ) -> Optional[ActionStatus]:
     """Update an action status record.
 
+    When group commit is enabled the update is applied by the group-commit
+    writer and ``db`` is not used.
+
     Args:
         db: Database session
         action_id: Unique identifier for the action
@@ -93,16 +408,83 @@ def update_action_status(
         Optional[ActionStatus]: The updated action status record if found,
             None otherwise
     """
+    writer = _writer_for(db)
+    if writer is not None:
+        return writer.submit(lambda session: _apply_update(session, action_id, kwargs))
+
+    db_action = _apply_update(db, action_id, kwargs)
+    if not db_action:
+        return None
+
+    db.commit()
+    db.refresh(db_action)
+    return db_action
+
+
+def transition_action_status(
+    db: Session,
+    action_id: str,
+    from_statuses: Iterable[str],
+    **values: Any,
+) -> Optional[Row]:
+    """Update an action only if it is currently in one of the given statuses.
+
+    The check and the change are a single conditional UPDATE, so concurrent
+    transitions of the same action cannot both succeed and no prior read is
+    needed. The change is committed. When group commit is enabled the update
+    is applied by the group-commit writer and ``db`` is not used.
+
+    Args:
+        db: Database session
+        action_id: Unique identifier for the action
+        from_statuses: Statuses the action must be in for the update to apply
+        **values: Fields to update and their new values
+
+    Returns:
+        Optional[Row]: STATUS_COLUMNS of the updated action, or None if the
+            action does not exist, is released or is in another status
+    """
+    stmt = (
+        update(ActionStatus)
+        .where(
+            ActionStatus.action_id == action_id,
+            ActionStatus.is_released == False,
+            ActionStatus.status.in_(list(from_statuses)),
+        )
+        .values(version=ActionStatus.version + 1, **values)
+        .returning(*STATUS_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    writer = _writer_for(db)
+    if writer is not None:
+        return writer.submit(lambda session: _apply_transition(session, stmt))
+
+    row = _apply_transition(db, stmt)
+    db.commit()
+    return row
+
+
+def _apply_transition(db: Session, stmt: Update) -> Optional[Row]:
+    """Run a conditional update without committing it."""
+    row = db.execute(stmt).first()
+    if row is not None:
+        record_invalidations(db, [row.action_id])
+    return row
+
+
+def _apply_update(
+    db: Session, action_id: str, values: Dict[str, Any]
+) -> Optional[ActionStatus]:
+    """Apply field updates to a record without committing them."""
     db_action = get_action_status(db, action_id)
     if not db_action:
         return None
 
-    for key, value in kwargs.items():
+    for key, value in values.items():
         if hasattr(db_action, key):
             setattr(db_action, key, value)
-
-    db.commit()
-    db.refresh(db_action)
+    db_action.version = ActionStatus.version + 1
+    record_invalidations(db, [action_id])
     return db_action
 
 
@@ -120,6 +502,795 @@ def delete_action_status(db: Session, action_id: str) -> bool:
     if not db_action:
         return False
 
+    db.execute(delete(ActionPrincipal).where(ActionPrincipal.action_id == action_id))
     db.delete(db_action)
+    db.flush()
+    _delete_unreferenced_payloads(db, [db_action.request_payload_id])
+    record_invalidations(db, [action_id])
     db.commit()
     return True
+
+
+def get_authorizing_principals(
+    db: Session, action_id: str, roles: Iterable[str], identities: Iterable[str]
+) -> Set[str]:
+    """Get the principals that may grant access to an action.
+
+    Returns the given identities that hold one of the roles on the action,
+    along with every group principal holding one of them, so that the caller
+    only needs to look up group memberships when no identity matched.
+
+    Args:
+        db: Database session
+        action_id: Unique identifier for the action
+        roles: Roles granting the requested access, e.g. MONITOR_ROLES
+        identities: Identity principals of the caller
+
+    Returns:
+        Set[str]: Matching identity principals and all group principals
+    """
+    roles, identities = list(roles), list(identities)
+    stmt = select(ActionPrincipal.principal).where(
+        ActionPrincipal.action_id == action_id,
+        ActionPrincipal.role.in_(roles),
+        or_(
+            ActionPrincipal.principal.in_(identities),
+            ActionPrincipal.principal.startswith(GROUP_PRINCIPAL_PREFIX),
+        ),
+    )
+    principals = set(db.scalars(stmt))
+    if not principals:
+        record = _get_archived_records(db, [action_id]).get(action_id)
+        if record is not None:
+            principals = _archived_principals(record, roles, identities)
+    return principals
+
+
+def get_authorizing_principals_for_actions(
+    db: Session,
+    action_ids: Iterable[str],
+    roles: Iterable[str],
+    identities: Iterable[str],
+) -> Dict[str, Set[str]]:
+    """Get the principals that may grant access to each of many actions.
+
+    The batch equivalent of get_authorizing_principals, using one query.
+
+    Args:
+        db: Database session
+        action_ids: Unique identifiers for the actions
+        roles: Roles granting the requested access, e.g. MONITOR_ROLES
+        identities: Identity principals of the caller
+
+    Returns:
+        Dict[str, Set[str]]: Matching identity principals and all group
+            principals by action ID. Actions without any are left out.
+    """
+    action_ids, roles = list(action_ids), list(roles)
+    identities = list(identities)
+    stmt = select(ActionPrincipal.action_id, ActionPrincipal.principal).where(
+        ActionPrincipal.action_id.in_(action_ids),
+        ActionPrincipal.role.in_(roles),
+        or_(
+            ActionPrincipal.principal.in_(identities),
+            ActionPrincipal.principal.startswith(GROUP_PRINCIPAL_PREFIX),
+        ),
+    )
+    principals: Dict[str, Set[str]] = {}
+    for action_id, principal in db.execute(stmt):
+        principals.setdefault(action_id, set()).add(principal)
+    missing = [action_id for action_id in action_ids if action_id not in principals]
+    for action_id, record in _get_archived_records(db, missing).items():
+        archived = _archived_principals(record, roles, identities)
+        if archived:
+            principals[action_id] = archived
+    return principals
+
+
+def list_action_statuses_for_principals(
+    db: Session,
+    principals: Iterable[str],
+    roles: Iterable[str],
+    statuses: Iterable[str],
+) -> List[Row]:
+    """List the unreleased actions on which any principal holds any role.
+
+    Archived actions are included, found through their index entries and
+    read from the archive.
+
+    Args:
+        db: Database session
+        principals: Principal URNs to look up
+        roles: Roles to match, e.g. ("creator_id", "monitor_by")
+        statuses: Action statuses to include
+
+    Returns:
+        List[Row]: STATUS_COLUMNS of the matching actions, oldest first
+    """
+    action_ids = select(ActionPrincipal.action_id).where(
+        ActionPrincipal.principal.in_(list(principals)),
+        ActionPrincipal.role.in_(list(roles)),
+    )
+    stmt = (
+        select(*STATUS_COLUMNS)
+        .where(
+            ActionStatus.action_id.in_(action_ids),
+            ActionStatus.status.in_(list(statuses)),
+            ActionStatus.is_released == False,
+        )
+        .order_by(ActionStatus.start_time)
+    )
+    rows = list(db.execute(stmt))
+
+    archived_ids = select(ArchivedAction.action_id).where(
+        ArchivedAction.action_id.in_(
+            select(ArchivedPrincipal.action_id).where(
+                ArchivedPrincipal.principal.in_(list(principals)),
+                ArchivedPrincipal.role.in_(list(roles)),
+            )
+        ),
+        ArchivedAction.status.in_(list(statuses)),
+    )
+    archived = _get_archived_records(db, list(db.scalars(archived_ids)))
+    if archived:
+        rows.extend(_archived_row(record) for record in archived.values())
+        rows.sort(key=lambda row: row.start_time)
+    return rows
+
+
+def count_action_statuses(db: Session) -> Dict[str, int]:
+    """Count the unreleased actions in each status, including archived ones.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Dict[str, int]: Number of actions per status
+    """
+    stmt = (
+        select(ActionStatus.status, func.count())
+        .where(ActionStatus.is_released == False)
+        .group_by(ActionStatus.status)
+    )
+    counts = {status: count for status, count in db.execute(stmt)}
+    archived = select(ArchivedAction.status, func.count()).group_by(
+        ArchivedAction.status
+    )
+    for status, count in db.execute(archived):
+        counts[status] = counts.get(status, 0) + count
+    return counts
+
+
+def record_invalidations(db: Session, action_ids: List[str]) -> None:
+    """Log changes to action statuses so that cached copies are dropped.
+
+    The entries are written without committing, so they become visible
+    together with the changes they describe. Entries older than twice the
+    cache TTL are pruned, since anything cached before them has expired.
+
+    Args:
+        db: Database session
+        action_ids: Unique identifiers for the changed actions
+    """
+    config = get_config()
+    if not config.STATUS_CACHE_ENABLED or not action_ids:
+        return
+
+    now = utc_now()
+    cutoff = now - timedelta(seconds=2 * config.STATUS_CACHE_TTL)
+    db.execute(delete(ActionInvalidation).where(ActionInvalidation.created_at < cutoff))
+    db.execute(
+        insert(ActionInvalidation),
+        [{"action_id": action_id, "created_at": now} for action_id in action_ids],
+    )
+
+
+def get_invalidation_version(db: Session) -> int:
+    """Get the latest position in the invalidation log.
+
+    Args:
+        db: Database session
+
+    Returns:
+        int: The latest logged version, 0 if the log is empty
+    """
+    return db.scalar(select(func.max(ActionInvalidation.version))) or 0
+
+
+def get_invalidations_since(db: Session, version: int) -> List[Tuple[int, str]]:
+    """Get the invalidation log entries written after a version.
+
+    Args:
+        db: Database session
+        version: The last version already processed
+
+    Returns:
+        List[Tuple[int, str]]: (version, action_id) pairs in log order
+    """
+    stmt = (
+        select(ActionInvalidation.version, ActionInvalidation.action_id)
+        .where(ActionInvalidation.version > version)
+        .order_by(ActionInvalidation.version)
+    )
+    return list(db.execute(stmt).tuples())
+
+
+def complete_expired_actions(db: Session, max_sleep_time: int) -> List[str]:
+    """Mark every ACTIVE action older than the maximum sleep time as SUCCEEDED.
+
+    All expired actions are completed by a single UPDATE, with the completion
+    time and result details computed in SQL from each row's start time and
+    request body. The change is committed.
+
+    Args:
+        db: Database session
+        max_sleep_time: Seconds after its start time at which an action is done
+
+    Returns:
+        List[str]: Identifiers of the completed actions
+    """
+    cutoff = utc_now() - timedelta(seconds=max_sleep_time)
+    utc_offset = ActionStatus.utc_offset
+    # Timestamps are stored as "YYYY-MM-DD HH:MM:SS.ffffff" in UTC. strftime
+    # drops the microseconds, so they are carried over from the original value.
+    microseconds = func.substr(ActionStatus.start_time, 20)
+    finished_at = func.strftime(
+        "%Y-%m-%d %H:%M:%S", ActionStatus.start_time, f"+{max_sleep_time} seconds"
+    ).op("||")(microseconds)
+    utc_time = func.replace(ActionStatus.start_time, " ", "T").op("||")("+00:00")
+    local_time = (
+        func.strftime(
+            "%Y-%m-%dT%H:%M:%S", ActionStatus.start_time, utc_offset.op("||")(" hours")
+        )
+        .op("||")(microseconds)
+        .op("||")("+00:00")
+    )
+    details = func.json_object(
+        "utc_offset", utc_offset, "utc_time", utc_time, "local_time", local_time
+    )
+
+    stmt = (
+        update(ActionStatus)
+        .where(
+            ActionStatus.status == "ACTIVE",
+            ActionStatus.is_released == False,
+            ActionStatus.start_time < cutoff,
+        )
+        .values(
+            status="SUCCEEDED",
+            display_status="Action completed",
+            completion_time=finished_at,
+            version=ActionStatus.version + 1,
+            details=case(
+                (func.coalesce(utc_offset, 0) != 0, details),
+                else_=ActionStatus.details,
+            ),
+        )
+        .returning(ActionStatus.action_id)
+        .execution_options(synchronize_session=False)
+    )
+    action_ids = list(db.scalars(stmt))
+    record_invalidations(db, action_ids)
+    db.commit()
+    return action_ids
+
+
+# Distinct release_after values, found with one index seek per value instead
+# of scanning the index.
+_RELEASE_AFTER_VALUES = text(
+    """
+    WITH RECURSIVE release_afters(value) AS (
+        SELECT MIN(release_after) FROM action_statuses
+        UNION ALL
+        SELECT (
+            SELECT MIN(release_after) FROM action_statuses
+            WHERE release_after > release_afters.value
+        )
+        FROM release_afters WHERE value IS NOT NULL
+    )
+    SELECT value FROM release_afters WHERE value IS NOT NULL
+    """
+)
+
+
+# release_after values already reported as unparseable by this process.
+_unparseable_release_afters: Set[str] = set()
+
+
+def get_purgeable_action_ids(db: Session, limit: int) -> List[str]:
+    """Get actions that may be deleted for good.
+
+    These are released actions, and completed actions whose release_after
+    has passed since their completion. Actions cancelled before completion
+    times were recorded on cancel are aged from their start time.
+
+    Args:
+        db: Database session
+        limit: Maximum number of identifiers returned
+
+    Returns:
+        List[str]: Identifiers of purgeable actions
+    """
+    action_ids = list(
+        db.scalars(
+            select(ActionStatus.action_id)
+            .where(ActionStatus.is_released == True)
+            .limit(limit)
+        )
+    )
+    now = utc_now()
+    for release_after in db.scalars(_RELEASE_AFTER_VALUES):
+        if len(action_ids) >= limit:
+            break
+        try:
+            cutoff = now - parse_release_after(release_after)
+        except (ValueError, TypeError, OverflowError):
+            if release_after not in _unparseable_release_afters:
+                _unparseable_release_afters.add(release_after)
+                logger.warning(
+                    "Skipping actions with an unparseable release_after",
+                    extra={"release_after": release_after},
+                )
+            continue
+        for completed in (
+            ActionStatus.completion_time < cutoff,
+            (ActionStatus.completion_time == None) & (ActionStatus.start_time < cutoff),
+        ):
+            action_ids.extend(
+                db.scalars(
+                    select(ActionStatus.action_id)
+                    .where(
+                        ActionStatus.release_after == release_after,
+                        completed,
+                        ActionStatus.status.in_(COMPLETE_STATUSES),
+                        ActionStatus.is_released == False,
+                    )
+                    .limit(limit - len(action_ids))
+                )
+            )
+    return action_ids[:limit]
+
+
+def purge_action_statuses(db: Session, action_ids: List[str]) -> int:
+    """Delete actions, their principals and payloads. The change is committed.
+
+    Payloads are only deleted once no other action refers to them.
+
+    Args:
+        db: Database session
+        action_ids: Identifiers of the actions to delete
+
+    Returns:
+        int: Number of actions deleted
+    """
+    if not action_ids:
+        return 0
+    db.execute(delete(ActionPrincipal).where(ActionPrincipal.action_id.in_(action_ids)))
+    payload_ids = list(
+        db.scalars(
+            delete(ActionStatus)
+            .where(ActionStatus.action_id.in_(action_ids))
+            .returning(ActionStatus.request_payload_id)
+        )
+    )
+    _delete_unreferenced_payloads(db, payload_ids)
+    record_invalidations(db, action_ids)
+    db.commit()
+    return len(payload_ids)
+
+
+def incremental_vacuum(db: Session, pages: int) -> int:
+    """Return free pages to the file system, if incremental vacuum is enabled.
+
+    Args:
+        db: Database session
+        pages: Maximum number of free pages to release
+
+    Returns:
+        int: Number of pages released, 0 when auto_vacuum is not INCREMENTAL
+    """
+    if db.scalar(text("PRAGMA auto_vacuum")) != 2:
+        return 0
+    before = db.scalar(text("PRAGMA freelist_count"))
+    db.commit()
+    # The pragma releases one page per step, and the sqlite3 module only
+    # steps it once per execute, so it is run as a script instead.
+    db.connection().connection.driver_connection.executescript(
+        f"PRAGMA incremental_vacuum({int(pages)});"
+    )
+    return before - db.scalar(text("PRAGMA freelist_count"))
+
+
+def get_archivable_actions(
+    db: Session, cutoff: datetime, limit: int
+) -> List[Dict[str, Any]]:
+    """Get completed actions that finished before a cutoff, for archiving.
+
+    Actions cancelled before completion times were recorded on cancel are
+    aged from their start time.
+
+    Args:
+        db: Database session
+        cutoff: Actions completed before this time are returned
+        limit: Maximum number of actions returned
+
+    Returns:
+        List[Dict[str, Any]]: Archive records of the actions, oldest first
+    """
+    stmt = (
+        select(*ARCHIVE_COLUMNS, ActionStatus.request_id, RequestPayload.payload)
+        .outerjoin(RequestPayload, RequestPayload.id == ActionStatus.request_payload_id)
+        .where(
+            ActionStatus.status.in_(COMPLETE_STATUSES),
+            # Implied by the completion time check, and lets the
+            # (status, start_time) index narrow the scan.
+            ActionStatus.start_time < cutoff,
+            func.coalesce(ActionStatus.completion_time, ActionStatus.start_time)
+            < cutoff,
+            ActionStatus.is_released == False,
+        )
+        .order_by(ActionStatus.start_time)
+        .limit(limit)
+    )
+    records = []
+    for row in db.execute(stmt):
+        record = row._asdict()
+        payload = record.pop("payload")
+        request_id = record.pop("request_id")
+        record["request_json"] = (
+            {} if payload is None else decode_request(payload, request_id)
+        )
+        records.append(record)
+    return records
+
+
+def archive_actions(
+    db: Session, records: List[Dict[str, Any]], locations: List[Location]
+) -> int:
+    """Replace actions written to the archive by their archive index entries.
+
+    The actions, their principals and payloads no other action refers to
+    are deleted and the index entries are inserted in one transaction, which
+    is committed. Actions changed since they were read, for instance
+    released, are left in place; their records stay unreferenced in the
+    archive.
+
+    Args:
+        db: Database session
+        records: Records of the archived actions, from get_archivable_actions
+        locations: Where each action was written, in the same order
+
+    Returns:
+        int: Number of actions archived
+    """
+    if not records:
+        return 0
+    # Reading the records did not start a transaction, so only delete the
+    # actions still at the version that was archived.
+    deleted = db.execute(
+        delete(ActionStatus)
+        .where(
+            tuple_(ActionStatus.action_id, ActionStatus.version).in_(
+                [(record["action_id"], record["version"]) for record in records]
+            )
+        )
+        .returning(ActionStatus.action_id, ActionStatus.request_payload_id)
+    ).all()
+    if not deleted:
+        db.rollback()
+        return 0
+    action_ids = [action_id for action_id, _ in deleted]
+    archived = set(action_ids)
+    entries = []
+    principals = []
+    for record, (segment, offset, length, line) in zip(records, locations):
+        if record["action_id"] not in archived:
+            continue
+        entries.append(
+            {
+                "action_id": record["action_id"],
+                "status": record["status"],
+                "segment": segment,
+                "offset": offset,
+                "length": length,
+                "line": line,
+                "expires_at": _archive_expiry(record),
+            }
+        )
+        principals.extend(
+            _principal_rows(
+                record["action_id"],
+                record["creator_id"],
+                record["monitor_by"],
+                record["manage_by"],
+            )
+        )
+    db.execute(insert(ArchivedAction), entries)
+    db.execute(insert(ArchivedPrincipal), principals)
+    db.execute(delete(ActionPrincipal).where(ActionPrincipal.action_id.in_(action_ids)))
+    _delete_unreferenced_payloads(db, [payload_id for _, payload_id in deleted])
+    record_invalidations(db, action_ids)
+    db.commit()
+    return len(action_ids)
+
+
+def _archive_expiry(record: Dict[str, Any]) -> Optional[datetime]:
+    """Get when an archived action's release_after passes, if it can be parsed."""
+    try:
+        release_after = parse_release_after(record["release_after"])
+        return (record["completion_time"] or record["start_time"]) + release_after
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _get_archived_records(
+    db: Session, action_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Read archived actions from their segments.
+
+    Args:
+        db: Database session
+        action_ids: Identifiers of the actions to look up
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Archived records by action ID. Actions that
+            are not archived are left out.
+    """
+    if not action_ids:
+        return {}
+    stmt = select(
+        ArchivedAction.action_id,
+        ArchivedAction.segment,
+        ArchivedAction.offset,
+        ArchivedAction.length,
+        ArchivedAction.line,
+    ).where(ArchivedAction.action_id.in_(action_ids))
+    archive = get_archive()
+    return {
+        action_id: archive.read(location) for action_id, *location in db.execute(stmt)
+    }
+
+
+def _archived_values(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the ARCHIVE_COLUMNS of an archived action, with datetimes parsed."""
+    values = {column.key: record[column.key] for column in ARCHIVE_COLUMNS}
+    for key in _ARCHIVE_DATETIME_COLUMNS:
+        if values[key] is not None:
+            values[key] = datetime.fromisoformat(values[key])
+    return values
+
+
+def _archived_row(record: Dict[str, Any]) -> SimpleNamespace:
+    """Build a row with the STATUS_COLUMNS of an archived action."""
+    return SimpleNamespace(
+        **_archived_values(record),
+        utc_offset=request_utc_offset(record["request_json"] or {}),
+    )
+
+
+def _archived_principals(
+    record: Dict[str, Any], roles: List[str], identities: List[str]
+) -> Set[str]:
+    """Get the authorizing principals of an archived action.
+
+    The archive equivalent of get_authorizing_principals, built from the
+    comma-joined lists kept in the record.
+    """
+    identities = set(identities)
+    return {
+        principal["principal"]
+        for principal in _principal_rows(
+            record["action_id"],
+            record["creator_id"],
+            record["monitor_by"],
+            record["manage_by"],
+        )
+        if principal["role"] in roles
+        and (
+            principal["principal"] in identities
+            or principal["principal"].startswith(GROUP_PRINCIPAL_PREFIX)
+        )
+    }
+
+
+def restore_archived_action(
+    db: Session, action_id: str, statuses: Iterable[str]
+) -> bool:
+    """Move an archived action back into the database to change it.
+
+    The action is only restored if it is in one of the given statuses. The
+    change is committed. When group commit is enabled the action is written
+    by the group-commit writer and ``db`` is only used to read the index.
+
+    Args:
+        db: Database session
+        action_id: Unique identifier for the action
+        statuses: Statuses the action must be in to be restored
+
+    Returns:
+        bool: True if the action was restored
+    """
+    record = _get_archived_records(db, [action_id]).get(action_id)
+    if record is None or record["status"] not in statuses:
+        return False
+
+    encoded = encode_request(record["request_json"] or {})
+    values = {
+        **_archived_values(record),
+        "request_id": encoded.request_id,
+        "utc_offset": encoded.utc_offset,
+        "is_released": False,
+    }
+    principals = _principal_rows(
+        action_id, record["creator_id"], record["monitor_by"], record["manage_by"]
+    )
+
+    def restore(session: Session) -> None:
+        session.execute(
+            delete(ArchivedPrincipal).where(ArchivedPrincipal.action_id == action_id)
+        )
+        session.execute(
+            delete(ArchivedAction).where(ArchivedAction.action_id == action_id)
+        )
+        _insert_many(session, [values], principals, [encoded])
+        record_invalidations(session, [action_id])
+
+    writer = _writer_for(db)
+    if writer is not None:
+        writer.submit(restore)
+    else:
+        restore(db)
+        db.commit()
+    return True
+
+
+def purge_archived_actions(db: Session, limit: int) -> int:
+    """Delete the index entries of archived actions past their release_after.
+
+    The records stay in their segments until remove_unreferenced_segments
+    finds no entry left in a segment. The change is committed.
+
+    Args:
+        db: Database session
+        limit: Maximum number of entries deleted
+
+    Returns:
+        int: Number of entries deleted
+    """
+    expired = list(
+        db.scalars(
+            select(ArchivedAction.action_id)
+            .where(ArchivedAction.expires_at < utc_now())
+            .limit(limit)
+        )
+    )
+    db.execute(
+        delete(ArchivedPrincipal).where(ArchivedPrincipal.action_id.in_(expired))
+    )
+    deleted = db.execute(
+        delete(ArchivedAction).where(ArchivedAction.action_id.in_(expired))
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def remove_unreferenced_segments(db: Session) -> int:
+    """Delete the archive segments no index entry refers to anymore.
+
+    The newest segment is always kept, since the archiver may be appending
+    to it.
+
+    Args:
+        db: Database session
+
+    Returns:
+        int: Number of segments deleted
+    """
+    archive = get_archive()
+    # Listed before reading the index, so a segment started in between is
+    # not considered.
+    segments = archive.segments()[:-1]
+    if not segments:
+        return 0
+    referenced = set(db.scalars(select(ArchivedAction.segment).distinct()))
+    removed = 0
+    for segment in segments:
+        if segment not in referenced:
+            archive.remove_segment(segment)
+            removed += 1
+    return removed
+
+
+_NEXT_ROWIDS = text(
+    """
+    SELECT rowid FROM action_statuses
+    WHERE rowid > :after ORDER BY rowid LIMIT :limit
+    """
+)
+
+# Decodes details held as a JSON encoded string once more. json_type raises
+# on malformed JSON, so it is only evaluated for valid values, and strings
+# that do not hold valid JSON are replaced by empty details.
+_CONVERT_LEGACY_DETAILS = text(
+    """
+    UPDATE action_statuses
+    SET details = CASE
+        WHEN json_valid(json_extract(details, '$'))
+        THEN json(json_extract(details, '$'))
+        ELSE '{}'
+    END
+    WHERE rowid > :after AND rowid <= :last
+    AND CASE WHEN json_valid(details) THEN json_type(details) = 'text' END
+    """
+)
+
+
+def convert_legacy_details(
+    db: Session, after: int, limit: int
+) -> Tuple[Optional[int], int]:
+    """Rewrite the details of one batch of rows in row format 2.
+
+    Rows written before row format 2 hold details as a JSON encoded string
+    inside the JSON column. Batches walk the table in rowid order and each
+    is committed on its own, so the conversion can run while the provider
+    serves requests, which read both formats. The versions of converted
+    rows are kept, since their API representation does not change.
+
+    Args:
+        db: Database session
+        after: rowid the previous batch ended at, 0 to start
+        limit: Maximum number of rows examined
+
+    Returns:
+        Tuple[Optional[int], int]: rowid this batch ended at, None once the
+            whole table was examined, and the number of rows converted
+    """
+    rowids = list(db.scalars(_NEXT_ROWIDS, {"after": after, "limit": limit}))
+    if not rowids:
+        return None, 0
+    converted = db.execute(
+        _CONVERT_LEGACY_DETAILS, {"after": after, "last": rowids[-1]}
+    ).rowcount
+    db.commit()
+    return rowids[-1], converted
+
+
+def acquire_lease(db: Session, name: str, holder: str, ttl: float) -> bool:
+    """Acquire or renew a lease.
+
+    The lease is granted if it is free, expired or already held by the same
+    holder. The change is committed.
+
+    Args:
+        db: Database session
+        name: Name of the lease
+        holder: Identifier of the process asking for the lease
+        ttl: Seconds until the lease expires unless renewed
+
+    Returns:
+        bool: True if the holder now holds the lease
+    """
+    now = utc_now()
+    stmt = sqlite_insert(Lease).values(
+        name=name, holder=holder, expires_at=now + timedelta(seconds=ttl)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+        where=or_(Lease.holder == holder, Lease.expires_at < now),
+    )
+    acquired = db.execute(stmt).rowcount == 1
+    db.commit()
+    return acquired
+
+
+def release_lease(db: Session, name: str, holder: str) -> None:
+    """Release a lease if it is held by the given holder.
+
+    Args:
+        db: Database session
+        name: Name of the lease
+        holder: Identifier of the process holding the lease
+    """
+    db.execute(delete(Lease).where(Lease.name == name, Lease.holder == holder))
+    db.commit()
@@ -0,0 +1,426 @@
+"""Schema migrations for the action provider database.
+
+The schema version is kept in SQLite's ``PRAGMA user_version``. Each migration
+upgrades the schema by one version inside its own transaction, so a failed
+migration leaves the database at the previous version.
+
+Migrations use their own DDL instead of the models, because the models always
+describe the latest schema. When changing the models, append a migration here
+that brings existing databases to the same schema.
+"""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..logging import get_logger
+from .archive import get_archive
+from .payloads import encode_request
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single schema upgrade.
+
+    Attributes:
+        version: Schema version reached once the migration is applied.
+        description: Short human-readable summary.
+        upgrade: Applies the change using the given connection. It runs inside
+            a transaction and must not commit.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[sqlite3.Connection], None]
+
+
+def _execute(*statements: str) -> Callable[[sqlite3.Connection], None]:
+    """Build an upgrade function that runs SQL statements in order."""
+
+    def upgrade(connection: sqlite3.Connection) -> None:
+        for statement in statements:
+            connection.execute(statement)
+
+    return upgrade
+
+
+def _create_action_principals(connection: sqlite3.Connection) -> None:
+    """Create action_principals and fill it from the comma-joined columns."""
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS action_principals (
+            action_id VARCHAR NOT NULL,
+            role VARCHAR NOT NULL,
+            principal VARCHAR NOT NULL,
+            PRIMARY KEY (action_id, role, principal),
+            FOREIGN KEY(action_id)
+                REFERENCES action_statuses (action_id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_action_principals_principal_role
+        ON action_principals (principal, role, action_id)
+        """
+    )
+
+    def principal_rows():
+        actions = connection.execute(
+            "SELECT action_id, creator_id, monitor_by, manage_by FROM action_statuses"
+        )
+        for action_id, creator_id, monitor_by, manage_by in actions:
+            yield action_id, "creator_id", creator_id
+            for role, principals in (
+                ("monitor_by", monitor_by),
+                ("manage_by", manage_by),
+            ):
+                for principal in filter(None, principals.split(",")):
+                    yield action_id, role, principal
+
+    connection.executemany(
+        "INSERT OR IGNORE INTO action_principals (action_id, role, principal) "
+        "VALUES (?, ?, ?)",
+        principal_rows(),
+    )
+
+
+def _split_request_payloads(connection: sqlite3.Connection) -> None:
+    """Move request_json into request_payloads and extracted columns."""
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS request_payloads (
+            id INTEGER NOT NULL,
+            digest BLOB NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (digest)
+        )
+        """
+    )
+    for column in (
+        "request_id VARCHAR",
+        "utc_offset INTEGER",
+        "request_payload_id INTEGER REFERENCES request_payloads (id)",
+    ):
+        connection.execute(f"ALTER TABLE action_statuses ADD COLUMN {column}")
+
+    payload_ids = {}
+    last_rowid = 0
+    while True:
+        rows = connection.execute(
+            "SELECT rowid, request_json FROM action_statuses "
+            "WHERE rowid > ? ORDER BY rowid LIMIT 1000",
+            (last_rowid,),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for rowid, request_json in rows:
+            encoded = encode_request(json.loads(request_json))
+            payload_id = payload_ids.get(encoded.digest)
+            if payload_id is None:
+                payload_id = payload_ids[encoded.digest] = connection.execute(
+                    "INSERT INTO request_payloads (digest, payload) VALUES (?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET digest = excluded.digest "
+                    "RETURNING id",
+                    (encoded.digest, encoded.payload),
+                ).fetchone()[0]
+            updates.append((encoded.request_id, encoded.utc_offset, payload_id, rowid))
+        connection.executemany(
+            "UPDATE action_statuses "
+            "SET request_id = ?, utc_offset = ?, request_payload_id = ? "
+            "WHERE rowid = ?",
+            updates,
+        )
+        last_rowid = rows[-1][0]
+
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_action_statuses_request_payload_id
+        ON action_statuses (request_payload_id)
+        """
+    )
+    connection.execute("ALTER TABLE action_statuses DROP COLUMN request_json")
+
+
+def _index_archived_statuses(connection: sqlite3.Connection) -> None:
+    """Index the status and principals of archived actions from their records."""
+    connection.execute(
+        "ALTER TABLE archived_actions ADD COLUMN status VARCHAR NOT NULL DEFAULT ''"
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_archived_actions_status
+        ON archived_actions (status)
+        """
+    )
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_principals (
+            action_id VARCHAR NOT NULL,
+            role VARCHAR NOT NULL,
+            principal VARCHAR NOT NULL,
+            PRIMARY KEY (action_id, role, principal),
+            FOREIGN KEY(action_id)
+                REFERENCES archived_actions (action_id) ON DELETE CASCADE
+        )
+        """
+    )
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_archived_principals_principal_role
+        ON archived_principals (principal, role, action_id)
+        """
+    )
+
+    def principal_rows(records):
+        for action_id, record in records:
+            yield action_id, "creator_id", record["creator_id"]
+            for role in ("monitor_by", "manage_by"):
+                for principal in filter(None, record[role].split(",")):
+                    yield action_id, role, principal
+
+    archive = get_archive()
+    # In file order, so every compressed member is only read once.
+    locations = connection.execute(
+        'SELECT action_id, segment, "offset", length, line FROM archived_actions '
+        'ORDER BY segment, "offset", line'
+    ).fetchall()
+    for start in range(0, len(locations), 1000):
+        records = [
+            (action_id, archive.read(tuple(location)))
+            for action_id, *location in locations[start : start + 1000]
+        ]
+        connection.executemany(
+            "UPDATE archived_actions SET status = ? WHERE action_id = ?",
+            [(record["status"], action_id) for action_id, record in records],
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO archived_principals (action_id, role, principal) "
+            "VALUES (?, ?, ?)",
+            principal_rows(records),
+        )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Create action status, invalidation log and lease tables",
+        upgrade=_execute(
+            """
+            CREATE TABLE IF NOT EXISTS action_statuses (
+                action_id VARCHAR NOT NULL,
+                status VARCHAR NOT NULL,
+                creator_id VARCHAR NOT NULL,
+                label VARCHAR,
+                monitor_by VARCHAR NOT NULL,
+                manage_by VARCHAR NOT NULL,
+                start_time DATETIME NOT NULL,
+                completion_time DATETIME,
+                release_after VARCHAR NOT NULL,
+                display_status VARCHAR NOT NULL,
+                details JSON NOT NULL,
+                request_json JSON NOT NULL,
+                is_released BOOLEAN NOT NULL,
+                PRIMARY KEY (action_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS action_invalidations (
+                version INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                action_id VARCHAR NOT NULL,
+                created_at DATETIME NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_action_invalidations_created_at
+            ON action_invalidations (created_at)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS leases (
+                name VARCHAR NOT NULL,
+                holder VARCHAR NOT NULL,
+                expires_at DATETIME NOT NULL,
+                PRIMARY KEY (name)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        version=2,
+        description="Index action statuses by status, creator and release state",
+        upgrade=_execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_action_statuses_status_start_time
+            ON action_statuses (status, start_time)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_action_statuses_creator_id_status
+            ON action_statuses (creator_id, status)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_action_statuses_is_released_start_time
+            ON action_statuses (is_released, start_time)
+            """,
+            "ANALYZE action_statuses",
+        ),
+    ),
+    Migration(
+        version=3,
+        description="Normalize monitor_by and manage_by into action_principals",
+        upgrade=_create_action_principals,
+    ),
+    Migration(
+        version=4,
+        description="Add a row version to action statuses for ETags",
+        upgrade=_execute(
+            "ALTER TABLE action_statuses "
+            "ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        ),
+    ),
+    Migration(
+        version=5,
+        description="Index completed actions by release_after for retention",
+        upgrade=_execute(
+            """
+            CREATE INDEX IF NOT EXISTS
+                ix_action_statuses_release_after_completion_time
+            ON action_statuses (release_after, completion_time)
+            """,
+        ),
+    ),
+    Migration(
+        version=6,
+        description="Add the index of archived actions",
+        upgrade=_execute(
+            """
+            CREATE TABLE IF NOT EXISTS archived_actions (
+                action_id VARCHAR NOT NULL,
+                segment VARCHAR NOT NULL,
+                "offset" INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                line INTEGER NOT NULL,
+                expires_at DATETIME,
+                PRIMARY KEY (action_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_archived_actions_expires_at
+            ON archived_actions (expires_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_archived_actions_segment
+            ON archived_actions (segment)
+            """,
+        ),
+    ),
+    Migration(
+        version=7,
+        description="Store run requests once per distinct content, compressed",
+        upgrade=_split_request_payloads,
+    ),
+    Migration(
+        version=8,
+        description="Index the status and principals of archived actions",
+        upgrade=_index_archived_statuses,
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    # Autocommit mode, so transactions are only the ones started explicitly.
+    return sqlite3.connect(db_path, isolation_level=None)
+
+
+def get_schema_version(db_path: Path) -> int:
+    """Get the schema version of a database.
+
+    Args:
+        db_path: Path to the SQLite database file.
+
+    Returns:
+        int: The current schema version, 0 for databases that predate migrations.
+    """
+    connection = _connect(db_path)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def set_schema_version(db_path: Path, version: int) -> None:
+    """Record a schema version without running any migrations.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        version: The version to record.
+    """
+    connection = _connect(db_path)
+    try:
+        connection.execute(f"PRAGMA user_version = {int(version)}")
+    finally:
+        connection.close()
+
+
+def get_pending_migrations(db_path: Path) -> List[Migration]:
+    """Get the migrations that have not been applied to a database.
+
+    Args:
+        db_path: Path to the SQLite database file.
+
+    Returns:
+        List[Migration]: Pending migrations in the order they will run.
+    """
+    current = get_schema_version(db_path)
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(db_path: Path, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations to a database in place.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        target: Version to stop at, defaults to the latest version.
+
+    Returns:
+        List[Migration]: The migrations that were applied.
+    """
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    connection = _connect(db_path)
+    try:
+        for migration in MIGRATIONS:
+            if migration.version > target:
+                break
+            # Check the version under the write lock, so concurrent runs do
+            # not apply the same migration twice.
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                current = connection.execute("PRAGMA user_version").fetchone()[0]
+                if migration.version <= current:
+                    connection.execute("ROLLBACK")
+                    continue
+                logger.info(
+                    "Applying migration",
+                    extra={
+                        "version": migration.version,
+                        "description": migration.description,
+                    },
+                )
+                migration.upgrade(connection)
+                connection.execute(f"PRAGMA user_version = {migration.version}")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            applied.append(migration)
+    finally:
+        connection.close()
+    return applied
@@ -1,9 +1,9 @@
 """SQLAlchemy models for the action provider."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from sqlalchemy import DateTime, String, JSON
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, LargeBinary, String, JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -31,12 +31,35 @@ class ActionStatus(Base):
         completion_time (Optional[datetime]): When the action was completed
         release_after (str): ISO 8601 duration string for release timing
         display_status (str): Human-readable status message
-        details (str): JSON string containing additional details
-        request_json (dict): The original JSON request that created this action
+        details (dict): Additional details. Rows written before row format
+            2 hold them as a JSON encoded string instead, see
+            crud.convert_legacy_details.
+        request_id (Optional[str]): request_id of the run request
+        utc_offset (Optional[int]): utc_offset of the run request body
+        request_payload_id (Optional[int]): The rest of the run request, see
+            RequestPayload
         is_released (bool): Indicates whether the action is released
+        version (int): Incremented on every change, used as the status ETag
     """
 
     __tablename__ = "action_statuses"
+    # Keep in sync with the migrations in db.migrations.
+    __table_args__ = (
+        # Completion sweeps: ACTIVE actions ordered by start time
+        Index("ix_action_statuses_status_start_time", "status", "start_time"),
+        # Listing the actions created by an identity
+        Index("ix_action_statuses_creator_id_status", "creator_id", "status"),
+        # Retention: released actions ordered by age
+        Index("ix_action_statuses_is_released_start_time", "is_released", "start_time"),
+        # Retention: completed actions past their release_after
+        Index(
+            "ix_action_statuses_release_after_completion_time",
+            "release_after",
+            "completion_time",
+        ),
+        # Finding payloads no action refers to anymore
+        Index("ix_action_statuses_request_payload_id", "request_payload_id"),
+    )
 
     action_id: Mapped[str] = mapped_column(String, primary_key=True)
     status: Mapped[str] = mapped_column(String, nullable=False)
@@ -52,6 +75,168 @@ class ActionStatus(Base):
     )
     release_after: Mapped[str] = mapped_column(String, nullable=False)
     display_status: Mapped[str] = mapped_column(String, nullable=False)
-    details: Mapped[str] = mapped_column(JSON, nullable=False, default="{}")
-    request_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    details: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+    request_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    utc_offset: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    request_payload_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("request_payloads.id"), nullable=True
+    )
     is_released: Mapped[bool] = mapped_column(default=False, nullable=False)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
+
+class RequestPayload(Base):
+    """SQLAlchemy model storing run requests once per distinct content.
+
+    Holds each run request without its request_id, which is kept on the
+    action, as compressed canonical JSON keyed by its SHA-256, see
+    db.payloads. Actions created with the same request share one row.
+
+    Attributes:
+        id (int): Identifier referenced by ActionStatus.request_payload_id
+        digest (bytes): SHA-256 of the canonical JSON
+        payload (bytes): zlib-compressed canonical JSON
+    """
+
+    __tablename__ = "request_payloads"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    digest: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, unique=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class ActionPrincipal(Base):
+    """SQLAlchemy model associating actions with the principals allowed on them.
+
+    Each action has one row per principal and role, where the role is the
+    ActionStatus field granting access: ``creator_id``, ``monitor_by`` or
+    ``manage_by``. This makes authorization checks and lookups of the actions
+    visible to a principal index driven.
+
+    Attributes:
+        action_id (str): Identifier of the action
+        role (str): ActionStatus field the principal was listed in
+        principal (str): Principal URN
+    """
+
+    __tablename__ = "action_principals"
+    __table_args__ = (
+        # Actions visible to a principal, covering so no table lookup is needed
+        Index("ix_action_principals_principal_role", "principal", "role", "action_id"),
+    )
+
+    action_id: Mapped[str] = mapped_column(
+        String,
+        ForeignKey("action_statuses.action_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    role: Mapped[str] = mapped_column(String, primary_key=True)
+    principal: Mapped[str] = mapped_column(String, primary_key=True)
+
+
+class ArchivedAction(Base):
+    """SQLAlchemy model indexing the actions moved to the archive.
+
+    Archived actions are deleted from ``action_statuses`` and kept as JSON
+    lines in compressed segment files, see db.archive. Each row locates one
+    of them for point lookups, and keeps its status so that archived actions
+    can be listed and counted without reading the segments.
+
+    Attributes:
+        action_id (str): Identifier of the archived action
+        status (str): Status of the action, always a completed one
+        segment (str): Name of the segment file holding the action
+        offset (int): Byte offset of the compressed member holding the action
+        length (int): Byte length of that member
+        line (int): Line of the action within the member
+        expires_at (Optional[datetime]): When the action's release_after
+            passes, after which it may be purged
+    """
+
+    __tablename__ = "archived_actions"
+
+    action_id: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    segment: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    length: Mapped[int] = mapped_column(Integer, nullable=False)
+    line: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+
+class ArchivedPrincipal(Base):
+    """SQLAlchemy model associating archived actions with their principals.
+
+    The archive counterpart of ActionPrincipal, which finds the archived
+    actions visible to a principal from the index alone.
+
+    Attributes:
+        action_id (str): Identifier of the archived action
+        role (str): ActionStatus field the principal was listed in
+        principal (str): Principal URN
+    """
+
+    __tablename__ = "archived_principals"
+    __table_args__ = (
+        Index(
+            "ix_archived_principals_principal_role", "principal", "role", "action_id"
+        ),
+    )
+
+    action_id: Mapped[str] = mapped_column(
+        String,
+        ForeignKey("archived_actions.action_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    role: Mapped[str] = mapped_column(String, primary_key=True)
+    principal: Mapped[str] = mapped_column(String, primary_key=True)
+
+
+class ActionInvalidation(Base):
+    """SQLAlchemy model for the action status invalidation log.
+
+    Every write to an action status appends a row here in the same
+    transaction. Each process remembers the last version it has seen and drops
+    the cached statuses of any action logged after it, which keeps the status
+    caches of all workers sharing the database consistent.
+
+    Attributes:
+        version (int): Monotonically increasing log position
+        action_id (str): Identifier of the action that changed
+        created_at (datetime): When the change was logged
+    """
+
+    __tablename__ = "action_invalidations"
+    # AUTOINCREMENT keeps versions from being reused once old rows are pruned.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    action_id: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+class Lease(Base):
+    """SQLAlchemy model for leases on background jobs.
+
+    A lease names the process allowed to run a job until it expires, so that a
+    job started by every worker or node is only executed by one of them.
+
+    Attributes:
+        name (str): Name of the job the lease is for
+        holder (str): Identifier of the process holding the lease
+        expires_at (datetime): When the lease may be taken over
+    """
+
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
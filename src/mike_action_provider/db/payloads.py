@@ -0,0 +1,86 @@
+"""Content-addressed encoding of the run requests that created actions.
+
+Requests are split into the fields kept as columns of ``action_statuses``,
+``request_id`` and the ``utc_offset`` of the body, and the rest of the
+request. The rest is stored once per distinct content in
+``request_payloads``, keyed by the SHA-256 of its canonical JSON and
+compressed with zlib, so the actions of a fan-out sending the same body
+share one payload row.
+"""
+
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class EncodedPayload(NamedTuple):
+    """A request split into its columns and its shared payload.
+
+    Attributes:
+        request_id: The request_id of the request, if any
+        utc_offset: The utc_offset of the request body, if any
+        digest: SHA-256 of the payload's canonical JSON
+        payload: The zlib-compressed canonical JSON of the payload
+    """
+
+    request_id: Optional[str]
+    utc_offset: Optional[int]
+    digest: bytes
+    payload: bytes
+
+
+def request_utc_offset(request_json: Dict[str, Any]) -> Optional[int]:
+    """Get the UTC offset of a run request's body.
+
+    Args:
+        request_json: The run request.
+
+    Returns:
+        Optional[int]: The offset in hours, None if the body has none.
+    """
+    body = request_json.get("body")
+    if not isinstance(body, dict) or body.get("utc_offset") is None:
+        return None
+    try:
+        return int(body["utc_offset"])
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_request(request_json: Dict[str, Any]) -> EncodedPayload:
+    """Split a run request into its columns and its compressed payload.
+
+    Args:
+        request_json: The run request that created an action.
+
+    Returns:
+        EncodedPayload: The extracted columns and the payload to store.
+    """
+    payload = {key: value for key, value in request_json.items() if key != "request_id"}
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), default=str
+    ).encode()
+    request_id = request_json.get("request_id")
+    return EncodedPayload(
+        request_id=None if request_id is None else str(request_id),
+        utc_offset=request_utc_offset(request_json),
+        digest=hashlib.sha256(canonical).digest(),
+        payload=zlib.compress(canonical),
+    )
+
+
+def decode_request(payload: bytes, request_id: Optional[str]) -> Dict[str, Any]:
+    """Rebuild a run request from its stored payload.
+
+    Args:
+        payload: The compressed payload.
+        request_id: The request_id column of the action.
+
+    Returns:
+        Dict[str, Any]: The run request.
+    """
+    request_json = json.loads(zlib.decompress(payload))
+    if request_id is not None:
+        request_json["request_id"] = request_id
+    return request_json
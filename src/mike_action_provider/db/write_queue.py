@@ -0,0 +1,202 @@
+"""Group-commit writer for batching database writes.
+
+When group commit is enabled, CRUD writes are handed to a single writer
+thread instead of committing on the caller's session. The writer collects
+writes for a few milliseconds, applies them in one transaction and only then
+hands each caller its result, so every write is durable before its request
+returns while a burst of requests shares a single commit.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import Connection
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import get_config
+from ..logging import get_logger
+from .connection import build_unpooled_engine
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+Operation = Callable[[Session], Any]
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Apply queued write operations in batched transactions.
+
+    The writer keeps one connection for its whole life, opened when it is
+    created from an engine that does not pool, so that it never waits on a
+    connection pool drained by callers that are themselves waiting on the
+    writer. If the writer thread fails, every queued and later write fails
+    with its error instead of waiting forever.
+
+    Args:
+        session_factory: Factory for the sessions used by the writer thread.
+            They are bound to the writer's own connection from the factory's
+            engine, which should not pool connections.
+        interval: Seconds to wait for more writes after the first one arrives.
+        max_batch: Maximum number of operations per transaction.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        interval: float = 0.002,
+        max_batch: int = 256,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._batch: List[Tuple[Operation, Future]] = []
+        self._connection: Connection = session_factory.kw["bind"].connect()
+        self._thread = threading.Thread(
+            target=self._run, name="group-commit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, operation: Callable[[Session], T]) -> T:
+        """Queue a write and wait until the batch containing it is committed.
+
+        Args:
+            operation: Callable applying the write to the given session and
+                returning the caller's result. It must not commit.
+
+        Returns:
+            The value returned by the operation.
+
+        Raises:
+            Exception: Whatever the operation or its commit raised, or the
+                error that stopped the writer thread.
+        """
+        future: "Future[T]" = Future()
+        self._queue.put((operation, future))
+        if self._error is not None:
+            # The thread may have stopped before it could fail this write.
+            self._fail_pending()
+        return future.result()
+
+    def is_alive(self) -> bool:
+        """Check whether the writer thread still applies writes."""
+        return self._thread.is_alive()
+
+    def close(self) -> None:
+        """Commit any queued writes and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._connection.close()
+
+    def _run(self) -> None:
+        try:
+            self._process()
+        except BaseException as exc:
+            logger.exception("Group-commit writer stopped")
+            self._error = exc
+            for _, future in self._batch:
+                if not future.done():
+                    future.set_exception(exc)
+            self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        """Fail every queued write with the error that stopped the thread."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                item[1].set_exception(self._error)
+
+    def _process(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            self._batch = batch = [item]
+            deadline = time.monotonic() + self._interval
+            while len(batch) < self._max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[Operation, Future]]) -> None:
+        """Apply a batch in one transaction, isolating failures if it fails."""
+        try:
+            with self._session_factory(bind=self._connection) as session:
+                results = [operation(session) for operation, _ in batch]
+                session.commit()
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # Replay one by one so only the failing write reports an error.
+            logger.warning(
+                "Group commit failed, retrying writes individually",
+                extra={"batch_size": len(batch)},
+            )
+            for pending in batch:
+                self._commit([pending])
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+_writer: Optional[GroupCommitWriter] = None
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> Optional[GroupCommitWriter]:
+    """Get the process-wide group-commit writer.
+
+    The writer is created lazily, and again after a fork since the writer
+    thread does not survive into child processes, or if its thread stopped.
+
+    Returns:
+        Optional[GroupCommitWriter]: The writer, or None when group commit is
+            disabled.
+    """
+    global _writer, _writer_pid
+    config = get_config()
+    if not config.DB_GROUP_COMMIT:
+        return None
+    if _writer is not None and _writer_pid == os.getpid() and _writer.is_alive():
+        return _writer
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid() or not _writer.is_alive():
+            if _writer is not None and _writer_pid == os.getpid():
+                _writer.close()
+            # Results are handed back after the writer's session closes, so
+            # keep their loaded attributes instead of expiring them on commit.
+            _writer = GroupCommitWriter(
+                sessionmaker(
+                    autoflush=False,
+                    bind=build_unpooled_engine(),
+                    expire_on_commit=False,
+                ),
+                interval=config.DB_GROUP_COMMIT_INTERVAL_MS / 1000,
+                max_batch=config.DB_GROUP_COMMIT_MAX_BATCH,
+            )
+            _writer_pid = os.getpid()
+            atexit.register(_writer.close)
+    return _writer
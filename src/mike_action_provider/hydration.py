@@ -0,0 +1,67 @@
+"""Conversion of stored action rows into ActionStatus objects."""
+
+import datetime as dt
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from globus_action_provider_tools import ActionStatus, ActionStatusValue
+from pydantic.datetime_parse import parse_duration
+from sqlalchemy import Row
+
+# Longest display_status accepted by ActionStatus.
+DISPLAY_STATUS_MAX_LENGTH = 64
+
+
+@lru_cache(maxsize=64)
+def parse_release_after(release_after: str) -> dt.timedelta:
+    """Parse a stored release_after value, which only takes a handful of values.
+
+    Values are ISO 8601 durations such as "P30D", or ``str(timedelta)`` forms
+    such as "30 days, 0:00:00".
+    """
+    return parse_duration(release_after)
+
+
+def _decode_details(details: Any) -> Dict[str, Any]:
+    """Get stored details, decoding rows not converted to row format 2 yet.
+
+    The JSON column already decodes native details; rows written before
+    hold a JSON encoded string that needs a second decode.
+    """
+    if isinstance(details, dict):
+        return details
+    if not details:
+        return {}
+    return json.loads(details)
+
+
+def row_to_action_status(row: Row) -> ActionStatus:
+    """Build an ActionStatus from a row selected with STATUS_COLUMNS.
+
+    Rows were validated when the action was created and are only changed by
+    this provider, so the model is built without running pydantic validation.
+    Values are converted to the types validation would have produced.
+
+    Args:
+        row (Row): A row with the columns in crud.STATUS_COLUMNS.
+
+    Returns:
+        ActionStatus: The action status.
+    """
+    completion_time: Optional[dt.datetime] = row.completion_time
+    if completion_time is not None:
+        completion_time = completion_time.replace(tzinfo=dt.timezone.utc)
+    return ActionStatus.construct(
+        action_id=row.action_id,
+        status=ActionStatusValue(row.status),
+        creator_id=row.creator_id,
+        label=row.label,
+        monitor_by=set(row.monitor_by.split(",")),
+        manage_by=set(row.manage_by.split(",")),
+        start_time=row.start_time.isoformat(),
+        completion_time=completion_time,
+        release_after=parse_release_after(row.release_after),
+        display_status=row.display_status[:DISPLAY_STATUS_MAX_LENGTH],
+        details=_decode_details(row.details),
+    )
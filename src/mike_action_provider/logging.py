@@ -1,17 +1,52 @@
 """Logging configuration for the action provider."""
 
+import atexit
+import copy
 import json
 import logging
 import logging.handlers
-from datetime import datetime
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .config import get_config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Attributes of every LogRecord; any other attribute was passed in ``extra``.
+_STANDARD_FIELDS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"asctime", "message"}
+
+_STOP = object()
+
+
+if orjson is not None:
+
+    def _dumps(log_data: Dict[str, Any]) -> str:
+        return orjson.dumps(log_data, default=str).decode()
+
+else:
+
+    def _dumps(log_data: Dict[str, Any]) -> str:
+        return json.dumps(log_data, default=str)
+
 
 class JSONFormatter(logging.Formatter):
-    """JSON formatter for structured logging."""
+    """JSON formatter for structured logging.
+
+    Uses orjson when it is installed. Values that cannot be serialized are
+    logged as their string representation.
+    """
 
     def format(self, record: logging.LogRecord) -> str:
         """Format the log record as JSON.
@@ -23,7 +58,10 @@ class JSONFormatter(logging.Formatter):
             str: JSON formatted log record.
         """
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # The time the record was created, even if it is formatted later.
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -32,57 +70,306 @@ class JSONFormatter(logging.Formatter):
         # Add extra fields if they exist
         if hasattr(record, "extra"):
             log_data.update(record.extra)
-        elif hasattr(record, "__dict__"):
+        else:
             # Handle extra fields passed directly in __dict__
-            standard_fields = {
-                "args",
-                "asctime",
-                "created",
-                "exc_info",
-                "exc_text",
-                "filename",
-                "funcName",
-                "id",
-                "levelname",
-                "levelno",
-                "lineno",
-                "module",
-                "msecs",
-                "message",
-                "msg",
-                "name",
-                "pathname",
-                "process",
-                "processName",
-                "relativeCreated",
-                "stack_info",
-                "thread",
-                "threadName",
-            }
             for key, value in record.__dict__.items():
-                if key not in standard_fields:
+                if key not in _STANDARD_FIELDS:
                     log_data[key] = value
 
         # Add exception info if it exists
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
+
+        return _dumps(log_data)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Hand log records to the log writer without blocking the caller.
+
+    Only the message and any traceback are rendered in the calling thread,
+    since arguments and frames may change before the writer gets to the
+    record. Records logged while the queue is full are dropped and counted.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[Any]") -> None:
+        super().__init__(log_queue)
+        self._exception_formatter = logging.Formatter()
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class BatchingLogWriter:
+    """Format queued log records on a background thread and write them in batches.
+
+    The writer takes every record already queued, up to ``max_batch``,
+    formats each once and writes them to each handler with a single write and
+    flush. Handler levels and filters are not applied.
+
+    Args:
+        log_queue: Queue filled by a LogQueueHandler.
+        handlers: Stream handlers, such as a RotatingFileHandler, to write to.
+        formatter: Formatter for the records.
+        max_batch: Maximum number of records per write.
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Any]",
+        handlers: List[logging.StreamHandler],
+        formatter: logging.Formatter,
+        max_batch: int = 256,
+    ) -> None:
+        self.queue = log_queue
+        self.handlers = handlers
+        self.formatter = formatter
+        self.max_batch = max_batch
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Write any queued records and stop the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                self.handlers[0].handleError(record)
+        if not lines:
+            return
+        text = "\n".join(lines) + "\n"
+        for handler in self.handlers:
+            handler.acquire()
+            try:
+                if (
+                    isinstance(handler, logging.handlers.RotatingFileHandler)
+                    and handler.maxBytes > 0
+                    and handler.stream.tell() > 0
+                    and handler.stream.tell() + len(text) >= handler.maxBytes
+                ):
+                    handler.doRollover()
+                handler.stream.write(text)
+                handler.flush()
+            except Exception:
+                handler.handleError(batch[-1])
+            finally:
+                handler.release()
+
+
+class LogSampler(logging.Filter):
+    """Sample and rate limit debug and info records before they are written.
+
+    A record is kept with the rate configured for its logger and message
+    format string, falling back to the rate for its logger. Records carrying
+    an ``action_id`` are also limited to ``action_rate_limit`` per action per
+    ``action_rate_window`` seconds. Warnings and errors are always kept.
+    Suppressed records are counted.
+
+    The sampler may be attached to several handlers: each record is decided
+    once and the decision reused for the other handlers.
+
+    Args:
+        rates: Fraction of records to keep, keyed by logger name and message
+            format string, or by logger name and None for the whole logger.
+        action_rate_limit: Records per action_id per window, 0 for no limit.
+        action_rate_window: Window of the rate limit in seconds.
+        max_actions: Maximum number of action_ids tracked by the rate limit.
+    """
+
+    def __init__(
+        self,
+        rates: Dict[Tuple[str, Optional[str]], float],
+        action_rate_limit: int = 0,
+        action_rate_window: float = 60.0,
+        max_actions: int = 10000,
+    ) -> None:
+        super().__init__()
+        self._rates = rates
+        self._action_rate_limit = action_rate_limit
+        self._action_rate_window = action_rate_window
+        self._max_actions = max_actions
+        self._windows: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last = threading.local()
+        self._counters = {"sampled_out": 0, "rate_limited": 0}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if getattr(self._last, "record", None) is record:
+            return self._last.keep
+        keep = self._decide(record)
+        self._last.record = record
+        self._last.keep = keep
+        return keep
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        rate = self._rates.get((record.name, record.msg))
+        if rate is None:
+            rate = self._rates.get((record.name, None))
+        if rate is not None and random.random() >= rate:
+            with self._lock:
+                self._counters["sampled_out"] += 1
+            return False
+
+        action_id = getattr(record, "action_id", None)
+        if not self._action_rate_limit or action_id is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(action_id)
+            if window is None or now - window[0] >= self._action_rate_window:
+                # [window start, records kept in the window]
+                window = self._windows[action_id] = [now, 0]
+                if len(self._windows) > self._max_actions:
+                    self._windows.popitem(last=False)
+            if window[1] >= self._action_rate_limit:
+                self._counters["rate_limited"] += 1
+                return False
+            window[1] += 1
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """Get the suppression counters.
+
+        Returns:
+            Dict[str, int]: Records dropped by sampling and by the rate limit.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+
+def parse_sampling_rates(spec: str) -> Dict[Tuple[str, Optional[str]], float]:
+    """Parse LOG_SAMPLING into LogSampler rates.
+
+    Args:
+        spec: Entries such as ``logger=0.1`` or ``logger:message=0.01``,
+            separated by ";".
+
+    Returns:
+        Dict[Tuple[str, Optional[str]], float]: Rates keyed by logger name and
+            message, or None for the whole logger.
+
+    Raises:
+        ValueError: If an entry is malformed or a rate is not in [0, 1].
+    """
+    rates: Dict[Tuple[str, Optional[str]], float] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        target, sep, rate_text = entry.rpartition("=")
+        if not sep or not target:
+            raise ValueError(f"Invalid LOG_SAMPLING entry {entry!r}")
+        name, _, message = target.partition(":")
+        rate = float(rate_text)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sampling rate must be between 0 and 1 in {entry!r}")
+        rates[(name.strip(), message.strip() or None)] = rate
+    return rates
+
 
-        return json.dumps(log_data)
+_queue_handler: Optional[LogQueueHandler] = None
+_log_writer: Optional[BatchingLogWriter] = None
+_log_sampler: Optional[LogSampler] = None
+
+
+def _stop_log_writer() -> None:
+    """Write out queued records and stop the log writer, if one is running."""
+    global _queue_handler, _log_writer
+    if _log_writer is not None:
+        _log_writer.close()
+    _queue_handler = None
+    _log_writer = None
+
+
+def _restart_log_writer_in_child() -> None:
+    """Give a forked child its own queue and writer thread.
+
+    The writer thread does not survive a fork, and the parent's queue may
+    have been locked by it when the process forked.
+    """
+    global _log_writer
+    if _log_writer is None or _queue_handler is None:
+        return
+    log_queue: "queue.Queue[Any]" = queue.Queue(_log_writer.queue.maxsize)
+    _queue_handler.queue = log_queue
+    _log_writer = BatchingLogWriter(
+        log_queue,
+        _log_writer.handlers,
+        _log_writer.formatter,
+        max_batch=_log_writer.max_batch,
+    )
+
+
+atexit.register(_stop_log_writer)
+os.register_at_fork(after_in_child=_restart_log_writer_in_child)
 
 
 def setup_logging(
     log_level: Optional[str] = None,
     log_file: Optional[str] = None,
+    use_queue: Optional[bool] = None,
 ) -> None:
     """Set up logging configuration.
 
+    In queue mode the root logger only enqueues records, and a background
+    thread formats them and writes them to the console and log file in
+    batches.
+
     Args:
         log_level: The logging level to use (defaults to config value)
         log_file: Path to log file (defaults to config value)
+        use_queue: Whether to write logs from a background thread (defaults
+            to config value)
     """
     config = get_config()
     level = log_level or config.LOG_LEVEL
     log_file = log_file or config.LOG_FILE
+    if use_queue is None:
+        use_queue = config.LOG_QUEUE_ENABLED
 
     # Create logs directory if it doesn't exist and file logging is enabled
     if log_file and config.ENABLE_FILE_LOGGING:
@@ -93,9 +380,10 @@ def setup_logging(
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
 
-    # Remove existing handlers
+    # Remove existing handlers, writing out records queued for them
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+    _stop_log_writer()
 
     # Create JSON formatter
     formatter = JSONFormatter()
@@ -103,7 +391,7 @@ def setup_logging(
     # Add console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers: List[logging.StreamHandler] = [console_handler]
 
     # Add file handler if file logging is enabled and log file is specified
     if config.ENABLE_FILE_LOGGING and log_file:
@@ -111,7 +399,48 @@ def setup_logging(
             log_file, maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
         )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    global _queue_handler, _log_writer, _log_sampler
+    _log_sampler = None
+    if config.LOG_SAMPLING or config.LOG_ACTION_RATE_LIMIT:
+        _log_sampler = LogSampler(
+            parse_sampling_rates(config.LOG_SAMPLING),
+            action_rate_limit=config.LOG_ACTION_RATE_LIMIT,
+            action_rate_window=config.LOG_ACTION_RATE_WINDOW,
+        )
+
+    if not use_queue:
+        for handler in handlers:
+            if _log_sampler is not None:
+                handler.addFilter(_log_sampler)
+            root_logger.addHandler(handler)
+        return
+
+    log_queue: "queue.Queue[Any]" = queue.Queue(config.LOG_QUEUE_SIZE)
+    _queue_handler = LogQueueHandler(log_queue)
+    # Filter before enqueueing, so suppressed records cost no queue space.
+    if _log_sampler is not None:
+        _queue_handler.addFilter(_log_sampler)
+    _log_writer = BatchingLogWriter(
+        log_queue, handlers, formatter, max_batch=config.LOG_QUEUE_MAX_BATCH
+    )
+    root_logger.addHandler(_queue_handler)
+
+
+def get_logging_stats() -> Dict[str, int]:
+    """Get counters of log records that were not written.
+
+    Returns:
+        Dict[str, int]: Records dropped because the log queue was full, and
+            records suppressed by sampling and by the per-action rate limit.
+    """
+    stats = {"dropped": _queue_handler.dropped if _queue_handler is not None else 0}
+    if _log_sampler is not None:
+        stats.update(_log_sampler.stats())
+    else:
+        stats.update(sampled_out=0, rate_limited=0)
+    return stats
 
 
 def get_logger(name: str) -> logging.Logger:
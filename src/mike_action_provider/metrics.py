@@ -0,0 +1,522 @@
+"""Request and database metrics in the Prometheus text format.
+
+Every process records into its own in-memory registry. With ``METRICS_DIR``
+set, each process also writes a snapshot of its registry to
+``metrics-<pid>.json`` in that directory every ``METRICS_FLUSH_INTERVAL``
+seconds and when it exits, and ``/metrics`` sums the snapshots of all
+processes, so any worker can answer a scrape for the whole server. Snapshots
+of exited processes are folded into ``exited.json``, keeping their counters
+and histograms, and deleted, so the directory does not grow as workers are
+replaced and a process reusing a PID never overwrites one.
+"""
+
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from mike_action_provider.config import get_config
+from mike_action_provider.logging import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PREFIX = "action_provider_"
+
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1)
+
+# Metric name -> (type, help, histogram buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "http_requests_total": (
+        "counter",
+        "Requests handled, by endpoint, method and status code.",
+        (),
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Time spent handling requests, by endpoint and method.",
+        REQUEST_BUCKETS,
+    ),
+    "db_query_duration_seconds": (
+        "histogram",
+        "Time spent executing SQL statements, by statement type.",
+        QUERY_BUCKETS,
+    ),
+    "db_sessions_total": ("counter", "Database sessions opened by get_db.", ()),
+    "db_sessions_open": ("gauge", "Database sessions currently open.", ()),
+}
+
+# Statuses always reported by the actions gauge, even when no action has them.
+REPORTED_STATUSES = ("ACTIVE", "SUCCEEDED", "FAILED")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Cumulative snapshot of the processes that exited, in METRICS_DIR.
+EXITED_SNAPSHOT = "exited.json"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms of one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., sum, count]
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """Add to a counter or gauge.
+
+        Args:
+            name: Metric name in METRICS.
+            labels: Label names and values.
+            value: Amount to add, negative to decrease a gauge.
+        """
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Record an observation in a histogram.
+
+        Args:
+            name: Metric name in METRICS.
+            value: The observed value.
+            labels: Label names and values.
+        """
+        buckets = METRICS[name][2]
+        index = bisect.bisect_left(buckets, value)
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(buckets) + 3)
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self) -> dict:
+        """Get the recorded values in a JSON serializable form.
+
+        Returns:
+            dict: The process ID, values and histograms.
+        """
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "values": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._values.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(histogram)]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+            }
+
+    def clear(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+
+
+class SnapshotWriter:
+    """Periodically writes a registry's snapshot for other processes to read.
+
+    Args:
+        registry: The registry of this process.
+        directory: Directory shared by all worker processes.
+        interval: Seconds between writes.
+    """
+
+    def __init__(
+        self, registry: MetricsRegistry, directory: Path, interval: float
+    ) -> None:
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"metrics-{os.getpid()}.json"
+
+    def start(self) -> None:
+        """Start writing snapshots in a daemon thread.
+
+        A snapshot already at this process's path was left by an exited
+        process with the same PID, and is folded before it is replaced.
+        """
+        with _locked(self.directory, exclusive=True):
+            if self.path.exists():
+                _fold_exited(self.directory, [self.path])
+        self._thread = threading.Thread(
+            target=self._loop, name="metrics-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+    def write(self) -> None:
+        """Write the current snapshot, replacing the previous one atomically."""
+        path = self.path
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.registry.snapshot()))
+        os.replace(tmp, path)
+
+    def _loop(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot")
+
+
+_registry = MetricsRegistry()
+_writer: Optional[SnapshotWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the registry of this process."""
+    return _registry
+
+
+def _start_writer() -> None:
+    """Start the snapshot writer of this process when METRICS_DIR is set."""
+    global _writer
+    config = get_config()
+    if not config.METRICS_DIR or _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter(
+                _registry, Path(config.METRICS_DIR), config.METRICS_FLUSH_INTERVAL
+            )
+            _writer.start()
+
+
+def stop_writer() -> None:
+    """Stop the snapshot writer of this process, writing a final snapshot."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def _reset_in_child() -> None:
+    """Start a forked worker with an empty registry and its own writer.
+
+    Values recorded by the parent stay in the parent's snapshot, and the
+    writer thread did not survive the fork.
+    """
+    global _writer, _writer_lock
+    # Another thread may have held the locks when the process forked.
+    _registry._lock = threading.Lock()
+    _registry.clear()
+    _writer_lock = threading.Lock()
+    if _writer is not None:
+        _writer = None
+        _start_writer()
+
+
+atexit.register(stop_writer)
+os.register_at_fork(after_in_child=_reset_in_child)
+
+
+def _statement_type(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[:1]
+    return keyword[0].upper() if keyword else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record the duration of every statement an engine executes.
+
+    Args:
+        engine: The engine to instrument.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        _registry.observe(
+            "db_query_duration_seconds",
+            elapsed,
+            (("operation", _statement_type(statement)),),
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        starts = (
+            context.connection.info.get("query_start_time")
+            if context.connection
+            else None
+        )
+        if starts:
+            starts.pop()
+
+
+def instrument_app(app: Flask) -> None:
+    """Record the count and duration of every request an app handles.
+
+    Args:
+        app: The Flask app.
+    """
+
+    @app.before_request
+    def _start_timer():
+        g.request_start_time = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("request_start_time", None)
+        if start is not None:
+            endpoint = request.endpoint or "unmatched"
+            _registry.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                (("endpoint", endpoint), ("method", request.method)),
+            )
+            _registry.inc(
+                "http_requests_total",
+                (
+                    ("endpoint", endpoint),
+                    ("method", request.method),
+                    ("status", str(response.status_code)),
+                ),
+            )
+        return response
+
+    _start_writer()
+
+
+def record_session(opened: bool) -> None:
+    """Count a database session being opened or closed.
+
+    Args:
+        opened: True when the session was opened, False when it was closed.
+    """
+    if opened:
+        _registry.inc("db_sessions_total")
+        _registry.inc("db_sessions_open")
+    else:
+        _registry.inc("db_sessions_open", value=-1)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _locked(directory: Path, exclusive: bool) -> Generator[None, None, None]:
+    """Hold the lock on a snapshot directory.
+
+    Folding takes it exclusively, so that readers holding it shared never see
+    a snapshot both folded and still in place.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "metrics.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _read_snapshot(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _sum_snapshots(
+    snapshots: Iterable[dict],
+) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+    """Sum the values and histograms of snapshots.
+
+    Gauges of snapshots marked as not alive are left out.
+
+    Returns:
+        Tuple: Values and histograms by metric name and labels.
+    """
+    values: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["values"]:
+            if METRICS[name][0] == "gauge" and not snapshot.get("alive", True):
+                continue
+            key = (name, tuple(map(tuple, labels)))
+            values[key] = values.get(key, 0) + value
+        for name, labels, counts in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(counts))
+            for i, count in enumerate(counts):
+                total[i] += count
+    return values, histograms
+
+
+def _fold_exited(directory: Path, paths: List[Path]) -> None:
+    """Add snapshots of exited processes to EXITED_SNAPSHOT and delete them.
+
+    Snapshots of running processes other than this one are left in place.
+    The caller holds the directory lock exclusively.
+
+    Args:
+        directory: The snapshot directory.
+        paths: Snapshots to fold.
+    """
+    exited = [_read_snapshot(directory / EXITED_SNAPSHOT)]
+    folded = []
+    for path in paths:
+        snapshot = _read_snapshot(path)
+        if snapshot is None:
+            continue
+        if snapshot["pid"] != os.getpid() and _is_alive(snapshot["pid"]):
+            continue
+        snapshot["alive"] = False
+        exited.append(snapshot)
+        folded.append(path)
+    if not folded:
+        return
+
+    values, histograms = _sum_snapshots(filter(None, exited))
+    cumulative = {
+        "pid": None,
+        "alive": False,
+        "values": [
+            [name, list(labels), value] for (name, labels), value in values.items()
+        ],
+        "histograms": [
+            [name, list(labels), counts]
+            for (name, labels), counts in histograms.items()
+        ],
+    }
+    path = directory / EXITED_SNAPSHOT
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cumulative))
+    os.replace(tmp, path)
+    for path in folded:
+        path.unlink(missing_ok=True)
+
+
+def _snapshots() -> List[dict]:
+    """Get the snapshots of every process, this one's being current.
+
+    Snapshots of exited processes found on the way are folded afterwards.
+    """
+    snapshots = [_registry.snapshot()]
+    config = get_config()
+    if not config.METRICS_DIR:
+        return snapshots
+
+    directory = Path(config.METRICS_DIR)
+    own_pid = os.getpid()
+    exited = []
+    with _locked(directory, exclusive=False):
+        cumulative = _read_snapshot(directory / EXITED_SNAPSHOT)
+        if cumulative is not None:
+            snapshots.append(cumulative)
+        for path in directory.glob("metrics-*.json"):
+            snapshot = _read_snapshot(path)
+            if snapshot is None or snapshot["pid"] == own_pid:
+                continue
+            snapshot["alive"] = _is_alive(snapshot["pid"])
+            if not snapshot["alive"]:
+                exited.append(path)
+            snapshots.append(snapshot)
+
+    if exited:
+        try:
+            with _locked(directory, exclusive=True):
+                _fold_exited(directory, exited)
+        except OSError:
+            logger.exception("Failed to fold metrics snapshots of exited processes")
+    return snapshots
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for name, value in labels
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_metrics(action_counts: Dict[str, int]) -> str:
+    """Render the metrics of all processes in the Prometheus text format.
+
+    Counters and histograms are summed over every snapshot, including those
+    of exited processes so that they never decrease. Gauges are only summed
+    over running processes.
+
+    Args:
+        action_counts: Number of unreleased actions per status.
+
+    Returns:
+        str: The metrics exposition.
+    """
+    values, histograms = _sum_snapshots(_snapshots())
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        full_name = PREFIX + name
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        if kind != "histogram":
+            samples = sorted((k, v) for k, v in values.items() if k[0] == name)
+            for (_, labels), value in samples:
+                lines.append(f"{full_name}{_format_labels(labels)} {value:g}")
+            continue
+        samples = sorted((k, v) for k, v in histograms.items() if k[0] == name)
+        for (_, labels), counts in samples:
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = _format_labels((*labels, ("le", bound)))
+                lines.append(f"{full_name}_bucket{bucket_labels} {cumulative:g}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {counts[-2]:g}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {counts[-1]:g}")
+
+    full_name = PREFIX + "actions"
+    lines.append(f"# HELP {full_name} Unreleased actions, by status.")
+    lines.append(f"# TYPE {full_name} gauge")
+    counts = {status: 0 for status in REPORTED_STATUSES}
+    counts.update(action_counts)
+    for status, count in sorted(counts.items()):
+        lines.append(f"{full_name}{_format_labels([('status', status)])} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+"""Polling hints for ACTIVE actions and counters of the polling load."""
+
+import datetime as dt
+import math
+import threading
+from typing import Dict
+
+from mike_action_provider.config import get_config
+from mike_action_provider.utils import utc_now
+
+
+def seconds_until_done(start_time: dt.datetime) -> float:
+    """Get the seconds left until an ACTIVE action can be complete.
+
+    Actions complete MAX_SLEEP_TIME after they start, when next polled or, with
+    the completion sweeper enabled, on the sweep after that.
+
+    Args:
+        start_time: When the action started, naive values are taken as UTC.
+
+    Returns:
+        float: Seconds until a poll may see the action complete, 0 if it can
+            already be complete.
+    """
+    config = get_config()
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=dt.timezone.utc)
+    done_at = start_time + dt.timedelta(seconds=config.MAX_SLEEP_TIME)
+    if config.COMPLETION_SWEEPER_ENABLED:
+        done_at += dt.timedelta(seconds=config.COMPLETION_SWEEP_INTERVAL)
+    return max((done_at - utc_now()).total_seconds(), 0.0)
+
+
+def retry_after(start_time: dt.datetime) -> int:
+    """Get the Retry-After value to send for an ACTIVE action.
+
+    Args:
+        start_time: When the action started, naive values are taken as UTC.
+
+    Returns:
+        int: Whole seconds a poller should wait before polling again.
+    """
+    return max(math.ceil(seconds_until_done(start_time)), 1)
+
+
+class PollingStats:
+    """Thread-safe counters describing how status polls are spent.
+
+    ``early_polls`` counts polls of ACTIVE actions that could not be complete
+    yet, which is the load Retry-After hints remove when pollers honor them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters = {
+            "polls": 0,
+            "not_modified": 0,
+            "active_polls": 0,
+            "early_polls": 0,
+            "hinted": 0,
+        }
+
+    def record_poll(
+        self, active: bool, early: bool, not_modified: bool = False
+    ) -> None:
+        """Count a status poll.
+
+        Args:
+            active: The action was ACTIVE when polled.
+            early: The action could not be complete yet.
+            not_modified: The poll was answered with 304 Not Modified.
+        """
+        with self._lock:
+            self._counters["polls"] += 1
+            self._counters["not_modified"] += not_modified
+            self._counters["active_polls"] += active
+            self._counters["early_polls"] += early
+
+    def record_hint(self) -> None:
+        """Count a response carrying a Retry-After hint."""
+        with self._lock:
+            self._counters["hinted"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get the polling counters.
+
+        Returns:
+            Dict[str, int]: Poll, 304, ACTIVE poll, early poll and hint counts.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+
+_polling_stats = PollingStats()
+
+
+def get_polling_stats() -> PollingStats:
+    """Get the process-wide polling counters.
+
+    Returns:
+        PollingStats: The counters for this process.
+    """
+    return _polling_stats
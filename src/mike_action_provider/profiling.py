@@ -0,0 +1,138 @@
+"""Per-request SQL statement counts, DB time and query budgets."""
+
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from flask import Flask, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from mike_action_provider.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryProfile:
+    """SQL statements executed while handling one request."""
+
+    __slots__ = ("statements", "db_time", "started")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_time = 0.0
+        self.started = time.perf_counter()
+
+
+# Profile of the request handled in the current thread or task, if any.
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "current_query_profile", default=None
+)
+
+
+def parse_query_budgets(spec: str) -> Dict[str, int]:
+    """Parse SQL_QUERY_BUDGETS into statement budgets per endpoint.
+
+    Args:
+        spec: Entries such as ``apt._action_status=2``, separated by ";".
+
+    Returns:
+        Dict[str, int]: Maximum statements per request keyed by endpoint.
+
+    Raises:
+        ValueError: If an entry is malformed or a budget is negative.
+    """
+    budgets: Dict[str, int] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        endpoint, sep, budget_text = entry.rpartition("=")
+        if not sep or not endpoint:
+            raise ValueError(f"Invalid SQL_QUERY_BUDGETS entry {entry!r}")
+        budget = int(budget_text)
+        if budget < 0:
+            raise ValueError(f"Query budget must not be negative in {entry!r}")
+        budgets[endpoint.strip()] = budget
+    return budgets
+
+
+def profile_engine(engine: Engine) -> None:
+    """Add the statements an engine executes to the current request's profile.
+
+    Statements run outside a request, or in other threads such as the group
+    commit writer, are not counted.
+
+    Args:
+        engine: The engine to instrument.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        profile = _current_profile.get()
+        starts = conn.info.get("profile_start_time")
+        if profile is None or not starts:
+            return
+        profile.statements += 1
+        profile.db_time += time.perf_counter() - starts.pop()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        connection = context.connection
+        starts = connection.info.get("profile_start_time") if connection else None
+        if starts:
+            starts.pop()
+
+
+def profile_app(app: Flask, budgets: Dict[str, int]) -> None:
+    """Log the SQL statements and DB time of every request an app handles.
+
+    Each request is logged once, at info level, and at warning level when it
+    executed more statements than its endpoint's budget.
+
+    Args:
+        app: The Flask app.
+        budgets: Maximum statements per request keyed by endpoint name.
+    """
+
+    @app.before_request
+    def _start_profile():
+        _current_profile.set(QueryProfile())
+
+    @app.after_request
+    def _log_profile(response):
+        profile = _current_profile.get()
+        if profile is None:
+            return response
+        _current_profile.set(None)
+
+        endpoint = request.endpoint or "unmatched"
+        extra = {
+            "endpoint": endpoint,
+            "method": request.method,
+            "status_code": response.status_code,
+            "duration_ms": round((time.perf_counter() - profile.started) * 1000, 3),
+            "db_statements": profile.statements,
+            "db_time_ms": round(profile.db_time * 1000, 3),
+        }
+        budget = budgets.get(endpoint)
+        if budget is not None and profile.statements > budget:
+            logger.warning(
+                "Request exceeded its query budget",
+                extra={**extra, "query_budget": budget},
+            )
+        else:
+            logger.info("Request completed", extra=extra)
+        return response
+
+    @app.teardown_request
+    def _end_profile(exc):
+        # after_request is skipped for unhandled errors; do not let the next
+        # request handled by this thread inherit the profile.
+        _current_profile.set(None)
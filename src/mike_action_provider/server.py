@@ -0,0 +1,114 @@
+"""Production server: gunicorn with a preloaded app and threaded workers.
+
+The app is created once in the gunicorn arbiter and inherited by the worker
+processes it forks, so workers start without importing or configuring
+anything and share the arbiter's memory pages. State that must not cross a
+fork is reset in every child: the engine's connection pool (db.connection),
+the metrics registry and writer (metrics) and the log writer (logging).
+Background tasks are only started in the workers, after the fork, since
+their threads would not survive it. With metrics enabled and several workers,
+a METRICS_DIR is created for the server unless one is set, so that /metrics
+covers every worker.
+
+Requires the optional ``server`` dependencies.
+"""
+
+import shutil
+import tempfile
+from typing import Any, Dict
+
+from flask import Flask
+from gunicorn.app.base import BaseApplication
+
+from mike_action_provider.app import create_app
+from mike_action_provider.config import Config
+from mike_action_provider.db.connection import get_engine, init_db
+from mike_action_provider.logging import get_logger
+from mike_action_provider.metrics import stop_writer
+from mike_action_provider.tasks import start_background_tasks
+
+logger = get_logger(__name__)
+
+
+def _post_fork(server: Any, worker: Any) -> None:
+    """Start the background tasks of a newly forked worker."""
+    start_background_tasks()
+
+
+def server_options(
+    config: Config, bind: str, workers: int, threads: int
+) -> Dict[str, Any]:
+    """Get the gunicorn settings of the production server.
+
+    When metrics are enabled for several workers without a METRICS_DIR, a
+    temporary one is set in ``config``, removed when the server exits.
+
+    Args:
+        config: Configuration settings.
+        bind: Address to listen on, as HOST:PORT.
+        workers: Number of worker processes.
+        threads: Request threads per worker process.
+
+    Returns:
+        Dict[str, Any]: Gunicorn settings by name.
+
+    Raises:
+        ValueError: If several workers would each hold their own memory
+            storage.
+    """
+    if config.STORAGE_BACKEND == "memory" and workers != 1:
+        raise ValueError("The memory storage backend can only be served by 1 worker")
+    options = {
+        "bind": bind,
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": config.SERVER_TIMEOUT,
+        "post_fork": _post_fork,
+    }
+    if config.METRICS_ENABLED and workers > 1 and not config.METRICS_DIR:
+        metrics_dir = tempfile.mkdtemp(prefix="mike-action-provider-metrics-")
+        config.METRICS_DIR = metrics_dir
+
+        def _remove_metrics_dir(server: Any) -> None:
+            stop_writer()
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+        options["on_exit"] = _remove_metrics_dir
+    return options
+
+
+class ProviderServer(BaseApplication):
+    """Gunicorn application serving create_app() from preloaded workers.
+
+    Args:
+        config: Configuration settings.
+        options: Gunicorn settings, see server_options.
+    """
+
+    def __init__(self, config: Config, options: Dict[str, Any]) -> None:
+        self.config = config
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self) -> Flask:
+        if self.config.STORAGE_BACKEND == "sqlite":
+            init_db()
+        app = create_app(background_tasks=False)
+        if self.config.STORAGE_BACKEND == "sqlite":
+            # Close what loading opened rather than leave it to every child.
+            get_engine().dispose()
+        logger.info(
+            "Serving the action provider",
+            extra={
+                "bind": self.options["bind"],
+                "workers": self.options["workers"],
+                "threads": self.options["threads"],
+            },
+        )
+        return app
@@ -0,0 +1,261 @@
+"""Pluggable storage of action statuses.
+
+The blueprint reads and changes actions through a StorageBackend selected
+with ``STORAGE_BACKEND``:
+
+``sqlite``
+    The SQLite database of db.crud, shared by every worker process. Required
+    by the completion sweeper, the archive and the management commands.
+``memory``
+    Lock-striped dicts held by the process, lost when it exits. Suited to a
+    cache tier for short-lived actions and to tests and benchmarks without
+    disk I/O. Every worker process has its own actions, so run one process.
+
+Operations are made through a StorageSession opened per request, which lets
+the SQLite backend share one database session between them.
+"""
+
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    TypeVar,
+)
+
+from mike_action_provider.config import get_config
+
+T = TypeVar("T")
+
+
+class StorageSession(Protocol):
+    """Operations on stored actions, made on behalf of one request.
+
+    Rows returned by a session have the attributes of crud.STATUS_COLUMNS
+    and can be converted with hydration.row_to_action_status. Released
+    actions are never returned.
+    """
+
+    def create(self, action: Dict[str, Any]) -> None:
+        """Store a new action.
+
+        Args:
+            action: Keyword arguments of crud.create_action_status, except
+                ``db``.
+        """
+        ...
+
+    def create_many(self, actions: List[Dict[str, Any]]) -> None:
+        """Store many new actions, all or none of them.
+
+        Args:
+            actions: The create arguments of each action.
+        """
+        ...
+
+    def get(self, action_id: str) -> Optional[Any]:
+        """Get an action.
+
+        Args:
+            action_id: Unique identifier for the action.
+
+        Returns:
+            Optional[Any]: The row of the action, None if not found.
+        """
+        ...
+
+    def get_many(self, action_ids: Iterable[str]) -> List[Any]:
+        """Get many actions.
+
+        Args:
+            action_ids: Unique identifiers for the actions.
+
+        Returns:
+            List[Any]: Rows of the actions found, in no particular order.
+        """
+        ...
+
+    def get_version(self, action_id: str) -> Optional[Any]:
+        """Get what a conditional status request needs to know of an action.
+
+        Args:
+            action_id: Unique identifier for the action.
+
+        Returns:
+            Optional[Any]: The ``version``, ``status`` and ``start_time`` of
+                the action, None if not found.
+        """
+        ...
+
+    def lookup(self, action_id: str, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        """Get a value built from an action through the backend's read cache.
+
+        Args:
+            action_id: Unique identifier for the action.
+            loader: Builds the value, called unless it is cached.
+
+        Returns:
+            Optional[T]: The cached or freshly loaded value.
+        """
+        ...
+
+    def get_principals(
+        self, action_id: str, roles: Iterable[str], identities: Iterable[str]
+    ) -> Set[str]:
+        """Get the principals that may grant access to an action.
+
+        Args:
+            action_id: Unique identifier for the action.
+            roles: Roles granting the requested access, e.g. MONITOR_ROLES.
+            identities: Identity principals of the caller.
+
+        Returns:
+            Set[str]: Matching identity principals and all group principals.
+        """
+        ...
+
+    def get_principals_for_actions(
+        self,
+        action_ids: Iterable[str],
+        roles: Iterable[str],
+        identities: Iterable[str],
+    ) -> Dict[str, Set[str]]:
+        """Get the principals that may grant access to each of many actions.
+
+        Args:
+            action_ids: Unique identifiers for the actions.
+            roles: Roles granting the requested access, e.g. MONITOR_ROLES.
+            identities: Identity principals of the caller.
+
+        Returns:
+            Dict[str, Set[str]]: Principals by action ID, leaving out actions
+                without any.
+        """
+        ...
+
+    def transition(
+        self, action_id: str, from_statuses: Iterable[str], **values: Any
+    ) -> Optional[Any]:
+        """Change an action only if it is in one of the given statuses.
+
+        The check and the change are atomic and the version of the action is
+        incremented.
+
+        Args:
+            action_id: Unique identifier for the action.
+            from_statuses: Statuses the action must be in.
+            **values: Fields to change and their new values.
+
+        Returns:
+            Optional[Any]: The row of the changed action, None if the action
+                does not exist or is in another status.
+        """
+        ...
+
+    def list(
+        self,
+        principals: Iterable[str],
+        roles: Iterable[str],
+        statuses: Iterable[str],
+    ) -> List[Any]:
+        """List the actions on which any principal holds any role.
+
+        Args:
+            principals: Principal URNs to look up.
+            roles: Roles to match, e.g. MONITOR_ROLES.
+            statuses: Action statuses to include.
+
+        Returns:
+            List[Any]: Rows of the matching actions, oldest first.
+        """
+        ...
+
+    def purge(self, limit: int) -> int:
+        """Delete released actions and completed actions past release_after.
+
+        Args:
+            limit: Maximum number of actions deleted.
+
+        Returns:
+            int: Number of actions deleted.
+        """
+        ...
+
+    def count(self) -> Dict[str, int]:
+        """Count the actions in each status.
+
+        Returns:
+            Dict[str, int]: Number of actions per status.
+        """
+        ...
+
+
+class StorageBackend(Protocol):
+    """Where action statuses are stored."""
+
+    def session(self) -> ContextManager[StorageSession]:
+        """Open a session for the operations of one request.
+
+        Returns:
+            ContextManager[StorageSession]: Closes the session on exit.
+        """
+        ...
+
+
+def _build_sqlite() -> StorageBackend:
+    from .sqlite import SQLiteStorage
+
+    return SQLiteStorage()
+
+
+def _build_memory() -> StorageBackend:
+    from .memory import MemoryStorage
+
+    return MemoryStorage(stripes=get_config().STORAGE_MEMORY_STRIPES)
+
+
+# Factories of the storage backends, keyed by STORAGE_BACKEND value.
+STORAGE_BACKENDS: Dict[str, Callable[[], StorageBackend]] = {
+    "sqlite": _build_sqlite,
+    "memory": _build_memory,
+}
+
+# Features that work on the SQLite database directly.
+_SQLITE_ONLY_SETTINGS = ("COMPLETION_SWEEPER_ENABLED", "ARCHIVE_ENABLED")
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> StorageBackend:
+    """Get the storage backend selected by STORAGE_BACKEND.
+
+    The backend is created once per process.
+
+    Returns:
+        StorageBackend: The storage backend.
+
+    Raises:
+        ValueError: If the backend is not known, or settings only supported
+            by the sqlite backend are enabled along with another one.
+    """
+    config = get_config()
+    name = config.STORAGE_BACKEND
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend {name!r}, "
+            f"expected one of {sorted(STORAGE_BACKENDS)}"
+        )
+    if name != "sqlite":
+        enabled = [
+            setting for setting in _SQLITE_ONLY_SETTINGS if getattr(config, setting)
+        ]
+        if enabled:
+            raise ValueError(
+                f"The sqlite storage backend is required by {', '.join(enabled)}"
+            )
+    return STORAGE_BACKENDS[name]()
@@ -0,0 +1,327 @@
+"""In-memory storage backend with lock striping.
+
+Actions are spread over a fixed number of stripes by the hash of their ID,
+each a dict guarded by its own lock, so that requests for different actions
+rarely wait on each other. Every stripe also indexes its actions by
+principal for listing. Run requests are not kept; only the ``utc_offset`` of
+their body is, which is all that completing an action needs.
+"""
+
+import datetime as dt
+from contextlib import ExitStack, contextmanager
+from enum import Enum
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from mike_action_provider.db.crud import COMPLETE_STATUSES, GROUP_PRINCIPAL_PREFIX
+from mike_action_provider.db.payloads import request_utc_offset
+from mike_action_provider.hydration import parse_release_after
+from mike_action_provider.utils import utc_now
+
+from . import T
+
+
+class StatusRow(NamedTuple):
+    """An action, with the attributes of the rows selected with STATUS_COLUMNS."""
+
+    action_id: str
+    status: str
+    creator_id: str
+    label: Optional[str]
+    monitor_by: str
+    manage_by: str
+    start_time: dt.datetime
+    completion_time: Optional[dt.datetime]
+    release_after: str
+    display_status: str
+    details: Dict[str, Any]
+    version: int
+    utc_offset: Optional[int]
+
+
+class _StoredAction:
+    """An action and what is only needed to authorize and purge it."""
+
+    __slots__ = ("row", "principals", "is_released")
+
+    def __init__(self, row: StatusRow, principals: FrozenSet[Tuple[str, str]]) -> None:
+        self.row = row
+        self.principals = principals
+        self.is_released = False
+
+
+class _Stripe:
+    """The actions whose ID hashes to one stripe, and their principal index."""
+
+    __slots__ = ("lock", "actions", "by_principal")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.actions: Dict[str, _StoredAction] = {}
+        self.by_principal: Dict[str, Set[str]] = {}
+
+    def add(self, action: _StoredAction) -> None:
+        action_id = action.row.action_id
+        self.actions[action_id] = action
+        for _, principal in action.principals:
+            self.by_principal.setdefault(principal, set()).add(action_id)
+
+    def remove(self, action_id: str) -> None:
+        action = self.actions.pop(action_id)
+        for _, principal in action.principals:
+            action_ids = self.by_principal.get(principal)
+            if action_ids is not None:
+                action_ids.discard(action_id)
+                if not action_ids:
+                    del self.by_principal[principal]
+
+
+def _naive_utc(value: Any) -> Any:
+    """Store datetimes as naive UTC, as SQLite returns them."""
+    if isinstance(value, dt.datetime) and value.tzinfo is not None:
+        return value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _text(value: Any) -> Any:
+    """Store enum members, such as ActionStatusValue, as their value."""
+    return value.value if isinstance(value, Enum) else value
+
+
+def _principals(
+    creator_id: str, monitor_by: str, manage_by: str
+) -> FrozenSet[Tuple[str, str]]:
+    """Get the (role, principal) pairs of an action from its comma-joined lists."""
+    pairs = {("creator_id", creator_id)}
+    for role, principals in (("monitor_by", monitor_by), ("manage_by", manage_by)):
+        pairs.update(
+            (role, principal) for principal in principals.split(",") if principal
+        )
+    return frozenset(pairs)
+
+
+def _new_action(action: Dict[str, Any], now: dt.datetime) -> _StoredAction:
+    """Build a stored action from create_action_status arguments."""
+    row = StatusRow(
+        action_id=action["action_id"],
+        status=_text(action["status"]),
+        creator_id=action["creator_id"],
+        label=action.get("label"),
+        monitor_by=action["monitor_by"],
+        manage_by=action["manage_by"],
+        start_time=now,
+        completion_time=None,
+        release_after=action["release_after"],
+        display_status=_text(action["display_status"]),
+        details=action.get("details") or {},
+        version=1,
+        utc_offset=request_utc_offset(action["request_json"]),
+    )
+    principals = _principals(
+        action["creator_id"], action["monitor_by"], action["manage_by"]
+    )
+    return _StoredAction(row, principals)
+
+
+class MemoryStorage:
+    """StorageBackend and StorageSession holding actions in this process.
+
+    Sessions need no state of their own, so the backend is its own session.
+
+    Args:
+        stripes: Number of independently locked partitions.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        if stripes < 1:
+            raise ValueError("A memory storage needs at least one stripe")
+        self._stripes = [_Stripe() for _ in range(stripes)]
+
+    @contextmanager
+    def session(self) -> Generator["MemoryStorage", None, None]:
+        yield self
+
+    def _stripe(self, action_id: str) -> _Stripe:
+        return self._stripes[hash(action_id) % len(self._stripes)]
+
+    def _live(self, stripe: _Stripe, action_id: str) -> Optional[_StoredAction]:
+        action = stripe.actions.get(action_id)
+        if action is None or action.is_released:
+            return None
+        return action
+
+    def create(self, action: Dict[str, Any]) -> None:
+        self.create_many([action])
+
+    def create_many(self, actions: List[Dict[str, Any]]) -> None:
+        now = _naive_utc(utc_now())
+        new_actions = [_new_action(action, now) for action in actions]
+        by_stripe: Dict[int, List[_StoredAction]] = {}
+        for action in new_actions:
+            index = hash(action.row.action_id) % len(self._stripes)
+            by_stripe.setdefault(index, []).append(action)
+
+        # Locks are always taken in stripe order, so batches cannot deadlock.
+        with ExitStack() as stack:
+            for index in sorted(by_stripe):
+                stack.enter_context(self._stripes[index].lock)
+            for index, stripe_actions in by_stripe.items():
+                stripe = self._stripes[index]
+                for action in stripe_actions:
+                    if action.row.action_id in stripe.actions:
+                        raise ValueError(
+                            f"Action {action.row.action_id} already exists"
+                        )
+            for index, stripe_actions in by_stripe.items():
+                for action in stripe_actions:
+                    self._stripes[index].add(action)
+
+    def get(self, action_id: str) -> Optional[StatusRow]:
+        stripe = self._stripe(action_id)
+        with stripe.lock:
+            action = self._live(stripe, action_id)
+            return action.row if action is not None else None
+
+    def get_many(self, action_ids: Iterable[str]) -> List[StatusRow]:
+        rows = []
+        for action_id in action_ids:
+            row = self.get(action_id)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def get_version(self, action_id: str) -> Optional[StatusRow]:
+        return self.get(action_id)
+
+    def lookup(self, action_id: str, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        # Reads are as cheap as a cache hit already.
+        return loader()
+
+    def get_principals(
+        self, action_id: str, roles: Iterable[str], identities: Iterable[str]
+    ) -> Set[str]:
+        return self.get_principals_for_actions([action_id], roles, identities).get(
+            action_id, set()
+        )
+
+    def get_principals_for_actions(
+        self,
+        action_ids: Iterable[str],
+        roles: Iterable[str],
+        identities: Iterable[str],
+    ) -> Dict[str, Set[str]]:
+        roles, identities = set(roles), set(identities)
+        principals: Dict[str, Set[str]] = {}
+        for action_id in action_ids:
+            stripe = self._stripe(action_id)
+            with stripe.lock:
+                action = self._live(stripe, action_id)
+                pairs = action.principals if action is not None else ()
+            matching = {
+                principal
+                for role, principal in pairs
+                if role in roles
+                and (
+                    principal in identities
+                    or principal.startswith(GROUP_PRINCIPAL_PREFIX)
+                )
+            }
+            if matching:
+                principals[action_id] = matching
+        return principals
+
+    def transition(
+        self, action_id: str, from_statuses: Iterable[str], **values: Any
+    ) -> Optional[StatusRow]:
+        from_statuses = set(from_statuses)
+        is_released = values.pop("is_released", False)
+        values = {key: _naive_utc(_text(value)) for key, value in values.items()}
+        stripe = self._stripe(action_id)
+        with stripe.lock:
+            action = self._live(stripe, action_id)
+            if action is None or action.row.status not in from_statuses:
+                return None
+            action.row = action.row._replace(version=action.row.version + 1, **values)
+            action.is_released = is_released
+            return action.row
+
+    def list(
+        self,
+        principals: Iterable[str],
+        roles: Iterable[str],
+        statuses: Iterable[str],
+    ) -> List[StatusRow]:
+        principals, roles = set(principals), set(roles)
+        statuses = set(statuses)
+        rows = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                action_ids: Set[str] = set()
+                for principal in principals:
+                    action_ids.update(stripe.by_principal.get(principal, ()))
+                for action_id in action_ids:
+                    action = stripe.actions[action_id]
+                    if (
+                        not action.is_released
+                        and action.row.status in statuses
+                        and any(
+                            role in roles and principal in principals
+                            for role, principal in action.principals
+                        )
+                    ):
+                        rows.append(action.row)
+        rows.sort(key=lambda row: row.start_time)
+        return rows
+
+    def purge(self, limit: int) -> int:
+        now = _naive_utc(utc_now())
+        purged = 0
+        for stripe in self._stripes:
+            if purged >= limit:
+                break
+            with stripe.lock:
+                action_ids = [
+                    action_id
+                    for action_id, action in stripe.actions.items()
+                    if self._purgeable(action, now)
+                ][: limit - purged]
+                for action_id in action_ids:
+                    stripe.remove(action_id)
+            purged += len(action_ids)
+        return purged
+
+    @staticmethod
+    def _purgeable(action: _StoredAction, now: dt.datetime) -> bool:
+        """Check whether an action is released or past its release_after."""
+        if action.is_released:
+            return True
+        row = action.row
+        if row.status not in COMPLETE_STATUSES:
+            return False
+        try:
+            cutoff = now - parse_release_after(row.release_after)
+        except (ValueError, TypeError, OverflowError):
+            return False
+        return (row.completion_time or row.start_time) < cutoff
+
+    def count(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                for action in stripe.actions.values():
+                    if not action.is_released:
+                        status = action.row.status
+                        counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,110 @@
+"""Storage backend on the SQLite database of db.crud."""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Set
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from mike_action_provider.cache import get_status_cache
+from mike_action_provider.db.connection import get_db
+from mike_action_provider.db.crud import (
+    count_action_statuses,
+    create_action_status,
+    create_action_statuses,
+    get_action_status_row,
+    get_action_status_rows,
+    get_action_status_version,
+    get_authorizing_principals,
+    get_authorizing_principals_for_actions,
+    get_purgeable_action_ids,
+    list_action_statuses_for_principals,
+    purge_action_statuses,
+    restore_archived_action,
+    transition_action_status,
+)
+
+from . import T
+
+
+class SQLiteSession:
+    """StorageSession making every operation through one database session.
+
+    Status lookups go through the status cache when it is enabled, and
+    archived actions are read from the archive and restored into the
+    database when a transition applies to them.
+
+    Args:
+        db: Database session.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def create(self, action: Dict[str, Any]) -> None:
+        create_action_status(db=self.db, **action)
+
+    def create_many(self, actions: List[Dict[str, Any]]) -> None:
+        create_action_statuses(self.db, actions)
+
+    def get(self, action_id: str) -> Optional[Row]:
+        return get_action_status_row(self.db, action_id)
+
+    def get_many(self, action_ids: Iterable[str]) -> List[Row]:
+        return get_action_status_rows(self.db, action_ids)
+
+    def get_version(self, action_id: str) -> Optional[Row]:
+        return get_action_status_version(self.db, action_id)
+
+    def lookup(self, action_id: str, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        cache = get_status_cache()
+        if cache is None:
+            return loader()
+        return cache.lookup(self.db, action_id, loader)
+
+    def get_principals(
+        self, action_id: str, roles: Iterable[str], identities: Iterable[str]
+    ) -> Set[str]:
+        return get_authorizing_principals(self.db, action_id, roles, identities)
+
+    def get_principals_for_actions(
+        self,
+        action_ids: Iterable[str],
+        roles: Iterable[str],
+        identities: Iterable[str],
+    ) -> Dict[str, Set[str]]:
+        return get_authorizing_principals_for_actions(
+            self.db, action_ids, roles, identities
+        )
+
+    def transition(
+        self, action_id: str, from_statuses: Iterable[str], **values: Any
+    ) -> Optional[Row]:
+        from_statuses = list(from_statuses)
+        row = transition_action_status(self.db, action_id, from_statuses, **values)
+        if row is None and restore_archived_action(self.db, action_id, from_statuses):
+            row = transition_action_status(self.db, action_id, from_statuses, **values)
+        return row
+
+    def list(
+        self,
+        principals: Iterable[str],
+        roles: Iterable[str],
+        statuses: Iterable[str],
+    ) -> List[Row]:
+        return list_action_statuses_for_principals(self.db, principals, roles, statuses)
+
+    def purge(self, limit: int) -> int:
+        return purge_action_statuses(self.db, get_purgeable_action_ids(self.db, limit))
+
+    def count(self) -> Dict[str, int]:
+        return count_action_statuses(self.db)
+
+
+class SQLiteStorage:
+    """StorageBackend on the database at DB_PATH."""
+
+    @contextmanager
+    def session(self) -> Generator[SQLiteSession, None, None]:
+        with get_db() as db:
+            yield SQLiteSession(db)
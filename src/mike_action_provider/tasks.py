@@ -0,0 +1,387 @@
+"""Background tasks run by the action provider."""
+
+import os
+import socket
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from mike_action_provider.config import get_config
+from mike_action_provider.db.archive import get_archive
+from mike_action_provider.db.connection import get_db
+from mike_action_provider.db.crud import (
+    acquire_lease,
+    archive_actions,
+    complete_expired_actions,
+    get_archivable_actions,
+    get_purgeable_action_ids,
+    incremental_vacuum,
+    purge_action_statuses,
+    purge_archived_actions,
+    release_lease,
+    remove_unreferenced_segments,
+)
+from mike_action_provider.logging import get_logger
+from mike_action_provider.storage import get_storage
+from mike_action_provider.utils import utc_now
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask(ABC):
+    """Periodic job run in a daemon thread of the process that starts it.
+
+    Args:
+        interval: Seconds between ticks.
+    """
+
+    name: str = ""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start running the task in a daemon thread."""
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the task."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @abstractmethod
+    def tick(self) -> bool:
+        """Run the job once.
+
+        Returns:
+            bool: True if the job ran.
+        """
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Background task failed", extra={"task": self.name})
+            self._stopping.wait(self.interval)
+
+
+class LeasedTask(PeriodicTask):
+    """Periodic job run in a daemon thread by whichever process holds its lease.
+
+    Every process may start the task; on each tick it tries to acquire or
+    renew the lease stored in the database and only runs the job if it holds
+    it. A holder that dies stops renewing, and another process takes over once
+    the lease expires.
+
+    Args:
+        interval: Seconds between ticks.
+        lease_ttl: Seconds the lease is held without renewal. Must be longer
+            than the interval.
+    """
+
+    lease_name: str = ""
+
+    def __init__(self, interval: float, lease_ttl: float) -> None:
+        super().__init__(interval)
+        self.lease_ttl = lease_ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @property
+    def name(self) -> str:
+        return self.lease_name
+
+    def stop(self) -> None:
+        """Stop the task and give up its lease."""
+        super().stop()
+        with get_db() as db:
+            release_lease(db, self.lease_name, self.holder)
+
+    def tick(self) -> bool:
+        """Run the job once if this process holds the lease.
+
+        Returns:
+            bool: True if the job ran.
+        """
+        with get_db() as db:
+            if not acquire_lease(db, self.lease_name, self.holder, self.lease_ttl):
+                return False
+            self.run(db)
+        return True
+
+    @abstractmethod
+    def run(self, db: Session) -> None:
+        """Run the job.
+
+        Args:
+            db: Database session.
+        """
+
+
+class CompletionSweeper(LeasedTask):
+    """Complete all expired ACTIVE actions with one UPDATE per tick.
+
+    Args:
+        interval: Seconds between sweeps.
+        lease_ttl: Seconds the sweeper lease is held without renewal.
+        max_sleep_time: Seconds after its start time at which an action is done.
+    """
+
+    lease_name = "completion-sweeper"
+
+    def __init__(self, interval: float, lease_ttl: float, max_sleep_time: int) -> None:
+        super().__init__(interval, lease_ttl)
+        self.max_sleep_time = max_sleep_time
+
+    def run(self, db: Session) -> None:
+        action_ids = complete_expired_actions(db, self.max_sleep_time)
+        if action_ids:
+            logger.info(
+                "Completed expired actions", extra={"completed": len(action_ids)}
+            )
+
+
+class BatchedTask(LeasedTask):
+    """LeasedTask working through its job in short, paced transactions.
+
+    Each run processes up to ``max_batches`` batches of ``batch_size``
+    actions, each in its own short transaction followed by a pause, so that
+    writes from requests are never kept waiting for long. Freed pages are
+    returned to the file system with incremental vacuum when the database
+    allows it.
+
+    Args:
+        interval: Seconds between runs.
+        lease_ttl: Seconds the lease is held without renewal. Must be longer
+            than a whole run, including its pauses.
+        batch_size: Actions processed per transaction.
+        batch_pause: Seconds to wait between batches.
+        max_batches: Maximum batches per run, 0 for no limit.
+        vacuum_pages: Free pages released after each batch, 0 to skip.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        lease_ttl: float,
+        batch_size: int,
+        batch_pause: float,
+        max_batches: int,
+        vacuum_pages: int,
+    ) -> None:
+        super().__init__(interval, lease_ttl)
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches = max_batches
+        self.vacuum_pages = vacuum_pages
+
+    def run_batches(
+        self, db: Session, batch: Callable[[Session], int]
+    ) -> Tuple[int, int]:
+        """Run batches until one comes up short or the batch limit is hit.
+
+        Args:
+            db: Database session.
+            batch: Processes up to batch_size actions and returns how many.
+
+        Returns:
+            Tuple[int, int]: Number of actions processed and of pages released.
+        """
+        processed = released_pages = batches = 0
+        while not self._stopping.is_set():
+            count = batch(db)
+            processed += count
+            if self.vacuum_pages:
+                released_pages += incremental_vacuum(db, self.vacuum_pages)
+            batches += 1
+            if count < self.batch_size or batches == self.max_batches:
+                break
+            self._stopping.wait(self.batch_pause)
+        return processed, released_pages
+
+
+class RetentionPurger(BatchedTask):
+    """Delete released actions and completed actions past their release_after.
+
+    Archived actions past their release_after are dropped from the archive
+    index, and segment files left without any indexed action are deleted.
+    """
+
+    lease_name = "retention-purger"
+
+    def run(self, db: Session) -> None:
+        purged, released_pages = self.purge(db)
+        if purged:
+            logger.info(
+                "Purged actions",
+                extra={"purged": purged, "released_pages": released_pages},
+            )
+
+    def purge(self, db: Session) -> Tuple[int, int]:
+        """Delete purgeable actions in batches.
+
+        Args:
+            db: Database session.
+
+        Returns:
+            Tuple[int, int]: Number of actions deleted and of pages released.
+        """
+        purged, released_pages = self.run_batches(db, self._purge_batch)
+        archived, archive_pages = self.run_batches(
+            db, lambda db: purge_archived_actions(db, self.batch_size)
+        )
+        if archived:
+            remove_unreferenced_segments(db)
+        return purged + archived, released_pages + archive_pages
+
+    def _purge_batch(self, db: Session) -> int:
+        action_ids = get_purgeable_action_ids(db, self.batch_size)
+        purge_action_statuses(db, action_ids)
+        return len(action_ids)
+
+
+class ActionArchiver(BatchedTask):
+    """Move completed actions to the compressed segment archive.
+
+    Each batch is appended to the archive as one compressed member and the
+    actions are then replaced by their index entries in one transaction.
+
+    Args:
+        archive_after: Seconds after their completion at which actions are
+            archived.
+        **kwargs: Passed to BatchedTask.
+    """
+
+    lease_name = "action-archiver"
+
+    def __init__(self, archive_after: float, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.archive_after = archive_after
+
+    def run(self, db: Session) -> None:
+        archived, released_pages = self.archive(db)
+        if archived:
+            logger.info(
+                "Archived actions",
+                extra={"archived": archived, "released_pages": released_pages},
+            )
+
+    def archive(self, db: Session) -> Tuple[int, int]:
+        """Archive cold actions in batches.
+
+        Args:
+            db: Database session.
+
+        Returns:
+            Tuple[int, int]: Number of actions archived and of pages released.
+        """
+        cutoff = utc_now() - timedelta(seconds=self.archive_after)
+        return self.run_batches(db, lambda db: self._archive_batch(db, cutoff))
+
+    def _archive_batch(self, db: Session, cutoff: datetime) -> int:
+        records = get_archivable_actions(db, cutoff, self.batch_size)
+        if not records:
+            return 0
+        locations = get_archive().append(records)
+        return archive_actions(db, records, locations)
+
+
+class StoragePurger(PeriodicTask):
+    """Purge a storage backend held by this process, see RetentionPurger.
+
+    Storage that is not shared between processes needs no lease.
+
+    Args:
+        interval: Seconds between purges.
+        batch_size: Actions deleted per batch.
+    """
+
+    name = "storage-purger"
+
+    def __init__(self, interval: float, batch_size: int) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+
+    def tick(self) -> bool:
+        purged = 0
+        with get_storage().session() as store:
+            while not self._stopping.is_set():
+                count = store.purge(self.batch_size)
+                purged += count
+                if count < self.batch_size:
+                    break
+        if purged:
+            logger.info("Purged actions", extra={"purged": purged})
+        return True
+
+
+_tasks: List[PeriodicTask] = []
+_tasks_pid: Optional[int] = None
+
+
+def start_background_tasks() -> List[PeriodicTask]:
+    """Start the background tasks enabled in the configuration.
+
+    Tasks are started once per process. Storage backends other than sqlite
+    only support retention, which then purges the storage of this process.
+
+    Returns:
+        List[PeriodicTask]: The running tasks.
+    """
+    global _tasks, _tasks_pid
+    if _tasks_pid == os.getpid():
+        return _tasks
+
+    config = get_config()
+    tasks: List[PeriodicTask] = []
+    if config.COMPLETION_SWEEPER_ENABLED:
+        tasks.append(
+            CompletionSweeper(
+                interval=config.COMPLETION_SWEEP_INTERVAL,
+                lease_ttl=config.COMPLETION_SWEEP_LEASE_TTL,
+                max_sleep_time=config.MAX_SLEEP_TIME,
+            )
+        )
+    if config.RETENTION_ENABLED and config.STORAGE_BACKEND != "sqlite":
+        tasks.append(
+            StoragePurger(
+                interval=config.RETENTION_INTERVAL,
+                batch_size=config.RETENTION_BATCH_SIZE,
+            )
+        )
+    elif config.RETENTION_ENABLED:
+        tasks.append(
+            RetentionPurger(
+                interval=config.RETENTION_INTERVAL,
+                lease_ttl=config.RETENTION_LEASE_TTL,
+                batch_size=config.RETENTION_BATCH_SIZE,
+                batch_pause=config.RETENTION_BATCH_PAUSE,
+                max_batches=config.RETENTION_MAX_BATCHES,
+                vacuum_pages=config.RETENTION_VACUUM_PAGES,
+            )
+        )
+    if config.ARCHIVE_ENABLED:
+        tasks.append(
+            ActionArchiver(
+                archive_after=config.ARCHIVE_AFTER,
+                interval=config.ARCHIVE_INTERVAL,
+                lease_ttl=config.ARCHIVE_LEASE_TTL,
+                batch_size=config.ARCHIVE_BATCH_SIZE,
+                batch_pause=config.ARCHIVE_BATCH_PAUSE,
+                max_batches=config.ARCHIVE_MAX_BATCHES,
+                vacuum_pages=config.RETENTION_VACUUM_PAGES,
+            )
+        )
+    for task in tasks:
+        task.start()
+
+    _tasks, _tasks_pid = tasks, os.getpid()
+    return _tasks
@@ -0,0 +1,14 @@
+"""Shared test setup.
+
+The engine is created when db.connection is imported, so the database and
+the archive must be pointed at temporary files before any test imports the
+package.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+_DATA_DIR = tempfile.mkdtemp(prefix="mike-action-provider-tests-")
+os.environ["DB_PATH"] = str(Path(_DATA_DIR) / "actions.db")
+os.environ["ARCHIVE_DIR"] = str(Path(_DATA_DIR) / "archive")
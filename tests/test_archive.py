@@ -0,0 +1,115 @@
+"""Tests for archiving cold actions."""
+
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from mike_action_provider.db import crud
+from mike_action_provider.db.archive import get_archive
+from mike_action_provider.db.connection import get_db, init_db
+from mike_action_provider.db.models import ActionStatus, ArchivedAction
+from mike_action_provider.tasks import ActionArchiver
+from mike_action_provider.utils import utc_now
+
+
+CREATOR = "urn:globus:auth:identity:creator"
+
+
+def _completed_action() -> str:
+    action_id = str(uuid.uuid4())
+    with get_db() as db:
+        crud.create_action_status(
+            db,
+            action_id=action_id,
+            status="SUCCEEDED",
+            creator_id=CREATOR,
+            monitor_by=CREATOR,
+            manage_by=CREATOR,
+            release_after="P30D",
+            display_status="done",
+            request_json={"request_id": "archive-test", "body": {}},
+        )
+        db.execute(
+            update(ActionStatus)
+            .where(ActionStatus.action_id == action_id)
+            .values(start_time=utc_now() - timedelta(days=2))
+        )
+        db.commit()
+    return action_id
+
+
+def test_action_released_while_archiving_is_not_archived():
+    init_db()
+    released, kept = _completed_action(), _completed_action()
+
+    with get_db() as db:
+        records = [
+            record
+            for record in crud.get_archivable_actions(db, utc_now(), 1000)
+            if record["action_id"] in (released, kept)
+        ]
+        assert len(records) == 2
+
+        # Released by a request between reading and archiving the batch.
+        with get_db() as other:
+            assert crud.transition_action_status(
+                other, released, crud.COMPLETE_STATUSES, is_released=True
+            )
+            assert crud.get_action_status_row(other, released) is None
+
+        locations = get_archive().append(records)
+        assert crud.archive_actions(db, records, locations) == 1
+
+    with get_db() as db:
+        assert crud.get_action_status_row(db, released) is None
+        assert crud.get_action_status_row(db, kept).status == "SUCCEEDED"
+        assert set(
+            db.scalars(
+                select(ArchivedAction.action_id).where(
+                    ArchivedAction.action_id.in_([released, kept])
+                )
+            )
+        ) == {kept}
+
+
+def test_archived_actions_are_still_listed_and_counted():
+    init_db()
+    action_id = _completed_action()
+    with get_db() as db:
+        counts = crud.count_action_statuses(db)
+
+    archiver = ActionArchiver(
+        archive_after=3600,
+        interval=1,
+        lease_ttl=10,
+        batch_size=1000,
+        batch_pause=0,
+        max_batches=0,
+        vacuum_pages=0,
+    )
+    with get_db() as db:
+        archiver.archive(db)
+        assert db.get(ArchivedAction, action_id) is not None
+
+        listed = crud.list_action_statuses_for_principals(
+            db, [CREATOR], crud.MONITOR_ROLES, ["SUCCEEDED"]
+        )
+        assert action_id in {row.action_id for row in listed}
+        assert [row.start_time for row in listed] == sorted(
+            row.start_time for row in listed
+        )
+        assert not crud.list_action_statuses_for_principals(
+            db, [CREATOR], crud.MONITOR_ROLES, ["FAILED"]
+        )
+        assert crud.count_action_statuses(db) == counts
+
+        assert crud.restore_archived_action(db, action_id, crud.COMPLETE_STATUSES)
+        crud.transition_action_status(
+            db, action_id, crud.COMPLETE_STATUSES, is_released=True
+        )
+        listed = crud.list_action_statuses_for_principals(
+            db, [CREATOR], crud.MONITOR_ROLES, ["SUCCEEDED"]
+        )
+        assert action_id not in {row.action_id for row in listed}
+        assert crud.count_action_statuses(db)["SUCCEEDED"] == counts["SUCCEEDED"] - 1
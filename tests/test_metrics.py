@@ -0,0 +1,94 @@
+"""Tests for metrics aggregated over worker processes."""
+
+import dataclasses
+import json
+import os
+import subprocess
+
+import pytest
+
+from mike_action_provider import metrics
+from mike_action_provider.config import get_config
+from mike_action_provider.metrics import (
+    EXITED_SNAPSHOT,
+    MetricsRegistry,
+    SnapshotWriter,
+    render_metrics,
+)
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+def _write_snapshot(path, pid, requests, sessions_open=0):
+    path.write_text(
+        json.dumps(
+            {
+                "pid": pid,
+                "values": [
+                    ["db_sessions_total", [], requests],
+                    ["db_sessions_open", [], sessions_open],
+                ],
+                "histograms": [],
+            }
+        )
+    )
+
+
+def _sample(text, name):
+    for line in text.splitlines():
+        if line.startswith(metrics.PREFIX + name + " "):
+            return float(line.split()[1])
+    return 0.0
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_config(), "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_registry", MetricsRegistry())
+    return tmp_path
+
+
+def test_exited_snapshots_are_folded_and_removed(metrics_dir):
+    for _ in range(3):
+        pid = _exited_pid()
+        _write_snapshot(metrics_dir / f"metrics-{pid}.json", pid, 5, sessions_open=2)
+
+    first = render_metrics({})
+    assert _sample(first, "db_sessions_total") == 15
+    assert _sample(first, "db_sessions_open") == 0
+    assert list(metrics_dir.glob("metrics-*.json")) == []
+    assert (metrics_dir / EXITED_SNAPSHOT).exists()
+
+    pid = _exited_pid()
+    _write_snapshot(metrics_dir / f"metrics-{pid}.json", pid, 1)
+    assert _sample(render_metrics({}), "db_sessions_total") == 16
+    assert _sample(render_metrics({}), "db_sessions_total") == 16
+
+
+def test_reused_pid_does_not_overwrite_an_exited_snapshot(metrics_dir):
+    registry = metrics.get_registry()
+    registry.inc("db_sessions_total")
+    writer = SnapshotWriter(registry, metrics_dir, interval=60)
+    # Left by an exited process that had the PID of this one.
+    _write_snapshot(writer.path, os.getpid(), 7)
+
+    writer.start()
+    writer.stop()
+
+    assert _sample(render_metrics({}), "db_sessions_total") == 8
+
+
+def test_serve_shares_a_metrics_dir_between_workers(monkeypatch):
+    server = pytest.importorskip("mike_action_provider.server")
+    config = dataclasses.replace(get_config(), METRICS_ENABLED=True, METRICS_DIR="")
+    monkeypatch.setattr(server, "stop_writer", lambda: None)
+
+    options = server.server_options(config, "127.0.0.1:0", workers=2, threads=1)
+
+    assert os.path.isdir(config.METRICS_DIR)
+    options["on_exit"](None)
+    assert not os.path.exists(config.METRICS_DIR)
@@ -0,0 +1,85 @@
+"""Tests for the group-commit writer."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from mike_action_provider.config import get_config
+from mike_action_provider.db import write_queue
+from mike_action_provider.db.connection import build_engine
+from mike_action_provider.db.write_queue import GroupCommitWriter, get_writer
+
+
+class _Stop(BaseException):
+    """Escapes the writer's error handling and stops its thread."""
+
+
+def _stop(session):
+    raise _Stop()
+
+
+def _submit(writer, operation, timeout=5):
+    """Submit from another thread, failing the test instead of hanging."""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(writer.submit, operation).result(timeout=timeout)
+
+
+@pytest.fixture
+def unpooled_writer(tmp_path):
+    engine = build_engine(tmp_path / "writer.db", profile="concurrent", pooled=False)
+    writer = GroupCommitWriter(sessionmaker(bind=engine), interval=0)
+    yield writer
+    writer.close()
+
+
+def test_writer_does_not_wait_on_an_exhausted_pool(tmp_path, unpooled_writer):
+    pooled = build_engine(
+        tmp_path / "writer.db", profile="concurrent", busy_timeout=0.2, pool_size=2
+    )
+    held = [pooled.connect(), pooled.connect()]
+    try:
+        _submit(
+            unpooled_writer, lambda session: session.execute(text("CREATE TABLE t (x)"))
+        )
+        assert (
+            _submit(
+                unpooled_writer,
+                lambda session: session.execute(
+                    text("INSERT INTO t VALUES (1)")
+                ).rowcount,
+            )
+            == 1
+        )
+    finally:
+        for connection in held:
+            connection.close()
+
+
+def test_stopped_writer_fails_queued_and_later_writes(unpooled_writer):
+    with pytest.raises(_Stop):
+        _submit(unpooled_writer, _stop)
+    unpooled_writer._thread.join(timeout=5)
+
+    assert not unpooled_writer.is_alive()
+    with pytest.raises(_Stop):
+        _submit(unpooled_writer, lambda session: None)
+
+
+def test_get_writer_replaces_a_stopped_writer(monkeypatch):
+    monkeypatch.setenv("DB_GROUP_COMMIT", "true")
+    get_config.cache_clear()
+    monkeypatch.setattr(write_queue, "_writer", None)
+    try:
+        writer = get_writer()
+        with pytest.raises(_Stop):
+            _submit(writer, _stop)
+        writer._thread.join(timeout=5)
+
+        replacement = get_writer()
+        assert replacement is not writer
+        assert _submit(replacement, lambda session: 1) == 1
+        replacement.close()
+    finally:
+        get_config.cache_clear()